@@ -359,6 +359,26 @@ with tab1:
             ))
             fig.update_layout(height=200)
             st.plotly_chart(fig, use_container_width=True)
+    
+    # Kesehatan per engine dari registry metrics scraper
+    if IMPORT_SUCCESS:
+        engine_metrics = scraper.metrics.snapshot()['engines']
+        if engine_metrics:
+            st.subheader("Engine Health")
+            health_df = pd.DataFrame([
+                {
+                    'Engine': name,
+                    'Requests': row['requests'],
+                    'Error %': round(row['error_rate'] * 100, 1),
+                    'p50 (s)': round(row['p50_latency'], 2) if row['p50_latency'] is not None else None,
+                    'p95 (s)': round(row['p95_latency'], 2) if row['p95_latency'] is not None else None,
+                    'MB': round(row['bytes'] / 1e6, 1),
+                    'New Sites/Request': round(row['new_sites_per_request'], 2),
+                    'Statuses': ', '.join(f"{code}: {n}" for code, n in sorted(row['statuses'].items())),
+                }
+                for name, row in sorted(engine_metrics.items())
+            ])
+            st.dataframe(health_df, use_container_width=True, hide_index=True)
 
 with tab2:
     st.subheader("Live Scraping Monitor")
@@ -485,6 +505,17 @@ with tab4:
             use_container_width=True,
             hide_index=True
         )
+        
+        # Yield yang dipelajari selector (dimuat dari run sebelumnya jika belum ada)
+        if not scraper.engine_bandit.arms and os.path.exists(scraper.SELECTOR_FILE):
+            scraper.load_selector_stats(scraper.SELECTOR_FILE)
+        
+        st.write("**Learned Engine Yield (new sites/request):**")
+        engine_yield = scraper.engine_bandit.table()
+        if engine_yield:
+            st.dataframe(pd.DataFrame(engine_yield), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No engine statistics yet.")
     
     with col2:
         st.subheader("Dork Configuration")
@@ -507,6 +538,13 @@ with tab4:
         
         if st.button("🔄 Update Dorks Selection"):
             st.success(f"Selected {len(selected_dorks)} dorks for scraping")
+        
+        st.write("**Learned Dork Yield (top 20):**")
+        dork_yield = scraper.dork_bandit.table(20)
+        if dork_yield:
+            st.dataframe(pd.DataFrame(dork_yield), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No dork statistics yet.")
 
 # Footer
 st.markdown("---")
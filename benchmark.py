@@ -0,0 +1,1158 @@
+#!/usr/bin/env python3
+"""
+Shopify Scraper V6.0 - Benchmarks
+Offline micro-benchmarks for the scraper hot paths
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.parse
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import scraper
+
+# ============================================================================
+# FIXTURE CORPUS
+# ============================================================================
+
+# Fragments modelled on the markup the engines in scraper.py return
+RESULT_TEMPLATES = [
+    # Yahoo
+    '<li><div class="compTitle"><a href="https://r.search.yahoo.com/_ylt=Awr{noise}/RU=https%3a%2f%2f{label}.myshopify.com%2f/RK=2/RS={noise}-" '
+    'target="_blank"><span>{label}.myshopify.com</span><h3>{title}</h3></a></div>'
+    '<p class="fz-ms">https://{label}.myshopify.com/collections/all</p></li>',
+    # DuckDuckGo html
+    '<div class="result results_links web-result"><h2 class="result__title">'
+    '<a rel="nofollow" class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2F{label}.myshopify.com%2Fproducts%2F{path}&amp;rut={noise}">{title}</a></h2>'
+    '<a class="result__url" href="https://{label}.myshopify.com/products/{path}">{label}.myshopify.com/products/{path}</a></div>',
+    # Brave
+    '<div class="snippet" data-type="web"><a href="https://{label}.myshopify.com/" class="h svelte-{noise}">'
+    '<div class="url">{label}.myshopify.com <span>› products</span></div><div class="title">{title}</div></a>'
+    '<img src="https://cdn.shopify.com/s/files/1/{noise}/{path}.png?v=1"></div>',
+    # SearX
+    '<article class="result result-default category-general"><a href="https://{label}.myshopify.com/pages/{path}" class="url_wrapper" rel="noreferrer">'
+    '<span class="url_o1"><span class="url_i1">https://{label}.myshopify.com</span></span></a>'
+    '<h3><a href="https://{label}.myshopify.com/pages/{path}" rel="noreferrer">{title}</a></h3>'
+    '<p class="content">Shop {title} at {label}.myshopify.com. Free shipping.</p></article>',
+    # Plain text / JSON blobs
+    '<script>window.__DATA__={{"url":"https:\\/\\/{label}.myshopify.com\\/cart","host":"{upper}.MYSHOPIFY.COM"}};</script>',
+]
+
+# Less common shapes the legacy patterns also pick up
+EDGE_TEMPLATES = [
+    '<a href="//{short}.myshopify.com/collections">{title}</a>',
+    '<a href="{short}.myshopify.com">{title}</a>',
+    '<a href="https://user@{short}.myshopify.com:443/">{title}</a>',
+    '<img src=\'//{short}.myshopify.com/logo.png\'>',
+    '<p>http://{short}.myshopify.com/ and HTTPS://{upper}.myshopify.com:8443</p>',
+    '<p>see myshopify.com/{path} or www.{label}.myshopify.com.</p>',
+    '<a href="https://www.google.com/url?q=https://{label}.myshopify.com">{title}</a>',
+    '<p>({label}.myshopify.com), {label}.myshopify.com; {label}.myshopify.com!</p>',
+]
+
+WORDS = ['alpha', 'bloom', 'cedar', 'dusk', 'ember', 'fable', 'grove', 'haven', 'iris',
+         'juniper', 'kettle', 'lumen', 'maple', 'nook', 'orbit', 'pebble', 'quill', 'river',
+         'sable', 'tidal', 'umber', 'velvet', 'willow', 'yarrow', 'zephyr']
+
+def _random_label(rng):
+    """Generate a plausible store subdomain"""
+    parts = rng.sample(WORDS, rng.randint(1, 3))
+    label = '-'.join(parts)
+    if rng.random() < 0.3:
+        label += str(rng.randint(1, 9999))
+    return label
+
+def build_fixture_corpus(pages=200, seed=1337):
+    """Generate a deterministic corpus of search result pages as bytes"""
+    rng = random.Random(seed)
+    corpus = []
+
+    for _ in range(pages):
+        chunks = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>site:myshopify.com</title>'
+                  '<style>' + 'a{color:#1a0dab}' * rng.randint(50, 200) + '</style></head><body>']
+        chunks.append('<div id="header">' + ' '.join(rng.choice(WORDS) for _ in range(400)) + '</div>')
+
+        for _ in range(rng.randint(8, 20)):
+            label = _random_label(rng)
+            fields = {
+                'label': label,
+                'upper': label.upper(),
+                'short': rng.choice(['abc', 'xy', 'k9', 'a-b', 'z']),
+                'path': rng.choice(WORDS) + '-' + rng.choice(WORDS),
+                'title': f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} – Café ✓",
+                'noise': '%08x' % rng.getrandbits(32),
+            }
+            chunks.append(rng.choice(RESULT_TEMPLATES).format(**fields))
+            if rng.random() < 0.25:
+                chunks.append(rng.choice(EDGE_TEMPLATES).format(**fields))
+
+        chunks.append('<footer>' + '&nbsp;'.join(rng.choice(WORDS) for _ in range(600)) + '</footer></body></html>')
+        corpus.append(''.join(chunks).encode('utf-8'))
+
+    return corpus
+
+def load_corpus_dir(directory):
+    """Load every file in a directory as a raw page"""
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                corpus.append(f.read())
+    return corpus
+
+# ============================================================================
+# EXTRACTION BENCHMARK
+# ============================================================================
+
+CANONICAL_RE = re.compile(r"https://[a-z0-9\-]+\.myshopify\.com")
+
+def legacy_extract(content):
+    """Run the legacy extractor the way the search functions used to"""
+    return scraper.extract_shopify_urls(content.decode('utf-8', 'replace'))
+
+def check_extractor_equivalence(corpus):
+    """Compare the fast extractor with the legacy one on every page
+
+    The legacy extractor also emits non-canonical hosts (``www.`` prefixes,
+    trailing junk after ``.myshopify.com``); those are dropped before the
+    comparison because the fast path only emits canonical keys.
+    """
+    mismatches = []
+    for index, page in enumerate(corpus):
+        expected = {url for url in legacy_extract(page) if CANONICAL_RE.fullmatch(url)}
+        actual = set(scraper.extract_shopify_urls_fast(page))
+        if expected != actual:
+            mismatches.append((index, sorted(expected - actual), sorted(actual - expected)))
+    return mismatches
+
+def check_scanner_equivalence(corpus, seed=0):
+    """Feed every page to ResponseScanner in random-sized chunks and compare
+
+    Returns (index, missing, extra) for pages where the streamed URLs differ
+    from extract_shopify_urls_fast() over the whole body.
+    """
+    rng = random.Random(seed)
+    unbounded = {'max_bytes': sys.maxsize}
+    mismatches = []
+    for index, page in enumerate(corpus):
+        scanner = scraper.ResponseScanner(unbounded)
+        offset = 0
+        while offset < len(page):
+            size = rng.choice((1, 7, 512, scraper.SCAN_CHUNK_SIZE, rng.randint(1, 65536)))
+            scanner.feed(page[offset:offset + size])
+            offset += size
+        expected = set(scraper.extract_shopify_urls_fast(page))
+        actual = set(scanner.finish())
+        if expected != actual:
+            mismatches.append((index, sorted(expected - actual), sorted(actual - expected)))
+    return mismatches
+
+def _time_extractor(func, corpus, rounds):
+    """Return (seconds, pages) for running func over the corpus"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page in corpus:
+            func(page)
+    return time.perf_counter() - start, rounds * len(corpus)
+
+def bench_extract(args):
+    """Benchmark legacy vs single-pass URL extraction"""
+    if args.archive:
+        corpus = [body for meta, body in scraper.iter_archive(args.archive) if 200 <= meta['status'] < 400]
+    elif args.corpus:
+        corpus = load_corpus_dir(args.corpus)
+    else:
+        corpus = build_fixture_corpus(args.pages)
+    if not corpus:
+        print("❌ Empty corpus!")
+        return 1
+
+    total_bytes = sum(len(page) for page in corpus)
+    print(f"📄 Corpus: {len(corpus):,} pages, {total_bytes / 1e6:.2f} MB")
+
+    mismatches = check_extractor_equivalence(corpus)
+    if mismatches:
+        print(f"❌ Extractors disagree on {len(mismatches)} pages")
+        for index, missing, extra in mismatches[:10]:
+            print(f"   page {index}: missing={missing[:5]} extra={extra[:5]}")
+        return 1
+    print("✅ Fast extractor matches legacy output on every page")
+
+    mismatches = check_scanner_equivalence(corpus)
+    if mismatches:
+        print(f"❌ Streaming scanner disagrees on {len(mismatches)} pages")
+        for index, missing, extra in mismatches[:10]:
+            print(f"   page {index}: missing={missing[:5]} extra={extra[:5]}")
+        return 1
+    print("✅ Streaming scanner matches whole-body extraction on every page")
+
+    print(f"\n{'Extractor':<12} {'MB/s':>10} {'pages/s':>12}")
+    results = {}
+    for name, func in (('legacy', legacy_extract), ('fast', scraper.extract_shopify_urls_fast)):
+        elapsed, pages = _time_extractor(func, corpus, args.rounds)
+        results[name] = elapsed
+        print(f"{name:<12} {total_bytes * args.rounds / elapsed / 1e6:>10.1f} {pages / elapsed:>12,.0f}")
+
+    print(f"\n⚡ Speedup: {results['legacy'] / results['fast']:.1f}x")
+    return 0
+
+# ============================================================================
+# LOCAL STAND-IN ENGINE
+# ============================================================================
+
+async def _serve_engine_connection(reader, writer, pages, latency, load):
+    """Answer keep-alive GET requests with fixture pages after a delay
+
+    With a capacity, requests beyond it slow every answer down in proportion
+    and more than twice as many get a 500, like an overloaded engine. On top
+    of that, error_rate of the answers are 500s and throttle_rate are 429s
+    with a one-second Retry-After, and tail_rate of them take tail_latency.
+    """
+    rng = load['rng']
+    try:
+        while True:
+            head = await reader.readuntil(b'\r\n\r\n')
+            path = head.split(b' ', 2)[1]
+            load['in_flight'] += 1
+            try:
+                overload = load['in_flight'] / load['capacity'] if load['capacity'] else 0
+                jitter = rng.uniform(1 - load['jitter'], 1 + load['jitter'])
+                if rng.random() < load['tail_rate']:
+                    await asyncio.sleep(load['tail_latency'])
+                else:
+                    await asyncio.sleep(latency * jitter * max(1.0, overload))
+            finally:
+                load['in_flight'] -= 1
+            roll = rng.random()
+            if overload > 2 or roll < load['error_rate']:
+                writer.write(b'HTTP/1.1 500 Internal Server Error\r\nContent-Length: 0\r\n'
+                             b'Connection: keep-alive\r\n\r\n')
+            elif roll < load['error_rate'] + load['throttle_rate']:
+                writer.write(b'HTTP/1.1 429 Too Many Requests\r\nRetry-After: 1\r\nContent-Length: 0\r\n'
+                             b'Connection: keep-alive\r\n\r\n')
+            else:
+                body = pages[hash(path) % len(pages)]
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n'
+                             b'Content-Length: %d\r\nConnection: keep-alive\r\n\r\n' % len(body) + body)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError, IndexError):
+        pass
+    finally:
+        writer.close()
+
+def serve_fake_engine(port_queue, latency, pages=100, capacity=0, error_rate=0.0, throttle_rate=0.0, jitter=0.0,
+                      tail_rate=0.0, tail_latency=0.0):
+    """Run a local search engine stand-in until the process is killed"""
+    corpus = build_fixture_corpus(pages, seed=os.getpid())
+    load = {'in_flight': 0, 'capacity': capacity, 'error_rate': error_rate, 'throttle_rate': throttle_rate,
+            'jitter': jitter, 'tail_rate': tail_rate, 'tail_latency': tail_latency, 'rng': random.Random(os.getpid())}
+
+    async def serve():
+        server = await asyncio.start_server(
+            lambda r, w: _serve_engine_connection(r, w, corpus, latency, load),
+            '127.0.0.1', 0, backlog=4096)
+        port_queue.put(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+def start_fake_engine(latency, pages=100, capacity=0, error_rate=0.0, throttle_rate=0.0, jitter=0.0,
+                      tail_rate=0.0, tail_latency=0.0):
+    """Start the stand-in engine in its own process and return (process, url)"""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve_fake_engine,
+                                      args=(port_queue, latency, pages, capacity, error_rate, throttle_rate, jitter,
+                                            tail_rate, tail_latency),
+                                      daemon=True)
+    process.start()
+    port = port_queue.get(timeout=30)
+    return process, f"http://127.0.0.1:{port}/search"
+
+async def _serve_stalled_connection(reader, writer, drip):
+    """Take requests and never finish answering them
+
+    With a drip interval the headers of a 200 go out at once, followed by
+    one body byte every drip seconds; without one nothing is sent back.
+    """
+    try:
+        await reader.readuntil(b'\r\n\r\n')
+        if drip:
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: 1000000\r\n\r\n')
+            while True:
+                await writer.drain()
+                await asyncio.sleep(drip)
+                writer.write(b' ')
+        else:
+            await reader.read()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+def serve_stalled_engines(port_queue, drips):
+    """Run one stalled engine per drip interval (0 = silent) until the process is killed"""
+
+    async def serve():
+        servers = []
+        for drip in drips:
+            servers.append(await asyncio.start_server(
+                lambda r, w, drip=drip: _serve_stalled_connection(r, w, drip), '127.0.0.1', 0, backlog=1024))
+        port_queue.put([server.sockets[0].getsockname()[1] for server in servers])
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+
+    asyncio.run(serve())
+
+def start_stalled_engines(drips):
+    """Start stalled engines in their own process and return (process, urls)"""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve_stalled_engines, args=(port_queue, drips), daemon=True)
+    process.start()
+    ports = port_queue.get(timeout=30)
+    return process, [f"http://127.0.0.1:{port}/search" for port in ports]
+
+# ============================================================================
+# LOCAL FORWARD PROXY
+# ============================================================================
+
+async def _read_http_message(reader):
+    """Read one HTTP/1.1 message with a Content-Length body; returns (head, body)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = 0
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            length = int(value)
+    body = await reader.readexactly(length) if length else b''
+    return head, body
+
+async def _serve_proxy_connection(reader, writer, latency, failure_rate, rng):
+    """Relay absolute-form GET requests (plain HTTP only) to their origin
+
+    Keeps one upstream connection per origin for the client connection's
+    lifetime. failure_rate of the requests get a dropped connection, like a
+    dying public proxy.
+    """
+    upstreams = {}
+    try:
+        while True:
+            head, body = await _read_http_message(reader)
+            method, target, version = head.split(b'\r\n', 1)[0].split(b' ', 2)
+            if rng.random() < failure_rate:
+                break
+            url = urllib.parse.urlsplit(target.decode('latin-1'))
+            origin = (url.hostname, url.port or 80)
+            path = (url.path or '/') + (f"?{url.query}" if url.query else '')
+            lines = [line for line in head.split(b'\r\n')[1:]
+                     if line and not line.lower().startswith(b'proxy-')]
+            request = b'\r\n'.join([b' '.join([method, path.encode('latin-1'), version])] + lines) + b'\r\n\r\n'
+            
+            await asyncio.sleep(latency)
+            if origin not in upstreams:
+                upstreams[origin] = await asyncio.open_connection(*origin)
+            upstream_reader, upstream_writer = upstreams[origin]
+            upstream_writer.write(request + body)
+            await upstream_writer.drain()
+            response_head, response_body = await _read_http_message(upstream_reader)
+            writer.write(response_head + response_body)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError, OSError, ValueError):
+        pass
+    finally:
+        for _, upstream_writer in upstreams.values():
+            upstream_writer.close()
+        writer.close()
+
+def serve_fake_proxies(port_queue, count, latency, failure_rate):
+    """Run count forward proxies on one event loop until the process is killed"""
+    rng = random.Random(os.getpid())
+    handlers = set()
+
+    async def handle(reader, writer):
+        # A client that hangs up mid-relay leaves asyncio without a reference to
+        # the handler, which would then be collected while it awaits its upstream
+        task = asyncio.current_task()
+        handlers.add(task)
+        try:
+            await _serve_proxy_connection(reader, writer, latency, failure_rate, rng)
+        finally:
+            handlers.discard(task)
+
+    async def serve():
+        servers = []
+        for _ in range(count):
+            servers.append(await asyncio.start_server(handle, '127.0.0.1', 0, backlog=1024))
+        port_queue.put([server.sockets[0].getsockname()[1] for server in servers])
+        await asyncio.gather(*(server.serve_forever() for server in servers))
+
+    asyncio.run(serve())
+
+def start_fake_proxies(count, latency=0.0, failure_rate=0.0):
+    """Start count local forward proxies in their own process and return (process, proxy URLs)"""
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve_fake_proxies, args=(port_queue, count, latency, failure_rate),
+                                      daemon=True)
+    process.start()
+    ports = port_queue.get(timeout=30)
+    return process, [f"http://127.0.0.1:{port}" for port in ports]
+
+# ============================================================================
+# ENGINE BENCHMARK
+# ============================================================================
+
+BENCH_DORKS_PER_SECOND = 1000  # Dorks per second of run, more than the fastest run searches
+
+def bench_dorks(seconds, workers=0):
+    """Numbered copies of scraper.DORKS, enough that a run never re-searches a lane
+
+    WorkScheduler cools exhausted lanes down for longer than any benchmark
+    runs, so a run that used up its lanes would measure idle workers.
+    """
+    wanted = max(workers * 2, int(seconds * BENCH_DORKS_PER_SECOND))
+    copies = max(1, -(-wanted // len(scraper.DORKS)))
+    return [f"{dork} {i}" for i in range(copies) for dork in scraper.DORKS]
+
+def new_per_search(result):
+    """Sites found per search of a child's JSON report"""
+    return result['found'] / max(1, result['searches'])
+
+def locked_record_search_results(work, task, success, urls, icon, engine_name=None, has_next=None, answered=None):
+    """The pre-pipeline discovery path: dedup, stats and print under sites_lock"""
+    new_sites = 0
+    with scraper.sites_lock:
+        scraper.stats['searches'] += 1
+
+        for url in urls:
+            if url not in scraper.found_sites:
+                scraper.found_sites.add(url)
+                new_sites += 1
+
+        if new_sites > 0:
+            scraper.stats['found'] = len(scraper.found_sites)
+            source = f"{engine_name}: " if engine_name else ""
+            print(f"{icon} [{len(scraper.found_sites)}] {source}{urls[0][:60]}...")
+
+    work.done(task, success, urls, new_sites, has_next, answered)
+
+def run_engine_child(args):
+    """Run the proxyless search loop against the stand-in engine and report JSON"""
+    if args.pipeline == 'locked':
+        scraper.record_search_results = locked_record_search_results
+    failures = []
+    record = scraper.record_search_results
+
+    def counting_record_search_results(work, task, success, urls, icon, engine_name=None, has_next=None,
+                                       answered=None):
+        if not success:
+            failures.append(1)
+        record(work, task, success, urls, icon, engine_name, has_next, answered)
+    scraper.record_search_results = counting_record_search_results
+    # Unthrottled so the engines, not the rate scheduler, are measured
+    scraper.PROXYLESS_ENGINES[:] = [{'name': 'Local', 'url': args.url, 'param': 'q', 'rate': 1e6,
+                                     'page_param': 'p', 'page_start': 0, 'page_step': 1}]
+    scraper.session_pool.configure(scraper.PROXYLESS_ENGINES, args.workers)
+    scraper.rate_scheduler.configure(scraper.PROXYLESS_ENGINES)
+    # Enough lanes that every worker always has a page to fetch
+    dorks = bench_dorks(args.seconds, args.workers)
+    work = scraper.WorkScheduler(dorks, scraper.PROXYLESS_ENGINES)
+    scraper.stop_flag.clear()
+    run_workers = scraper.run_async_workers if args.engine == 'async' else scraper.run_thread_workers
+
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        # No per-worker search cap: the run is bounded by time only
+        if args.processes > 1:
+            scraper.DORKS[:] = dorks
+            scraper.run_sharded_scraping(args.processes, None, args.workers, args.seconds / 60, engine=args.engine,
+                                         selector_file=None, max_searches=sys.maxsize, adaptive=args.adaptive)
+            searches = scraper.stats['searches']
+        else:
+            searches = run_workers(args.workers, args.seconds / 60, sys.maxsize, work, None, args.adaptive)
+    elapsed = time.perf_counter() - start
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    shards = resource.getrusage(resource.RUSAGE_CHILDREN)
+    print(json.dumps({
+        'engine': args.engine,
+        'workers': args.workers,
+        'searches': searches,
+        'found': len(scraper.found_sites),
+        'failed': len(failures),
+        'elapsed': elapsed,
+        'overrun': elapsed - args.seconds,
+        'concurrency': scraper.concurrency.snapshot(),
+        'cpu': usage.ru_utime + usage.ru_stime + shards.ru_utime + shards.ru_stime,
+        'peak_rss_mb': usage.ru_maxrss / 1024,
+    }))
+    return 0
+
+def bench_engines(args):
+    """Compare the thread and async engines against a local stand-in engine"""
+    if not scraper.async_engine_available():
+        print("❌ The async engine requires aiohttp (pip install aiohttp)")
+        return 1
+
+    process, url = start_fake_engine(args.latency)
+    print(f"🧪 Stand-in engine at {url} ({args.latency * 1000:.0f} ms latency)")
+    print(f"\n{'Engine':<8} {'Workers':>8} {'Searches/s':>11} {'New/search':>11} {'Peak RSS MB':>12} {'CPU s':>7}")
+
+    try:
+        for workers in args.workers:
+            for engine in ('thread', 'async'):
+                result = run_engine(url, engine, workers, args.seconds)
+                print(f"{engine:<8} {workers:>8,} {result['searches'] / result['elapsed']:>11.1f} "
+                      f"{new_per_search(result):>11.2f} {result['peak_rss_mb']:>12.1f} {result['cpu']:>7.1f}")
+    finally:
+        process.kill()
+
+    return 0
+
+def run_engine(url, engine, workers, seconds, pipeline='queue', processes=1, adaptive=False):
+    """Run one _engine-run child and return its JSON report"""
+    output = subprocess.run(
+        [sys.executable, __file__, '_engine-run', '--engine', engine, '--workers', str(workers),
+         '--seconds', str(seconds), '--url', url, '--pipeline', pipeline, '--processes', str(processes)]
+        + (['--adaptive'] if adaptive else []),
+        capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def bench_processes(args):
+    """Searches/sec with the same total workers split across more processes"""
+    process, url = start_fake_engine(args.latency, args.pages)
+    print(f"🧪 Stand-in engine at {url} ({args.latency * 1000:.0f} ms latency, {os.cpu_count()} CPUs)")
+    print(f"\n{'Processes':>9} {'Workers':>8} {'Searches/s':>11} {'New/search':>11} {'CPU s':>7} {'Speedup':>8}")
+
+    try:
+        baseline = None
+        for processes in args.processes:
+            result = run_engine(url, args.engine, args.workers, args.seconds, processes=processes)
+            rate = result['searches'] / result['elapsed']
+            baseline = baseline or rate
+            print(f"{processes:>9} {args.workers:>8,} {rate:>11.1f} {new_per_search(result):>11.2f} "
+                  f"{result['cpu']:>7.1f} {rate / baseline:>7.2f}x")
+    finally:
+        process.kill()
+
+    return 0
+
+def bench_concurrency(args):
+    """Fixed vs adaptive concurrency against a stand-in engine that degrades under load"""
+    process, url = start_fake_engine(args.latency, capacity=args.capacity)
+    print(f"🧪 Stand-in engine at {url} ({args.latency * 1000:.0f} ms latency, "
+          f"slows down past {args.capacity} and fails past {args.capacity * 2} concurrent searches)")
+    print(f"\n{'Mode':<9} {'Workers':>8} {'Searches/s':>11} {'Errors':>7} {'Limit':>6} {'Overrun s':>10}")
+
+    try:
+        for workers in args.workers:
+            for adaptive in (False, True):
+                result = run_engine(url, args.engine, workers, args.seconds, adaptive=adaptive)
+                searches = max(1, result['searches'])
+                limit = result['concurrency']['limit'] if adaptive else workers
+                print(f"{'adaptive' if adaptive else 'fixed':<9} {workers:>8,} "
+                      f"{(searches - result['failed']) / result['elapsed']:>11.1f} "
+                      f"{result['failed'] / searches:>7.1%} {limit:>6,} {result['overrun']:>10.2f}")
+    finally:
+        process.kill()
+
+    return 0
+
+def run_breaker_child(args):
+    """Run the proxyless search loop over healthy and stalled stand-ins and report JSON"""
+    engines = [{'name': f"Local{i}", 'url': url, 'param': 'q', 'rate': 1e6,
+                'page_param': 'p', 'page_start': 0, 'page_step': 1}
+               for i, url in enumerate(args.urls.split(','))]
+    scraper.PROXYLESS_ENGINES[:] = engines
+    if not args.breaker:
+        scraper.BREAKER_FAILURES = sys.maxsize
+    scraper.session_pool.configure(engines, args.workers)
+    scraper.rate_scheduler.configure(engines)
+    scraper.engine_breaker.configure(engines)
+
+    # name -> [searches, answered, seconds spent, longest search]
+    per_engine = {engine['name']: [0, 0, 0.0, 0.0] for engine in engines}
+    record_search = scraper.metrics.record_search
+
+    def timed_record_search(engine, proxy, status, latency, *rest):
+        row = per_engine[engine]
+        row[0] += 1
+        row[1] += isinstance(status, int) and 200 <= status < 400
+        row[2] += latency
+        row[3] = max(row[3], latency)
+        record_search(engine, proxy, status, latency, *rest)
+    scraper.metrics.record_search = timed_record_search
+
+    work = scraper.WorkScheduler(bench_dorks(args.seconds, args.workers), engines)
+    scraper.stop_flag.clear()
+    run_workers = scraper.run_async_workers if args.engine == 'async' else scraper.run_thread_workers
+
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        run_workers(args.workers, args.seconds / 60, sys.maxsize, work, None, False)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'elapsed': elapsed,
+        'engines': per_engine,
+        'trips': sum(c['trips'] for c in scraper.engine_breaker.snapshot().values()),
+    }))
+    return 0
+
+def bench_breaker(args):
+    """Searches/sec of a healthy engine next to dead and dripping ones, with and without the breaker"""
+    healthy, url = start_fake_engine(args.latency)
+    stalled, stalled_urls = start_stalled_engines([0.0] * args.dead + [args.drip] * args.dripping)
+    print(f"🧪 1 healthy stand-in engine ({args.latency * 1000:.0f} ms), {args.dead} that never answer, "
+          f"{args.dripping} that send a byte every {args.drip:.1f}s")
+    print(f"\n{'Breaker':<8} {'Healthy/s':>10} {'Stalled':>8} {'Worker-s lost':>14} {'Longest s':>10} {'Trips':>6}")
+
+    try:
+        for breaker in (False, True):
+            output = subprocess.run(
+                [sys.executable, __file__, '_breaker-run', '--engine', args.engine, '--workers', str(args.workers),
+                 '--seconds', str(args.seconds), '--urls', ','.join([url] + stalled_urls)]
+                + (['--breaker'] if breaker else []),
+                capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            rows = result['engines']
+            stalled_rows = [rows[name] for name in rows if name != 'Local0']
+            print(f"{'on' if breaker else 'off':<8} {rows['Local0'][1] / result['elapsed']:>10.1f} "
+                  f"{sum(row[0] for row in stalled_rows):>8,} {sum(row[2] for row in stalled_rows):>14.1f} "
+                  f"{max(row[3] for row in rows.values()):>10.2f} {result['trips']:>6,}")
+    finally:
+        healthy.kill()
+        stalled.kill()
+
+    return 0
+
+# ============================================================================
+# END-TO-END SUITE
+# ============================================================================
+
+def run_suite_child(args):
+    """Run run_proxyless_scraping/run_proxy_scraping against the stand-ins and report JSON"""
+    engines = [{'name': f"Local{i}", 'url': url, 'param': 'q', 'weight': 1.0, 'rate': args.engine_rate,
+                'page_param': 'p', 'page_start': 0, 'page_step': 1}
+               for i, url in enumerate(args.urls.split(','))]
+    scraper.PROXYLESS_ENGINES[:] = engines
+    scraper.SEARCH_ENGINES[:] = engines
+    # The stand-ins answer by path, so only new dork/page pairs can find new sites
+    scraper.DORKS[:] = bench_dorks(args.seconds, args.workers)
+
+    # Every search that reached the network goes through record_search
+    latencies = []
+    record_search = scraper.metrics.record_search
+
+    def timed_record_search(engine, proxy, status, latency, *rest):
+        latencies.append(latency)
+        record_search(engine, proxy, status, latency, *rest)
+    scraper.metrics.record_search = timed_record_search
+
+    # ...while a hedged search's copies all go through run_hedged, so time the search as its worker saw it
+    waits = []
+    run_hedged, run_hedged_async = scraper.run_hedged, scraper.run_hedged_async
+
+    def timed_run_hedged(*hedged):
+        started = time.perf_counter()
+        try:
+            return run_hedged(*hedged)
+        finally:
+            waits.append(time.perf_counter() - started)
+
+    async def timed_run_hedged_async(*hedged):
+        started = time.perf_counter()
+        try:
+            return await run_hedged_async(*hedged)
+        finally:
+            waits.append(time.perf_counter() - started)
+    scraper.run_hedged, scraper.run_hedged_async = timed_run_hedged, timed_run_hedged_async
+
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        if args.mode == 'proxy':
+            scraper.run_proxy_scraping(args.proxies.split(','), args.workers, args.seconds / 60, engine=args.engine,
+                                       proxy_rate=args.proxy_rate, selector_file=None, adaptive=args.adaptive,
+                                       hedge=args.hedge)
+        else:
+            scraper.run_proxyless_scraping(args.workers, args.seconds / 60, engine=args.engine,
+                                           selector_file=None, adaptive=args.adaptive, hedge=args.hedge)
+    elapsed = time.perf_counter() - start
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    snapshot = scraper.metrics.snapshot()
+    statuses = {}
+    for row in snapshot['engines'].values():
+        for status, n in row['statuses'].items():
+            statuses[status] = statuses.get(status, 0) + n
+    latencies.sort()
+    print(json.dumps({
+        'mode': args.mode,
+        'engine': args.engine,
+        'workers': args.workers,
+        'adaptive': args.adaptive,
+        'hedge': args.hedge,
+        'elapsed': elapsed,
+        'searches': scraper.stats['searches'],
+        'found': len(scraper.found_sites),
+        'searches_per_sec': scraper.stats['searches'] / elapsed,
+        'sites_per_sec': len(scraper.found_sites) / elapsed,
+        'p50_latency': scraper.percentile(latencies, 50),
+        'p99_latency': scraper.percentile(latencies, 99),
+        'p99_wait': scraper.percentile(waits, 99),
+        'statuses': statuses,
+        'requests': sum(statuses.values()),
+        'hedging': scraper.hedger.snapshot(),
+        'mb_downloaded': sum(row['bytes'] for row in snapshot['engines'].values()) / 1e6,
+        'cpu': usage.ru_utime + usage.ru_stime,
+        'peak_rss_mb': usage.ru_maxrss / 1024,
+    }))
+    return 0
+
+def _git_commit():
+    """Short hash of the checked-out commit, if this is a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def bench_suite(args):
+    """Full runs against local stand-in engines and proxies, saved as a JSON report"""
+    if 'async' in args.engines and not scraper.async_engine_available():
+        print("❌ The async engine requires aiohttp (pip install aiohttp)")
+        return 1
+
+    servers = []
+    try:
+        urls = []
+        for _ in range(args.engine_count):
+            process, url = start_fake_engine(args.latency, args.pages, error_rate=args.error_rate,
+                                             throttle_rate=args.throttle_rate, jitter=args.jitter)
+            servers.append(process)
+            urls.append(url)
+        print(f"🧪 {len(urls)} stand-in engines ({args.latency * 1000:.0f} ms ±{args.jitter:.0%}, "
+              f"{args.error_rate:.0%} errors, {args.throttle_rate:.0%} 429s, {args.pages} pages each)")
+        proxies = []
+        if 'proxy' in args.modes:
+            process, proxies = start_fake_proxies(args.proxy_count, args.proxy_latency, args.proxy_failure_rate)
+            servers.append(process)
+            print(f"🌐 {len(proxies)} local forward proxies ({args.proxy_latency * 1000:.0f} ms, "
+                  f"{args.proxy_failure_rate:.0%} dropped)")
+
+        print(f"\n{'Mode':<10} {'Engine':<7} {'Searches/s':>11} {'Sites/s':>8} {'New/search':>11} {'p50 ms':>7} {'p99 ms':>7} "
+              f"{'CPU s':>6} {'RSS MB':>7}")
+        results = []
+        for mode in args.modes:
+            for engine in args.engines:
+                command = [sys.executable, __file__, '_suite-run', '--mode', mode, '--engine', engine,
+                           '--workers', str(args.workers), '--seconds', str(args.seconds), '--urls', ','.join(urls),
+                           '--engine-rate', str(args.engine_rate), '--proxy-rate', str(args.proxy_rate)]
+                if proxies:
+                    command += ['--proxies', ','.join(proxies)]
+                if args.adaptive:
+                    command.append('--adaptive')
+                output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                results.append(result)
+                p50 = f"{result['p50_latency'] * 1000:.0f}" if result['p50_latency'] is not None else "n/a"
+                p99 = f"{result['p99_latency'] * 1000:.0f}" if result['p99_latency'] is not None else "n/a"
+                print(f"{mode:<10} {engine:<7} {result['searches_per_sec']:>11.1f} {result['sites_per_sec']:>8.1f} "
+                      f"{new_per_search(result):>11.2f} {p50:>7} {p99:>7} {result['cpu']:>6.1f} {result['peak_rss_mb']:>7.1f}")
+    finally:
+        for process in servers:
+            process.kill()
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('func', 'report', 'baseline')},
+        'results': results,
+    }
+    path = args.report or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📁 Report saved to: {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        before = {(r['mode'], r['engine']): r for r in baseline['results']}
+        print(f"\n📊 Against {args.baseline} ({baseline.get('commit') or 'unknown commit'}):")
+        for result in results:
+            old = before.get((result['mode'], result['engine']))
+            if old and old['searches_per_sec']:
+                change = result['searches_per_sec'] / old['searches_per_sec'] - 1
+                print(f"   {result['mode']:<10} {result['engine']:<7} {change:+.1%} searches/s")
+    return 0
+
+def bench_hedge(args):
+    """The same runs without and with --hedge against stand-in engines with a slow tail"""
+    if args.engine == 'async' and not scraper.async_engine_available():
+        print("❌ The async engine requires aiohttp (pip install aiohttp)")
+        return 1
+
+    servers = []
+    try:
+        urls = []
+        for _ in range(args.engine_count):
+            process, url = start_fake_engine(args.latency, args.pages, jitter=args.jitter,
+                                             tail_rate=args.tail_rate, tail_latency=args.tail_latency)
+            servers.append(process)
+            urls.append(url)
+        print(f"🧪 {len(urls)} stand-in engines ({args.latency * 1000:.0f} ms ±{args.jitter:.0%}, "
+              f"{args.tail_rate:.0%} of answers after {args.tail_latency:.1f}s)")
+        proxies = []
+        if args.mode == 'proxy':
+            process, proxies = start_fake_proxies(args.proxy_count)
+            servers.append(process)
+            print(f"🌐 {len(proxies)} local forward proxies")
+
+        print(f"\n{'Hedge':<6} {'Searches/s':>11} {'Sites/s':>8} {'Requests':>9} {'Req/search':>11} {'New/req':>8} {'p50 ms':>7} "
+              f"{'p99 wait':>9} {'Hedged':>7} {'Won':>5}")
+        for hedge in (False, True):
+            command = [sys.executable, __file__, '_suite-run', '--mode', args.mode, '--engine', args.engine,
+                       '--workers', str(args.workers), '--seconds', str(args.seconds), '--urls', ','.join(urls)]
+            if proxies:
+                command += ['--proxies', ','.join(proxies)]
+            if hedge:
+                command.append('--hedge')
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            hedging = result['hedging']
+            settled = hedging['hedge_wins'] + hedging['primary_wins'] + hedging['both_failed']
+            p50 = f"{result['p50_latency'] * 1000:.0f}" if result['p50_latency'] is not None else "n/a"
+            # How long workers waited for a search, not how long each copy of it took
+            p99 = f"{result['p99_wait'] * 1000:.0f}" if result['p99_wait'] is not None else "n/a"
+            print(f"{'on' if hedge else 'off':<6} {result['searches_per_sec']:>11.1f} {result['sites_per_sec']:>8.1f} "
+                  f"{result['requests']:>9,} {result['requests'] / max(1, result['searches']):>11.2f} "
+                  f"{result['found'] / max(1, result['requests']):>8.2f} {p50:>7} {p99:>9} "
+                  f"{hedging['hedge_rate']:>7.1%} {hedging['hedge_wins'] / settled if settled else 0:>5.0%}")
+    finally:
+        for process in servers:
+            process.kill()
+    return 0
+
+# ============================================================================
+# CONTENTION BENCHMARK
+# ============================================================================
+
+class _SlowTerminal:
+    """Output sink where every write blocks like a terminal would"""
+
+    def __init__(self, write_cost):
+        self.write_cost = write_cost
+
+    def write(self, text):
+        time.sleep(self.write_cost)
+        return len(text)
+
+    def flush(self):
+        pass
+
+class _NullWork:
+    """WorkScheduler stand-in that ignores task reports"""
+
+    def done(self, task, success, urls, new_sites, has_next=None, answered=None):
+        pass
+
+def _time_discovery(record, results, workers, seconds, write_cost):
+    """Searches/sec through a discovery path with workers threads and no network"""
+    scraper.found_sites.clear()
+    scraper.search_counter.reset()
+    scraper.stop_flag.clear()
+    work = _NullWork()
+    task = scraper.SearchTask('site:myshopify.com', 'Local', 0, 0)
+    counts = []
+
+    def worker(index):
+        count = 0
+        while not scraper.stop_flag.is_set():
+            # A corpus page plus a couple of never-seen sites, like a productive search
+            urls = results[count % len(results)] + [f"https://w{index}-{count}-{n}.myshopify.com" for n in range(2)]
+            record(work, task, True, urls, "🌐", 'Local')
+            count += 1
+        counts.append(count)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(workers)]
+    with redirect_stdout(_SlowTerminal(write_cost)):
+        scraper.discovery.start()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        scraper.stop_flag.set()
+        for thread in threads:
+            thread.join()
+        scraper.discovery.stop()
+        elapsed = time.perf_counter() - start
+    return sum(counts) / elapsed
+
+def bench_contention(args):
+    """Searches/sec as thread workers scale, queue pipeline vs the old sites_lock path"""
+    # Discovery path on its own: every search result comes from the fixture corpus
+    corpus = build_fixture_corpus(200)
+    results = [scraper.extract_shopify_urls_fast(page) for page in corpus]
+    print(f"🧪 Discovery path only ({args.seconds:.0f}s per run, no network, "
+          f"{args.write_cost * 1e6:.0f} µs per terminal write)")
+    print(f"\n{'Workers':>8} {'Locked/s':>10} {'Queue/s':>10} {'Speedup':>8}")
+    for workers in args.workers:
+        locked = _time_discovery(locked_record_search_results, results, workers, args.seconds, args.write_cost)
+        queued = _time_discovery(scraper.record_search_results, results, workers, args.seconds, args.write_cost)
+        print(f"{workers:>8,} {locked:>10,.0f} {queued:>10,.0f} {queued / max(locked, 1e-9):>7.2f}x")
+
+    process, url = start_fake_engine(args.latency, args.pages)
+    print(f"\n🧪 End to end against the stand-in engine at {url} ({args.latency * 1000:.0f} ms latency, "
+          f"{args.pages:,} pages, no lane searched twice)")
+    print(f"\n{'Workers':>8} {'Locked/s':>10} {'Queue/s':>10} {'Speedup':>8} {'Locked new':>11} {'Queue new':>10}")
+
+    try:
+        for workers in args.workers:
+            rates, found = {}, {}
+            for pipeline in ('locked', 'queue'):
+                result = run_engine(url, 'thread', workers, args.seconds, pipeline)
+                rates[pipeline] = result['searches'] / result['elapsed']
+                found[pipeline] = new_per_search(result)
+            # New sites per search shows the searches were real work, not repeats
+            print(f"{workers:>8,} {rates['locked']:>10.1f} {rates['queue']:>10.1f} "
+                  f"{rates['queue'] / max(rates['locked'], 1e-9):>7.2f}x {found['locked']:>11.2f} {found['queue']:>10.2f}")
+    finally:
+        process.kill()
+
+    return 0
+
+# ============================================================================
+# DEDUP INDEX
+# ============================================================================
+
+def _dedup_labels(count, seed=7):
+    """count distinct store subdomains shaped like the ones engines return"""
+    rng = random.Random(seed)
+    return [f"{_random_label(rng)}-{n:x}" for n in range(count)]
+
+def _build_traced(build, labels):
+    """Build a structure from labels and return it with the bytes it holds on to"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    structure = build(labels)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return structure, used
+
+def _lookups_per_sec(structure, urls, rounds=3):
+    """Best-of-rounds membership tests per second"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for url in urls:
+            url in structure
+        best = min(best, time.perf_counter() - start)
+    return len(urls) / best
+
+def bench_dedup(args):
+    """Memory per site and lookup rate, set of URLs vs SiteIndex, plus the --known Bloom filter"""
+    labels = _dedup_labels(args.sites)
+    rng = random.Random(11)
+    hits = [f"https://{label}.myshopify.com" for label in rng.sample(labels, min(args.lookups, len(labels)))]
+    misses = [f"https://{label}-miss.myshopify.com" for label in rng.sample(labels, min(args.lookups, len(labels)))]
+
+    def build_set(labels):
+        return {f"https://{label}.myshopify.com" for label in labels}
+
+    def build_index(labels):
+        return scraper.SiteIndex(f"https://{label}.myshopify.com" for label in labels)
+
+    print(f"🧪 {args.sites:,} sites, {len(hits):,} hit and {len(misses):,} miss lookups\n")
+    print(f"{'Structure':<12} {'Bytes/site':>10} {'Total MB':>9} {'Hits/s':>12} {'Misses/s':>12}")
+    sizes = {}
+    for name, build in (('set', build_set), ('SiteIndex', build_index)):
+        structure, used = _build_traced(build, labels)
+        if len(structure) != len(labels) or not all(url in structure for url in hits[:1000]):
+            print(f"❌ {name} lost sites")
+            return 1
+        if any(url in structure for url in misses[:1000]):
+            print(f"❌ {name} reports sites it never saw")
+            return 1
+        sizes[name] = used
+        print(f"{name:<12} {used / len(labels):>10.1f} {used / 1e6:>9.1f} "
+              f"{_lookups_per_sec(structure, hits):>12,.0f} {_lookups_per_sec(structure, misses):>12,.0f}")
+        del structure
+    print(f"\n📉 SiteIndex uses {sizes['SiteIndex'] / sizes['set']:.0%} of the set's memory")
+
+    # Bloom filter front: sites known from elsewhere, checked only after a local miss
+    bloom = scraper.BloomFilter(len(labels), args.error_rate)
+    for label in labels:
+        bloom.add(label.encode('utf-8'))
+    if not all(label.encode('utf-8') in bloom for label in labels[:1000]):
+        print("❌ Bloom filter lost sites")
+        return 1
+    false_positives = sum(f"{label}-miss".encode('utf-8') in bloom for label in labels[:args.lookups])
+    probes = min(args.lookups, len(labels))
+    index = scraper.SiteIndex()
+    index.known = bloom
+    print(f"\n🧮 Bloom filter at {args.error_rate:g} target error: {bloom.size / len(labels):.1f} bits/site "
+          f"({len(bloom.bits) / 1e6:.1f} MB), {bloom.hashes} hashes, "
+          f"{false_positives / probes:.4%} measured false positives, "
+          f"{_lookups_per_sec(index, misses):,.0f} empty-index lookups/s")
+    return 0
+
+# ============================================================================
+# MAIN FUNCTION
+# ============================================================================
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Shopify Scraper v6.0 - Benchmarks')
+    sub = parser.add_subparsers(dest='bench', required=True)
+
+    extract = sub.add_parser('extract', help='Legacy vs single-pass URL extraction')
+    extract.add_argument('--corpus', type=str, help='Directory of saved pages (default: generated fixtures)')
+    extract.add_argument('--archive', type=str, help='Use the pages in a scraper.py --record archive')
+    extract.add_argument('--pages', type=int, default=200, help='Generated fixture pages (default: 200)')
+    extract.add_argument('--rounds', type=int, default=5, help='Passes over the corpus (default: 5)')
+    extract.set_defaults(func=bench_extract)
+
+    engines = sub.add_parser('engines', help='Thread vs async engine against a local stand-in engine')
+    engines.add_argument('--workers', type=lambda v: [int(n) for n in v.split(',')], default=[100, 500, 2000],
+                         help='Comma-separated worker counts (default: 100,500,2000)')
+    engines.add_argument('--seconds', type=float, default=15, help='Run length per engine (default: 15)')
+    engines.add_argument('--latency', type=float, default=0.2, help='Stand-in response latency (default: 0.2)')
+    engines.set_defaults(func=bench_engines)
+
+    contention = sub.add_parser('contention', help='Discovery path throughput as thread workers scale')
+    contention.add_argument('--workers', type=lambda v: [int(n) for n in v.split(',')], default=[10, 50, 100, 250, 500],
+                            help='Comma-separated worker counts (default: 10,50,100,250,500)')
+    contention.add_argument('--seconds', type=float, default=10, help='Run length per pipeline (default: 10)')
+    contention.add_argument('--latency', type=float, default=0.0, help='Stand-in response latency (default: 0)')
+    contention.add_argument('--pages', type=int, default=5000, help='Distinct fixture pages served (default: 5000)')
+    contention.add_argument('--write-cost', type=float, default=0.0001,
+                            help='Seconds each terminal write blocks in the discovery-only runs (default: 0.0001)')
+    contention.set_defaults(func=bench_contention)
+
+    dedup = sub.add_parser('dedup', help='Found-site set vs compact SiteIndex and Bloom filter')
+    dedup.add_argument('--sites', type=int, default=1000000, help='Distinct sites to insert (default: 1000000)')
+    dedup.add_argument('--lookups', type=int, default=200000, help='Hit and miss lookups to time (default: 200000)')
+    dedup.add_argument('--error-rate', type=float, default=scraper.KNOWN_BLOOM_ERROR,
+                       help=f'Bloom filter target false-positive rate (default: {scraper.KNOWN_BLOOM_ERROR})')
+    dedup.set_defaults(func=bench_dedup)
+
+    processes = sub.add_parser('processes', help='One process vs --processes shards against a local stand-in engine')
+    processes.add_argument('--processes', type=lambda v: [int(n) for n in v.split(',')], default=[1, 2, 4],
+                           help='Comma-separated process counts (default: 1,2,4)')
+    processes.add_argument('--workers', type=int, default=200, help='Total workers (default: 200)')
+    processes.add_argument('--engine', choices=['thread', 'async'], default='thread')
+    processes.add_argument('--seconds', type=float, default=15, help='Run length per process count (default: 15)')
+    processes.add_argument('--latency', type=float, default=0.0, help='Stand-in response latency (default: 0)')
+    processes.add_argument('--pages', type=int, default=100, help='Distinct fixture pages served (default: 100)')
+    processes.set_defaults(func=bench_processes)
+
+    limits = sub.add_parser('concurrency', help='Fixed vs adaptive concurrency against an overloadable stand-in engine')
+    limits.add_argument('--workers', type=lambda v: [int(n) for n in v.split(',')], default=[50, 200, 800],
+                        help='Comma-separated --workers ceilings (default: 50,200,800)')
+    limits.add_argument('--engine', choices=['thread', 'async'], default='async')
+    limits.add_argument('--seconds', type=float, default=20, help='Run length per mode (default: 20)')
+    limits.add_argument('--latency', type=float, default=0.1, help='Unloaded response latency (default: 0.1)')
+    limits.add_argument('--capacity', type=int, default=40,
+                        help='Concurrent searches the stand-in serves at full speed (default: 40)')
+    limits.set_defaults(func=bench_concurrency)
+
+    breaker = sub.add_parser('breaker', help='A healthy stand-in engine next to stalled ones, with and without the breaker')
+    breaker.add_argument('--workers', type=int, default=50, help='Workers (default: 50)')
+    breaker.add_argument('--engine', choices=['thread', 'async'], default='thread')
+    breaker.add_argument('--seconds', type=float, default=30, help='Run length per mode (default: 30)')
+    breaker.add_argument('--latency', type=float, default=0.1, help='Healthy engine latency (default: 0.1)')
+    breaker.add_argument('--dead', type=int, default=4, help='Engines that never answer (default: 4)')
+    breaker.add_argument('--dripping', type=int, default=2, help='Engines that drip their body (default: 2)')
+    breaker.add_argument('--drip', type=float, default=1.0, help='Seconds between dripped bytes (default: 1.0)')
+    breaker.set_defaults(func=bench_breaker)
+
+    hedge = sub.add_parser('hedge', help='Runs without and with --hedge against stand-in engines with a slow tail')
+    hedge.add_argument('--mode', choices=['proxyless', 'proxy'], default='proxyless')
+    hedge.add_argument('--engine', choices=['thread', 'async'], default='thread')
+    hedge.add_argument('--workers', type=int, default=50, help='Workers (default: 50)')
+    hedge.add_argument('--seconds', type=float, default=30, help='Run length per mode (default: 30)')
+    hedge.add_argument('--engine-count', type=int, default=3, help='Stand-in engines (default: 3)')
+    hedge.add_argument('--latency', type=float, default=0.1, help='Mean engine latency (default: 0.1)')
+    hedge.add_argument('--jitter', type=float, default=0.5, help='Latency spread, as a fraction (default: 0.5)')
+    hedge.add_argument('--tail-rate', type=float, default=0.05, help='Share of slow answers (default: 0.05)')
+    hedge.add_argument('--tail-latency', type=float, default=3.0, help='Latency of a slow answer (default: 3.0)')
+    hedge.add_argument('--pages', type=int, default=5000, help='Distinct fixture pages per engine (default: 5000)')
+    hedge.add_argument('--proxy-count', type=int, default=20, help='Local forward proxies (default: 20)')
+    hedge.set_defaults(func=bench_hedge)
+
+    suite = sub.add_parser('suite', help='Full scraping runs against local stand-in engines and proxies, saved as JSON')
+    suite.add_argument('--modes', type=lambda v: v.split(','), default=['proxyless', 'proxy'],
+                       help='Comma-separated modes: proxyless,proxy (default: both)')
+    suite.add_argument('--engines', type=lambda v: v.split(','), default=['thread', 'async'],
+                       help='Comma-separated worker engines: thread,async (default: both)')
+    suite.add_argument('--workers', type=int, default=100, help='Workers per run (default: 100)')
+    suite.add_argument('--seconds', type=float, default=20, help='Budget per run (default: 20)')
+    suite.add_argument('--adaptive', action='store_true', help='Let the concurrency controller pick the limit')
+    suite.add_argument('--engine-count', type=int, default=3, help='Stand-in engines (default: 3)')
+    suite.add_argument('--latency', type=float, default=0.1, help='Mean engine latency (default: 0.1)')
+    suite.add_argument('--jitter', type=float, default=0.5, help='Latency spread, as a fraction (default: 0.5)')
+    suite.add_argument('--error-rate', type=float, default=0.02, help='Share of 500 answers (default: 0.02)')
+    suite.add_argument('--throttle-rate', type=float, default=0.01, help='Share of 429 answers (default: 0.01)')
+    suite.add_argument('--pages', type=int, default=1000, help='Distinct fixture pages per engine (default: 1000)')
+    suite.add_argument('--engine-rate', type=float, default=1e6,
+                       help='Searches/second each engine is paced at (default: unthrottled)')
+    suite.add_argument('--proxy-count', type=int, default=20, help='Local forward proxies (default: 20)')
+    suite.add_argument('--proxy-latency', type=float, default=0.02, help='Added proxy latency (default: 0.02)')
+    suite.add_argument('--proxy-failure-rate', type=float, default=0.01,
+                       help='Share of requests a proxy drops (default: 0.01)')
+    suite.add_argument('--proxy-rate', type=float, default=1e6,
+                       help='Searches/second through each proxy (default: unthrottled)')
+    suite.add_argument('--report', type=str, help='JSON report path (default: benchmark_<timestamp>.json)')
+    suite.add_argument('--baseline', type=str, help='Earlier JSON report to compare searches/s against')
+    suite.set_defaults(func=bench_suite)
+
+    suite_child = sub.add_parser('_suite-run')
+    suite_child.add_argument('--mode', choices=['proxyless', 'proxy'], required=True)
+    suite_child.add_argument('--engine', choices=['thread', 'async'], required=True)
+    suite_child.add_argument('--workers', type=int, required=True)
+    suite_child.add_argument('--seconds', type=float, required=True)
+    suite_child.add_argument('--urls', type=str, required=True)
+    suite_child.add_argument('--proxies', type=str, default='')
+    suite_child.add_argument('--engine-rate', type=float, default=1e6)
+    suite_child.add_argument('--proxy-rate', type=float, default=1e6)
+    suite_child.add_argument('--adaptive', action='store_true')
+    suite_child.add_argument('--hedge', action='store_true')
+    suite_child.set_defaults(func=run_suite_child)
+
+    breaker_child = sub.add_parser('_breaker-run')
+    breaker_child.add_argument('--engine', choices=['thread', 'async'], required=True)
+    breaker_child.add_argument('--workers', type=int, required=True)
+    breaker_child.add_argument('--seconds', type=float, required=True)
+    breaker_child.add_argument('--urls', type=str, required=True)
+    breaker_child.add_argument('--breaker', action='store_true')
+    breaker_child.set_defaults(func=run_breaker_child)
+
+    child = sub.add_parser('_engine-run')
+    child.add_argument('--engine', choices=['thread', 'async'], required=True)
+    child.add_argument('--workers', type=int, required=True)
+    child.add_argument('--seconds', type=float, required=True)
+    child.add_argument('--url', type=str, required=True)
+    child.add_argument('--pipeline', choices=['queue', 'locked'], default='queue')
+    child.add_argument('--processes', type=int, default=1)
+    child.add_argument('--adaptive', action='store_true')
+    child.set_defaults(func=run_engine_child)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
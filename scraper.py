@@ -16,10 +16,34 @@ import sys
 import urllib.parse
 import json
 import argparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait as wait_futures, FIRST_COMPLETED
 from datetime import datetime
 import signal
 import csv
+import email.utils
+import itertools
+import multiprocessing
+import socket
+import socketserver
+import http.server
+import sqlite3
+import heapq
+import hashlib
+import zlib
+import io
+import glob
+import tempfile
+import math
+import struct
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from requests.adapters import HTTPAdapter
+import asyncio
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
 # Suppress warnings
 urllib3.disable_warnings()
@@ -39,53 +63,104 @@ USER_AGENTS = [
     "Mozilla/5.0 (X11; Ubuntu; Linux x86_64) Chrome/121.0.0.0",
 ]
 
-# Search engines for proxy mode
+# Search engines for proxy mode ('rate' = max searches/second across all workers,
+# page N is requested with page_param = page_start + N * page_step, 'adapter'
+# picks the request builder and parser from ENGINE_ADAPTERS (default 'html'),
+# 'results_start'/'results_end' are lower-case markup around the organic results,
+# 'next_page' is markup that only a page with a next page has, and 'max_bytes'
+# caps the bytes scanned per response)
 SEARCH_ENGINES = [
     {
         'name': 'Yahoo',
         'url': 'https://search.yahoo.com/search',
         'param': 'p',
-        'weight': 0.35
+        'weight': 0.35,
+        'rate': 10.0,
+        'page_param': 'b',
+        'page_start': 1,
+        'page_step': 10,
+        'results_start': b'id="web"',
+        'results_end': b'class="comppagination',
+        'next_page': b'class="next"'
     },
     {
         'name': 'DuckDuckGo',
         'url': 'https://html.duckduckgo.com/html/',
         'param': 'q',
-        'weight': 0.25
+        'weight': 0.25,
+        'rate': 8.0,
+        'page_param': 's',
+        'page_start': 0,
+        'page_step': 30,
+        'adapter': 'duckduckgo',
+        'results_start': b'id="links"',
+        'results_end': b'class="nav-link"',
+        'next_page': b'value="next"'
     },
     {
         'name': 'Brave',
         'url': 'https://search.brave.com/search',
         'param': 'q',
-        'weight': 0.20
+        'weight': 0.20,
+        'rate': 5.0,
+        'page_param': 'offset',
+        'page_start': 0,
+        'page_step': 1
     },
     {
         'name': 'SearX-1',
         'url': 'https://searx.be/search',
         'param': 'q',
-        'weight': 0.10
+        'weight': 0.10,
+        'rate': 3.0,
+        'page_param': 'pageno',
+        'page_start': 1,
+        'page_step': 1,
+        'adapter': 'searx',
+        'results_start': b'id="urls"',
+        'results_end': b'id="pagination"',
+        'next_page': b'class="next_page"'
     },
     {
         'name': 'SearX-2',
         'url': 'https://search.sapti.me/search',
         'param': 'q',
-        'weight': 0.10
+        'weight': 0.10,
+        'rate': 3.0,
+        'page_param': 'pageno',
+        'page_start': 1,
+        'page_step': 1,
+        'adapter': 'searx',
+        'results_start': b'id="urls"',
+        'results_end': b'id="pagination"',
+        'next_page': b'class="next_page"'
     }
 ]
 
-# Proxyless search engines
+# Proxyless search engines (same 'rate' and paging fields as above)
 PROXYLESS_ENGINES = [
     # Yahoo - most reliable
     {
         'name': 'Yahoo',
         'url': 'https://search.yahoo.com/search',
         'param': 'p',
+        'rate': 2.0,
+        'page_param': 'b',
+        'page_start': 1,
+        'page_step': 10,
+        'results_start': b'id="web"',
+        'results_end': b'class="comppagination',
+        'next_page': b'class="next"',
     },
     # Brave Search - excellent for Shopify
     {
         'name': 'Brave',
         'url': 'https://search.brave.com/search',
         'param': 'q',
+        'rate': 0.5,
+        'page_param': 'offset',
+        'page_start': 0,
+        'page_step': 1,
         'headers': {'Accept-Encoding': 'gzip, deflate'},
     },
     # SearX instances
@@ -93,52 +168,121 @@ PROXYLESS_ENGINES = [
         'name': 'SearX-1',
         'url': 'https://searx.be/search',
         'param': 'q',
+        'rate': 1.0,
+        'page_param': 'pageno',
+        'page_start': 1,
+        'page_step': 1,
+        'adapter': 'searx',
+        'results_start': b'id="urls"',
+        'results_end': b'id="pagination"',
+        'next_page': b'class="next_page"',
     },
     {
         'name': 'SearX-2',
         'url': 'https://search.sapti.me/search',
         'param': 'q',
+        'rate': 1.0,
+        'page_param': 'pageno',
+        'page_start': 1,
+        'page_step': 1,
+        'adapter': 'searx',
+        'results_start': b'id="urls"',
+        'results_end': b'id="pagination"',
+        'next_page': b'class="next_page"',
     },
     {
         'name': 'SearX-3',
         'url': 'https://searx.tiekoetter.com/search',
         'param': 'q',
+        'rate': 1.0,
+        'page_param': 'pageno',
+        'page_start': 1,
+        'page_step': 1,
+        'adapter': 'searx',
+        'results_start': b'id="urls"',
+        'results_end': b'id="pagination"',
+        'next_page': b'class="next_page"',
     },
     {
         'name': 'SearX-6',
         'url': 'https://search.ononoki.org/search',
         'param': 'q',
+        'rate': 1.0,
+        'page_param': 'pageno',
+        'page_start': 1,
+        'page_step': 1,
+        'adapter': 'searx',
+        'results_start': b'id="urls"',
+        'results_end': b'id="pagination"',
+        'next_page': b'class="next_page"',
     },
     {
         'name': 'SearX-7',
         'url': 'https://searx.nixnet.services/search',
         'param': 'q',
+        'rate': 1.0,
+        'page_param': 'pageno',
+        'page_start': 1,
+        'page_step': 1,
+        'adapter': 'searx',
+        'results_start': b'id="urls"',
+        'results_end': b'id="pagination"',
+        'next_page': b'class="next_page"',
     },
     {
         'name': 'SearX-9',
         'url': 'https://search.mdosch.de/search',
         'param': 'q',
+        'rate': 1.0,
+        'page_param': 'pageno',
+        'page_start': 1,
+        'page_step': 1,
+        'adapter': 'searx',
+        'results_start': b'id="urls"',
+        'results_end': b'id="pagination"',
+        'next_page': b'class="next_page"',
     },
     {
         'name': 'SearX-13',
         'url': 'https://priv.au/search',
         'param': 'q',
+        'rate': 1.0,
+        'page_param': 'pageno',
+        'page_start': 1,
+        'page_step': 1,
+        'adapter': 'searx',
+        'results_start': b'id="urls"',
+        'results_end': b'id="pagination"',
+        'next_page': b'class="next_page"',
     },
     {
         'name': 'SearX-15',
         'url': 'https://etsi.me/search',
         'param': 'q',
+        'rate': 1.0,
+        'page_param': 'pageno',
+        'page_start': 1,
+        'page_step': 1,
+        'adapter': 'searx',
+        'results_start': b'id="urls"',
+        'results_end': b'id="pagination"',
+        'next_page': b'class="next_page"',
     },
     # Alternative engines
     {
         'name': 'Yandex',
         'url': 'https://yandex.com/search/',
         'param': 'text',
+        'rate': 0.5,
+        'page_param': 'p',
+        'page_start': 0,
+        'page_step': 1,
     },
     {
         'name': 'Qwant',
         'url': 'https://www.qwant.com/',
         'param': 'q',
+        'rate': 0.5,
     },
 ]
 
@@ -234,17 +378,195 @@ MYSHOPIFY_RE_FULL = re.compile(r"https?://([a-z0-9\-]+)\.myshopify\.com[^\s<>\"'
 # Global variables
 MAX_PROXY_WORKERS = 800
 MAX_SCRAPE_WORKERS = 500
+DEFAULT_ENGINE_RATE = 1.0  # Searches/second for engines without a 'rate'
+DEFAULT_PROXY_RATE = 0.5   # Searches/second through a single proxy
 stop_flag = threading.Event()
-found_sites = set()
+proxy_pool = None
+work_scheduler = None
+shard_processes = []
 sites_lock = threading.Lock()
 stats = {
     'found': 0,
     'searches': 0,
     'start_time': None,
     'working_proxies': 0,
-    'failed_proxies': 0
+    'failed_proxies': 0,
+    'throttled': 0
 }
 
+# ============================================================================
+# SITE INDEX
+# ============================================================================
+
+SITE_INDEX_LOAD = 0.7      # Max hash table fill before it doubles
+KNOWN_BLOOM_ERROR = 0.001  # False-positive rate of Bloom filters built for --known
+
+def site_label(url):
+    """Subdomain label of a canonical https://<label>.myshopify.com URL as bytes, or None"""
+    if url.startswith('https://') and url.endswith('.myshopify.com'):
+        label = url[8:-14].encode('utf-8')
+        if label and len(label) < 256 and b'\n' not in label:
+            return label
+    return None
+
+class SiteIndex:
+    """Set of found sites that stores only the subdomain labels
+
+    Labels are kept back to back, newline-terminated, in one bytearray. An
+    open-addressing table of 32-bit fingerprints plus (offset, length)
+    entries in two arrays points into it, which is roughly 40 bytes per
+    site instead of ~115 for a set of URL strings. Anything that is not a
+    canonical myshopify URL goes in a plain set. Lookups are safe without
+    a lock while a single thread adds.
+
+    known is an optional BloomFilter of sites found elsewhere; they count
+    as present but are never stored.
+    """
+
+    def __init__(self, sites=()):
+        self.known = None
+        self.clear()
+        self.update(sites)
+
+    def clear(self):
+        self.labels = bytearray()
+        self.count = 0
+        self.other = set()
+        self.table = (array('I', bytes(4 * 1024)), array('Q', bytes(8 * 1024)), 1023)
+
+    @staticmethod
+    def _hash(label):
+        value = hash(label) & 0xFFFFFFFFFFFFFFFF
+        return value, (value >> 32) | 1
+
+    def _find(self, label, value, fingerprint, table):
+        fingerprints, entries, mask = table
+        i = value & mask
+        while True:
+            slot = fingerprints[i]
+            if slot == 0:
+                return i, False
+            if slot == fingerprint:
+                entry = entries[i]
+                start = entry >> 8
+                if self.labels[start:start + (entry & 0xFF)] == label:
+                    return i, True
+            i = (i + 1) & mask
+
+    def __contains__(self, url):
+        label = site_label(url)
+        if label is None:
+            return url in self.other
+        value, fingerprint = self._hash(label)
+        if self._find(label, value, fingerprint, self.table)[1]:
+            return True
+        return self.known is not None and label in self.known
+
+    def add(self, url):
+        label = site_label(url)
+        if label is None:
+            self.other.add(url)
+            return
+        value, fingerprint = self._hash(label)
+        table = self.table
+        i, found = self._find(label, value, fingerprint, table)
+        if found:
+            return
+
+        # Label, then entry, then fingerprint, so lock-free readers never see a half-added site
+        fingerprints, entries, mask = table
+        entries[i] = len(self.labels) << 8 | len(label)
+        self.labels += label + b'\n'
+        fingerprints[i] = fingerprint
+        self.count += 1
+        if self.count > (mask + 1) * SITE_INDEX_LOAD:
+            self._grow()
+
+    def _grow(self):
+        old_fingerprints, old_entries, old_mask = self.table
+        size = (old_mask + 1) * 2
+        fingerprints, entries, mask = array('I', bytes(4 * size)), array('Q', bytes(8 * size)), size - 1
+        for j in range(old_mask + 1):
+            if old_fingerprints[j]:
+                entry = old_entries[j]
+                start = entry >> 8
+                i = hash(bytes(self.labels[start:start + (entry & 0xFF)])) & mask
+                while fingerprints[i]:
+                    i = (i + 1) & mask
+                entries[i] = entry
+                fingerprints[i] = old_fingerprints[j]
+        self.table = (fingerprints, entries, mask)
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __len__(self):
+        return self.count + len(self.other)
+
+    def __iter__(self):
+        """Sites in the order they were added, as full URLs"""
+        labels = self.labels
+        end = len(labels)
+        start = 0
+        while start < end:
+            stop = labels.index(b'\n', start)
+            yield f"https://{labels[start:stop].decode('utf-8')}.myshopify.com"
+            start = stop + 1
+        yield from list(self.other)
+
+    def memory_bytes(self):
+        """Approximate footprint of the index"""
+        fingerprints, entries, _ = self.table
+        return (sys.getsizeof(self.labels) + fingerprints.buffer_info()[1] * 4 +
+                entries.buffer_info()[1] * 8 + sys.getsizeof(self.other))
+
+class BloomFilter:
+    """Fixed-size Bloom filter over byte strings that can be saved to disk"""
+
+    MAGIC = b'SSBLOOM1'
+
+    def __init__(self, capacity, error_rate=KNOWN_BLOOM_ERROR, size=None, hashes=None):
+        capacity = max(1, capacity)
+        self.size = size or max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = hashes or max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.MAGIC + struct.pack('<QQQ', self.size, self.hashes, self.count))
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            header = f.read(len(cls.MAGIC) + 24)
+            if not header.startswith(cls.MAGIC):
+                raise ValueError(f"{path} is not a Bloom filter file")
+            size, hashes, count = struct.unpack('<QQQ', header[len(cls.MAGIC):])
+            bloom = cls(count, size=size, hashes=hashes)
+            bloom.bits = bytearray(f.read())
+            bloom.count = count
+        return bloom
+
+found_sites = SiteIndex()
+
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
@@ -275,6 +597,72 @@ def print_stats():
     print(f"⏱️  Time Elapsed: {elapsed:.0f} seconds")
     if stats['working_proxies'] > 0:
         print(f"🌐 Working Proxies: {stats['working_proxies']:,}")
+    pool = stats.get('proxy_pool')
+    if pool and pool['requests']:
+        p50 = f"{pool['p50_latency']:.2f}s" if pool['p50_latency'] is not None else "n/a"
+        p95 = f"{pool['p95_latency']:.2f}s" if pool['p95_latency'] is not None else "n/a"
+        print(f"🧮 Proxy Pool: {pool['healthy']:,} healthy | {pool['quarantined']:,} quarantined | "
+              f"{pool['success_rate'] * 100:.1f}% useful | p50 {p50} | p95 {p95}")
+    cluster = stats.get('cluster')
+    if cluster:
+        print(f"🛰️  Cluster: {cluster['workers']:,} workers | {cluster['leased']:,} tasks leased | "
+              f"{cluster['expired']:,} leases expired")
+    limit = stats.get('concurrency')
+    if limit and limit['throughput']:
+        p50 = f"{limit['p50_latency']:.2f}s" if limit['p50_latency'] is not None else "n/a"
+        left = f" | {limit['time_left']:.0f}s left" if limit['time_left'] is not None else ""
+        print(f"🎛️  Concurrency: limit {limit['limit']:,}/{limit['ceiling']:,} ({limit['decision']}) | "
+              f"{limit['in_flight']:,} in flight | {limit['throughput']:.1f} searches/s | "
+              f"{limit['error_rate'] * 100:.1f}% errors | p50 {p50}{left}")
+    circuits = stats.get('breaker') or engine_breaker.snapshot()
+    if circuits:
+        states = [f"{name} {c['state']}" + (f" ({c['retry_in']:.0f}s)" if c['retry_in'] else "")
+                  for name, c in sorted(circuits.items())]
+        print(f"🔌 Circuits: {sum(c['trips'] for c in circuits.values()):,} trips | " + " | ".join(states))
+    hedging = stats.get('hedging') or hedger.snapshot()
+    if hedging['enabled'] and hedging['searches']:
+        settled = hedging['hedge_wins'] + hedging['primary_wins'] + hedging['both_failed']
+        won = f"{hedging['hedge_wins'] / settled * 100:.0f}%" if settled else "n/a"
+        delays = " | ".join(f"{name} after {delay:.2f}s" for name, delay in sorted(hedging['delays'].items()))
+        print(f"🪁 Hedging: {hedging['hedged']:,} hedged ({hedging['hedge_rate'] * 100:.1f}% of searches) | "
+              f"hedge won {won} | {hedging['cancelled']:,} cancelled | {hedging['refused']:,} refused"
+              + (f" | {delays}" if delays else ""))
+    coverage = stats.get('coverage')
+    if coverage:
+        print(f"🗺️  Coverage: {coverage['active']:,}/{coverage['lanes']:,} lanes active | {coverage['cooling']:,} cooling down | "
+              f"{coverage['queued']:,} queued | deepest page {coverage['deepest_page'] + 1} | {coverage['retried']:,} retried | "
+              f"{coverage['last_pages']:,} ended at last page")
+    cache = stats.get('response_cache') or (response_cache.snapshot() if response_cache else None)
+    if cache:
+        print(f"💾 Response Cache: {cache['hits']:,} hits ({cache['hit_rate'] * 100:.1f}%) | "
+              f"{cache['size_mb']:.1f} MB | {cache['evictions']:,} evicted")
+    engines = engine_bandit.table()
+    if engines:
+        print("🎰 Engine Yield: " + " | ".join(f"{row['arm']} {row['yield']:.2f} ({row['requests']:,})" for row in engines))
+        dorks = dork_bandit.table(3)
+        if dorks:
+            print("🔑 Top Dorks: " + " | ".join(f"{row['arm']} {row['yield']:.2f}" for row in dorks))
+    scanned = [row for row in metrics.snapshot()['engines'].values() if row['p95_scan_buffer'] is not None]
+    if scanned:
+        stops = {}
+        for row in scanned:
+            for reason, n in row['scan_stops'].items():
+                stops[reason] = stops.get(reason, 0) + n
+        print(f"📏 Response Scan: p95 buffer {max(row['p95_scan_buffer'] for row in scanned) / 1024:.0f} KB | "
+              f"{stops.get('results_end', 0):,} stopped after results | {stops.get('max_bytes', 0):,} hit max_bytes")
+    if verifier:
+        checked = verifier.snapshot()
+        print(f"🔎 Verified: {checked['live']:,} live | {checked['password']:,} password | {checked['closed']:,} closed | "
+              f"{checked['non_shopify']:,} not Shopify | {checked['error']:,} errors | {checked['backlog']:,} queued")
+    if enricher:
+        enriched = enricher.snapshot()
+        print(f"🏷️  Enriched: {enriched['enriched']:,} stores | {enriched['custom_domains']:,} custom domains | "
+              f"{enriched['failed']:,} unreachable | {enriched['in_flight']:,} in flight")
+    if stats.get('throttled', 0) > 0:
+        print(f"🐢 Throttled (429/503): {stats['throttled']:,}")
+        paused = [f"{name} ({b['paused_for']:.0f}s)" for name, b in rate_scheduler.snapshot().items() if b['paused_for'] > 0]
+        if paused:
+            print(f"⏸️  Paused: {', '.join(paused)}")
     print(f"{'='*80}\n")
 
 def save_sites_to_file(sites, filename=None, format='txt'):
@@ -310,6 +698,13 @@ def save_sites_to_file(sites, filename=None, format='txt'):
             json.dump(sorted(sites), f, indent=2)
         print(f"✅ Saved {len(sites):,} sites to {filename} (JSON format)")
     
+    elif format == 'jsonl':
+        filename = f"{filename}.jsonl"
+        with open(filename, 'w', encoding='utf-8') as f:
+            for site in sorted(sites):
+                f.write(json.dumps({'url': site}) + '\n')
+        print(f"✅ Saved {len(sites):,} sites to {filename} (JSONL format)")
+    
     return filename
 
 def display_sites(sites, limit=50):
@@ -365,6 +760,16 @@ def parse_proxy(line, proxy_type="http"):
         pass
     return None
 
+def iter_proxies_from_file(filename, proxy_type="http"):
+    """Yield unique parsed proxies from file without loading it whole"""
+    seen = set()
+    with open(filename, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            proxy = parse_proxy(line, proxy_type)
+            if proxy and proxy not in seen:
+                seen.add(proxy)
+                yield proxy
+
 def load_proxies_from_file(filename, proxy_type="http"):
     """Load and parse proxies from file"""
     proxies = set()
@@ -375,16 +780,9 @@ def load_proxies_from_file(filename, proxy_type="http"):
     
     print(f"📥 Loading proxies from: {filename}")
     try:
-        with open(filename, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
-        
-        for line in lines:
-            proxy = parse_proxy(line, proxy_type)
-            if proxy:
-                proxies.add(proxy)
-        
+        proxies = list(iter_proxies_from_file(filename, proxy_type))
         print(f"✅ Loaded {len(proxies):,} unique proxies")
-        return list(proxies)
+        return proxies
     
     except Exception as e:
         print(f"❌ Error reading file: {e}")
@@ -463,6 +861,222 @@ def extract_shopify_urls(html):
     
     return list(urls)
 
+# Bytes-level extraction tables
+_MYSHOPIFY_TAIL = b'myshopify.com'
+_LABEL_BYTES = frozenset(b'abcdefghijklmnopqrstuvwxyz0123456789-')
+_SCHEME_PREFIXES = (b'https://', b'http://')
+_ATTR_PREFIXES = (b'href=', b'src=')
+_CANONICAL_SHOPIFY_RE = re.compile(r"https://([a-z0-9\-]+)\.myshopify\.com")
+
+def _attribute_label(low, content, start):
+    """Resolve a short label through the href/src attribute it sits in"""
+    quote = max(low.rfind(b'"', 0, start), low.rfind(b"'", 0, start))
+    if quote < 0 or not low.endswith(_ATTR_PREFIXES, 0, quote):
+        return None
+
+    ends = [i for i in (low.find(b'"', start), low.find(b"'", start)) if i != -1]
+    if not ends:
+        return None
+
+    value = content[quote + 1:min(ends)].decode('utf-8', 'replace')
+    normalized = _normalize_shopify_url(value)
+    match = _CANONICAL_SHOPIFY_RE.fullmatch(normalized or '')
+    return match.group(1).encode('ascii') if match else None
+
+def extract_shopify_urls_fast(content):
+    """Extract Shopify URLs from raw response bytes in a single pass
+
+    Walks every ``myshopify.com`` occurrence once and emits the canonical
+    ``https://<label>.myshopify.com`` keys that extract_shopify_urls()
+    produces, without decoding the body or re-scanning it per pattern.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8', 'replace')
+    return [f"https://{label.decode('ascii')}.myshopify.com" for label in _shopify_labels(content)]
+
+def _shopify_labels(content, low=None):
+    """Set of store labels (as bytes) in content; low is content.lower() if already at hand"""
+    if low is None:
+        low = content.lower()
+    find = low.find
+    labels = set()
+    alt1_end = 0  # end of the last "<label>.myshopify.com" match
+    alt2_end = 0  # end of the last "myshopify.com/<path>" match
+
+    pos = find(_MYSHOPIFY_TAIL)
+    while pos != -1:
+        end = pos + 13
+
+        # <label>.myshopify.com
+        if pos > 0 and low[pos - 1] == 0x2e:
+            dot = pos - 1
+            start = dot
+            while start > alt1_end and low[start - 1] in _LABEL_BYTES:
+                start -= 1
+
+            if start < dot:
+                alt1_end = end
+                if dot - start > 3 or low.endswith(_SCHEME_PREFIXES, 0, start):
+                    labels.add(low[start:dot])
+                else:
+                    label = _attribute_label(low, content, start)
+                    if label:
+                        labels.add(label)
+
+        # myshopify.com/<path>
+        if pos >= alt2_end and low[end:end + 1] == b'/':
+            stop = end + 1
+            size = len(low)
+            while stop < size and low[stop] in _LABEL_BYTES:
+                stop += 1
+            if stop > end + 1:
+                alt2_end = stop
+                if stop - end - 1 > 3:
+                    labels.add(low[end + 1:stop])
+
+        pos = find(_MYSHOPIFY_TAIL, end)
+
+    return labels
+
+SCAN_CHUNK_SIZE = 16384          # Bytes buffered from a response before they are scanned
+SCAN_OVERLAP = 2048              # Already-scanned bytes kept as context for the next scan
+SCAN_MAX_HOLD = 65536            # Longest run of URL bytes held back waiting for its end
+SEARCH_MAX_BYTES = 1024 * 1024   # Bytes scanned per response unless the engine sets 'max_bytes'
+NEXT_PAGE_WINDOW = 8192          # Bytes read past 'results_end' looking for the engine's 'next_page' marker
+_URL_RUN_BYTES = _LABEL_BYTES | frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ./')
+
+class ResponseScanner:
+    """extract_shopify_urls_fast() over a response body that arrives in chunks
+
+    Chunks are scanned once SCAN_CHUNK_SIZE bytes are pending, up to the
+    last byte that can't be part of a URL; the trailing run is held back so
+    a match cut by a chunk boundary is seen whole by the next scan, which
+    also re-reads SCAN_OVERLAP bytes (from a URL boundary) so scheme and
+    attribute checks keep their context. Scanning stops at the engine's
+    'max_bytes' or at its 'results_end' marker (lower-case bytes that follow
+    the organic results), so a request holds about SCAN_CHUNK_SIZE +
+    SCAN_OVERLAP bytes at a time, unless the whole body has to be kept for
+    the response cache or the --record archive.
+
+    Stores found before the engine's 'results_start' marker (ads, the
+    search box) are dropped once the marker shows up, and kept if it never
+    does. With a 'next_page' marker, up to NEXT_PAGE_WINDOW bytes past
+    'results_end' are searched for it, and has_next says whether the page
+    links to a next one (None when it can't tell).
+    """
+
+    def __init__(self, engine, keep_body=False):
+        self.max_bytes = engine.get('max_bytes', SEARCH_MAX_BYTES)
+        self.marker = engine.get('results_end')
+        self.start_marker = engine.get('results_start')
+        self.next_marker = engine.get('next_page')
+        self.body = [] if keep_body else None
+        self.pending = []
+        self.pending_size = 0
+        self.carry = b''
+        self.labels = set()
+        self.prelude = set()   # Labels seen before 'results_start'
+        self.in_results = not self.start_marker
+        self.tail = 0          # Bytes still to search for 'next_page' after 'results_end'
+        self.tail_low = b''
+        self.size = 0          # Bytes received
+        self.peak = 0          # Largest buffer scanned at once
+        self.scan_time = 0.0
+        self.stopped = None    # 'max_bytes' or 'results_end' if scanning ended early
+        self.has_next = None
+
+    def feed(self, chunk):
+        """Add the next chunk of the body; False once reading further is pointless"""
+        if self.tail:
+            return self._feed_tail(chunk)
+        if self.stopped:
+            return False
+        if self.size + len(chunk) >= self.max_bytes:
+            chunk = chunk[:self.max_bytes - self.size]
+            self.stopped = 'max_bytes'
+        self.size += len(chunk)
+        if self.body is not None:
+            self.body.append(chunk)
+        self.pending.append(chunk)
+        self.pending_size += len(chunk)
+        if self.pending_size >= SCAN_CHUNK_SIZE and not self.stopped:
+            self._scan(final=False)
+        return not self.stopped or self.tail > 0
+
+    def _feed_tail(self, chunk):
+        self.size += len(chunk)
+        if self.body is not None:
+            self.body.append(chunk)
+        low = self.tail_low + chunk.lower()
+        if self.next_marker in low:
+            self.has_next = True
+            self.tail = 0
+        else:
+            self.tail = max(0, self.tail - len(chunk))
+            self.tail_low = low[-len(self.next_marker):]
+        return self.tail > 0
+
+    def _scan(self, final):
+        started = time.perf_counter()
+        buf = self.carry + b''.join(self.pending)
+        self.pending = []
+        self.pending_size = 0
+        self.peak = max(self.peak, len(buf))
+        low = buf.lower()
+        
+        if not self.in_results:
+            at = low.find(self.start_marker)
+            if at != -1:
+                buf, low = buf[at:], low[at:]
+                self.in_results = True
+                self.prelude = None
+        
+        if self.in_results and self.next_marker and not self.has_next and self.next_marker in low:
+            self.has_next = True
+        
+        if self.marker:
+            at = low.find(self.marker)
+            if at != -1:
+                if self.next_marker and self.in_results and not self.has_next:
+                    self.tail = NEXT_PAGE_WINDOW
+                    self.tail_low = low[-len(self.next_marker):]
+                buf, low, final = buf[:at], low[:at], True
+                self.stopped = 'results_end'
+        
+        cut = len(buf)
+        if not final:
+            floor = max(0, cut - SCAN_MAX_HOLD)
+            while cut > floor and buf[cut - 1] in _URL_RUN_BYTES:
+                cut -= 1
+        labels = _shopify_labels(buf[:cut], low[:cut])
+        if self.in_results:
+            self.labels |= labels
+        else:
+            self.prelude |= labels
+        
+        if final:
+            self.carry = b''
+        else:
+            start = max(0, cut - SCAN_OVERLAP)
+            while start < cut and buf[start] in _URL_RUN_BYTES:
+                start += 1
+            self.carry = buf[start:]
+        self.scan_time += time.perf_counter() - started
+
+    def finish(self):
+        """Scan whatever is left and return the canonical store URLs"""
+        if self.pending or self.carry:
+            self._scan(final=True)
+        self.tail = 0
+        if self.next_marker and self.has_next is None and self.in_results and self.stopped != 'max_bytes':
+            self.has_next = False
+        labels = self.labels if self.in_results else self.prelude
+        return [f"https://{label.decode('ascii')}.myshopify.com" for label in labels]
+
+    def content(self):
+        """The body read so far (only when created with keep_body)"""
+        return b''.join(self.body) if self.body is not None else None
+
 def test_proxy(proxy):
     """Test if a proxy is working"""
     try:
@@ -499,30 +1113,197 @@ def test_proxy_with_search(proxy):
         pass
     return False
 
+# ============================================================================
+# ENGINE ADAPTERS
+# ============================================================================
+
+class SearxJsonParser:
+    """ResponseScanner counterpart for the compact format=json output of SearX
+
+    The JSON is small, so it is parsed whole (up to the engine's
+    'max_bytes') and only the 'url' of each organic result is looked at.
+    has_next is whether the page had any results, since SearX pages until
+    it runs out. A body that isn't the expected JSON (an error page, a
+    truncated answer) is scanned like HTML instead.
+    """
+
+    def __init__(self, engine, keep_body=False):
+        self.max_bytes = engine.get('max_bytes', SEARCH_MAX_BYTES)
+        self.keep_body = keep_body
+        self.body = []
+        self.size = 0
+        self.peak = 0
+        self.scan_time = 0.0
+        self.stopped = None
+        self.has_next = None
+
+    def feed(self, chunk):
+        """Add the next chunk of the body; False once reading further is pointless"""
+        if self.stopped:
+            return False
+        if self.size + len(chunk) >= self.max_bytes:
+            chunk = chunk[:self.max_bytes - self.size]
+            self.stopped = 'max_bytes'
+        self.size += len(chunk)
+        self.body.append(chunk)
+        return not self.stopped
+
+    def finish(self):
+        """Parse the body and return the canonical store URLs of its results"""
+        started = time.perf_counter()
+        content = b''.join(self.body)
+        self.peak = len(content)
+        try:
+            results = json.loads(content)['results']
+            urls = set()
+            for result in results:
+                host = urllib.parse.urlsplit(result['url']).hostname or ''
+                if host.endswith('.myshopify.com'):
+                    url = f"https://{host[:-14].rpartition('.')[2]}.myshopify.com"
+                    if _CANONICAL_SHOPIFY_RE.fullmatch(url):
+                        urls.add(url)
+            urls = list(urls)
+            self.has_next = bool(results)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            urls = extract_shopify_urls_fast(content)
+        self.scan_time += time.perf_counter() - started
+        return urls
+
+    def content(self):
+        """The body read so far (only when created with keep_body)"""
+        return b''.join(self.body) if self.keep_body else None
+
+class EngineAdapter:
+    """How searches on one kind of engine are requested and parsed
+
+    build() turns a dork and result page into query params and headers,
+    paging with the engine's page_param fields. parser() returns the object
+    a response body is fed to in chunks: its finish() returns the store URLs
+    among the organic results, after which has_next is True or False when
+    the page said whether there is a next one, or None. report() sees every
+    response status, for adapters that learn from them. This generic
+    adapter scans HTML between the engine's 'results_start' and
+    'results_end' markers with ResponseScanner.
+    """
+
+    def build(self, engine, query, page=0, proxied=False):
+        """Query params and headers for one search"""
+        params = {engine['param']: query}
+        headers = get_headers()
+        if page and engine.get('page_param'):
+            params[engine['page_param']] = engine.get('page_start', 0) + page * engine.get('page_step', 1)
+        if not proxied and 'headers' in engine:
+            headers.update(engine['headers'])
+        return params, headers
+
+    def parser(self, engine, params, keep_body=False):
+        """Incremental parser for the response to a search sent with params"""
+        return ResponseScanner(engine, keep_body)
+
+    def report(self, engine, params, status):
+        """Note the status of a response to a search sent with params"""
+
+class DuckDuckGoAdapter(EngineAdapter):
+    """The HTML-only DuckDuckGo endpoint, paged the way its Next button does"""
+
+    def build(self, engine, query, page=0, proxied=False):
+        params, headers = super().build(engine, query, page, proxied)
+        if page:
+            # 'dc' is the position of the first result on the page
+            params['dc'] = params[engine['page_param']] + 1
+            params['v'] = 'l'
+        return params, headers
+
+class SearxAdapter(EngineAdapter):
+    """SearX/SearXNG instances, through format=json where the instance allows it
+
+    Instances that don't enable the JSON format answer it with a 403; they
+    are switched to the HTML page (and its markers) for the rest of the run.
+    """
+
+    def __init__(self):
+        self.html_only = set()  # URLs of instances that refused format=json
+
+    def build(self, engine, query, page=0, proxied=False):
+        params, headers = super().build(engine, query, page, proxied)
+        params['format'] = 'html' if engine['url'] in self.html_only else 'json'
+        params['categories'] = 'general'
+        return params, headers
+
+    def parser(self, engine, params, keep_body=False):
+        if params.get('format') == 'json':
+            return SearxJsonParser(engine, keep_body)
+        return ResponseScanner(engine, keep_body)
+
+    def report(self, engine, params, status):
+        if status == 403 and params.get('format') == 'json' and engine['url'] not in self.html_only:
+            self.html_only.add(engine['url'])
+            print(f"⚠️  {engine['name']}: format=json is disabled, using HTML results")
+
+# Engines pick an adapter with their 'adapter' field
+ENGINE_ADAPTERS = {
+    'html': EngineAdapter(),
+    'duckduckgo': DuckDuckGoAdapter(),
+    'searx': SearxAdapter(),
+}
+
+def engine_adapter(engine):
+    """The adapter that builds and parses the engine's searches"""
+    return ENGINE_ADAPTERS[engine.get('adapter', 'html')]
+
 # ============================================================================
 # PROXY MANAGEMENT
 # ============================================================================
 
-def test_proxies_batch(proxies, strict_test=False):
-    """Test a batch of proxies"""
-    working = []
+# Endpoints for basic proxy tests; each gets its own concurrency limit
+PROXY_TEST_TARGETS = [
+    'https://httpbin.org/ip',
+    'https://api.ipify.org/?format=json',
+    'https://icanhazip.com/',
+]
+PROXY_TEST_PER_TARGET = 300    # Concurrent tests against one target host
+PROXY_TEST_TIMEOUT = 10
+PROXY_CACHE_FILE = 'proxy_cache.db'
+PROXY_CACHE_TTL = 360          # Minutes before a cached result is re-tested
+
+def test_proxies_batch(proxies, strict_test=False, want_working=0, cache_path=None, cache_ttl=PROXY_CACHE_TTL):
+    """Test a batch of proxies
+
+    As in test_proxies_stream(), proxies checked within cache_ttl minutes
+    are taken from the cache at cache_path, and testing stops once
+    want_working proxies (0 = all) have passed.
+    """
+    mode = 'strict' if strict_test else 'basic'
+    cache = ProxyHealthCache(cache_path) if cache_path else None
+    known = cache.lookup(proxies, cache_ttl * 60, mode) if cache else {}
+    working = [proxy for proxy in proxies if known.get(proxy, (False,))[0]]
+    results = []  # (proxy, ok, latency) of this run's tests, cached once they are done
     tested = 0
-    total = len(proxies)
     lock = threading.Lock()
     q = queue.Queue()
     
     for proxy in proxies:
-        q.put(proxy)
+        if proxy not in known:
+            q.put(proxy)
+    total = q.qsize()
+    
+    def enough():
+        return stop_flag.is_set() or (want_working and len(working) >= want_working)
     
     print(f"\n🧪 Testing {total:,} proxies ({'STRICT' if strict_test else 'BASIC'} mode)")
-    print(f"📊 Progress: 0/{total} (0.0%) | Working: 0")
+    if known:
+        print(f"💾 {len(known):,} proxies from cache, {len(working):,} of them working")
+    if want_working:
+        print(f"🎯 Stopping after {want_working:,} working proxies")
+    print(f"📊 Progress: 0/{total} (0.0%) | Working: {len(working)}")
     
     def worker():
         nonlocal tested
-        while not q.empty() and not stop_flag.is_set():
+        while not q.empty() and not enough():
             try:
                 proxy = q.get_nowait()
                 
+                started = time.time()
                 if strict_test:
                     is_working = test_proxy_with_search(proxy)
                 else:
@@ -531,6 +1312,7 @@ def test_proxies_batch(proxies, strict_test=False):
                 with lock:
                     if is_working:
                         working.append(proxy)
+                    results.append((proxy, is_working, time.time() - started))
                     tested += 1
                     
                     if tested % 10 == 0 or tested == total:
@@ -547,213 +1329,3569 @@ def test_proxies_batch(proxies, strict_test=False):
                 q.task_done()
     
     workers = min(MAX_PROXY_WORKERS, total)
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = [executor.submit(worker) for _ in range(workers)]
-        for future in as_completed(futures):
-            pass
+    if workers and not enough():
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(worker) for _ in range(workers)]
+            for future in as_completed(futures):
+                pass
+    
+    # The cache's connection belongs to this thread, so results are written here
+    if cache:
+        for proxy, ok, latency in results:
+            cache.record(proxy, mode, ok, latency)
+        cache.close()
     
     print()
-    print(f"✅ Testing complete: {len(working)}/{total} working proxies ({len(working)/total*100:.1f}%)")
-    return working
+    print(f"✅ Testing complete: {len(working):,} working | {tested:,} tested | {len(known):,} from cache")
+    return working[:want_working] if want_working else working
 
-# ============================================================================
-# SCRAPING FUNCTIONS
-# ============================================================================
+def percentile(values, pct):
+    """Return the pct-th percentile of a list of numbers (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
 
-def search_with_proxy(query, proxy, engine):
-    """Search using proxy"""
-    try:
-        params = {engine['param']: query}
-        
-        if engine['name'] == 'DuckDuckGo':
-            params['s'] = random.randint(0, 100)  # Random offset
-        elif engine['name'] == 'Brave':
-            params['offset'] = random.randint(0, 20)
-        
-        response = requests.get(
-            engine['url'],
-            params=params,
-            headers=get_headers(),
-            proxies={'http': proxy, 'https': proxy},
-            timeout=15,
-            verify=False,
-            allow_redirects=True
-        )
-        
-        if 200 <= response.status_code < 400:
-            urls = extract_shopify_urls(response.text)
-            return urls, True
-        
-        return [], False
-    
-    except Exception as e:
-        return [], False
+PROXY_MAX_FAILURES = 3         # Consecutive failures before a proxy is quarantined
+PROXY_QUARANTINE_BASE = 30     # First quarantine (seconds), doubled on every relapse
+PROXY_QUARANTINE_MAX = 1800    # Longest quarantine (seconds)
+PROXY_EWMA_ALPHA = 0.3         # Weight of the newest latency sample
+PROXY_DEFAULT_LATENCY = 2.0    # Assumed latency (seconds) of an untried proxy
+PROXY_CHOICE_SAMPLE = 3        # Healthy proxies compared per choice
 
-def search_proxyless(query, engine):
-    """Search without proxy"""
-    try:
-        params = {engine['param']: query}
-        
-        # SearX specific params
-        if 'SearX' in engine['name'] or 'searx' in engine['url'].lower():
-            params['format'] = 'html'
-            params['categories'] = 'general'
-        
-        headers = get_headers()
-        if 'headers' in engine:
-            headers.update(engine['headers'])
-        
-        response = requests.get(
-            engine['url'],
-            params=params,
-            headers=headers,
-            timeout=15,
-            verify=False,
-            allow_redirects=True
-        )
-        
-        if 200 <= response.status_code < 400:
-            urls = extract_shopify_urls(response.text)
-            return urls, True
-        
-        return [], False
-    
-    except:
-        return [], False
+class ProxyHealth:
+    """Running health record of one proxy"""
+    __slots__ = ('successes', 'failures', 'consecutive', 'latency', 'quarantines', 'probation')
 
-def proxy_scraper_worker(proxies, dorks, max_searches=1000):
-    """Worker for proxy-based scraping"""
-    local_found = 0
-    
-    for i in range(max_searches):
-        if stop_flag.is_set():
-            break
-        
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive = 0
+        self.latency = None
+        self.quarantines = 0
+        self.probation = False
+
+    def score(self):
+        """Expected successes per second of latency"""
+        success_rate = (self.successes + 1) / (self.successes + self.failures + 2)
+        latency = self.latency if self.latency is not None else PROXY_DEFAULT_LATENCY
+        return success_rate / max(0.05, latency)
+
+class ProxyPool:
+    """Score-based proxy selection with quarantine of failing proxies
+
+    Each choice samples a few healthy proxies and takes the best scoring
+    one (success rate over latency EWMA). A proxy that fails
+    PROXY_MAX_FAILURES times in a row is quarantined with exponential
+    back-off; once released it is on probation and a single failure sends
+    it straight back.
+    """
+
+    def __init__(self, proxies):
+        self.lock = threading.Lock()
+        self.health = {proxy: ProxyHealth() for proxy in proxies}
+        self.healthy = list(self.health)
+        self.position = {proxy: i for i, proxy in enumerate(self.healthy)}
+        self.quarantined = []  # heap of (release_time, proxy)
+        self.latencies = deque(maxlen=2000)
+        self.requests = 0
+        self.successes = 0
+
+    def __len__(self):
+        return len(self.health)
+
+    def _add_healthy(self, proxy):
+        self.position[proxy] = len(self.healthy)
+        self.healthy.append(proxy)
+
+    def _remove_healthy(self, proxy):
+        index = self.position.pop(proxy)
+        last = self.healthy.pop()
+        if last != proxy:
+            self.healthy[index] = last
+            self.position[last] = index
+
+    def _release(self, now, force=False):
+        while self.quarantined and (force or self.quarantined[0][0] <= now):
+            _, proxy = heapq.heappop(self.quarantined)
+            self.health[proxy].probation = True
+            self._add_healthy(proxy)
+            force = False
+        self._publish()
+
+    def _publish(self):
+        stats['working_proxies'] = len(self.healthy)
+        stats['failed_proxies'] = len(self.quarantined)
+
+    def choose(self):
+        """Pick a proxy to use for the next search"""
+        with self.lock:
+            if self.quarantined:
+                # Release expired proxies, or the soonest one if nothing is healthy
+                self._release(time.time(), force=not self.healthy)
+            if not self.healthy:
+                return None
+
+            candidates = random.sample(self.healthy, min(PROXY_CHOICE_SAMPLE, len(self.healthy)))
+            return max(candidates, key=lambda proxy: self.health[proxy].score())
+
+    def report(self, proxy, ok, latency=None):
+        """Record the outcome of a search through proxy"""
+        with self.lock:
+            health = self.health.get(proxy)
+            if health is None:
+                return
+
+            self.requests += 1
+            if ok:
+                self.successes += 1
+                health.successes += 1
+                health.consecutive = 0
+                health.probation = False
+                health.quarantines = max(0, health.quarantines - 1)
+                if latency is not None:
+                    self.latencies.append(latency)
+                    if health.latency is None:
+                        health.latency = latency
+                    else:
+                        health.latency = PROXY_EWMA_ALPHA * latency + (1 - PROXY_EWMA_ALPHA) * health.latency
+                return
+
+            health.failures += 1
+            health.consecutive += 1
+            if (health.probation or health.consecutive >= PROXY_MAX_FAILURES) and proxy in self.position:
+                self._remove_healthy(proxy)
+                health.quarantines += 1
+                health.probation = False
+                backoff = min(PROXY_QUARANTINE_MAX, PROXY_QUARANTINE_BASE * 2 ** (health.quarantines - 1))
+                heapq.heappush(self.quarantined, (time.time() + backoff, proxy))
+                self._publish()
+
+    def snapshot(self):
+        """Pool health summary for stats output"""
+        with self.lock:
+            latencies = list(self.latencies)
+            return {
+                'healthy': len(self.healthy),
+                'quarantined': len(self.quarantined),
+                'requests': self.requests,
+                'success_rate': self.successes / self.requests if self.requests else 0.0,
+                'p50_latency': percentile(latencies, 50),
+                'p95_latency': percentile(latencies, 95),
+            }
+
+class ProxyHealthCache:
+    """On-disk record of proxy test results shared between runs
+
+    Results are kept per test mode ('basic' or 'strict'): passing the basic
+    check says nothing about whether engines answer through a proxy, and an
+    engine blocking it says nothing about the basic check.
+    """
+
+    def __init__(self, path=PROXY_CACHE_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(proxies)')}
+        with self.conn:
+            if columns and 'mode' not in columns:
+                # Caches from before modes were kept can't tell which test a result came from
+                self.conn.execute('DROP TABLE proxies')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS proxies ('
+                'proxy TEXT NOT NULL, mode TEXT NOT NULL, ok INTEGER NOT NULL, latency REAL, checked_at REAL NOT NULL, '
+                'PRIMARY KEY (proxy, mode))'
+            )
+        self.pending = []
+
+    def lookup(self, proxies, max_age, mode):
+        """Return {proxy: (ok, latency)} for proxies checked in mode within max_age seconds"""
+        found = {}
+        cutoff = time.time() - max_age
+        for i in range(0, len(proxies), 500):
+            chunk = proxies[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT proxy, ok, latency FROM proxies WHERE mode = ? AND checked_at >= ? "
+                f"AND proxy IN ({','.join('?' * len(chunk))})",
+                [mode, cutoff, *chunk]
+            )
+            for proxy, ok, latency in rows:
+                found[proxy] = (bool(ok), latency)
+        return found
+
+    def record(self, proxy, mode, ok, latency):
+        """Queue a test result, flushing in batches"""
+        self.pending.append((proxy, mode, int(ok), latency if ok else None, time.time()))
+        if len(self.pending) >= 500:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            with self.conn:
+                self.conn.executemany('INSERT OR REPLACE INTO proxies VALUES (?, ?, ?, ?, ?)', self.pending)
+            self.pending = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+async def _test_proxy_async(session, proxy, target, semaphore, strict_test):
+    """Test one proxy against target; returns (proxy, ok, latency)"""
+    async with semaphore:
+        started = time.time()
         try:
-            query = random.choice(dorks)
-            proxy = random.choice(proxies)
-            engine = random.choice(SEARCH_ENGINES)
-            
-            urls, success = search_with_proxy(query, proxy, engine)
-            
-            with sites_lock:
-                stats['searches'] += 1
-                
-                if urls:
-                    new_sites = 0
-                    for url in urls:
-                        if url not in found_sites:
-                            found_sites.add(url)
-                            new_sites += 1
-                    
-                    if new_sites > 0:
-                        stats['found'] = len(found_sites)
-                        local_found += new_sites
-                        print(f"✅ [{len(found_sites)}] {urls[0][:60]}..." if urls else "")
-            
-            # Delay between requests
-            time.sleep(random.uniform(0.1, 0.5))
-        
-        except:
-            time.sleep(0.5)
-            continue
-    
-    return local_found
+            params = {target['param']: 'site:myshopify.com test'} if strict_test else None
+            async with session.get(target['url'], params=params, proxy=proxy, headers=get_headers()) as response:
+                body = await response.read()
+                if strict_test:
+                    ok = 200 <= response.status < 400 and len(body) > 100
+                else:
+                    ok = response.status == 200
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            ok = False
+        return proxy, ok, time.time() - started
 
-def proxyless_scraper_worker(dorks, max_searches=500):
-    """Worker for proxyless scraping"""
-    local_found = 0
+async def _test_proxies_stream(proxy_iter, strict_test, want_working, concurrency, cache, max_age):
+    """Test proxies as they stream in until want_working of them pass"""
+    targets = SEARCH_ENGINES if strict_test else [{'name': url, 'url': url} for url in PROXY_TEST_TARGETS]
+    mode = 'strict' if strict_test else 'basic'
+    limits = {t['url']: asyncio.Semaphore(PROXY_TEST_PER_TARGET) for t in targets}
+    load = {t['url']: 0 for t in targets}
+    working = {}
+    counts = {'tested': 0, 'cached': 0}
+    pending = {}  # task -> target url
     
-    for i in range(max_searches):
-        if stop_flag.is_set():
-            break
-        
-        try:
-            query = random.choice(dorks)
-            engine = random.choice(PROXYLESS_ENGINES)
-            
-            urls, success = search_proxyless(query, engine)
+    def enough():
+        return stop_flag.is_set() or (want_working and len(working) >= want_working)
+    
+    def collect(done):
+        for task in done:
+            load[pending.pop(task)] -= 1
+            proxy, ok, latency = task.result()
+            counts['tested'] += 1
+            if ok:
+                working[proxy] = latency
+            if cache:
+                cache.record(proxy, mode, ok, latency)
+            if counts['tested'] % 10 == 0:
+                rate = len(working) / (counts['tested'] + counts['cached']) * 100
+                print(f"\r📊 Tested: {counts['tested']:,} | Cached: {counts['cached']:,} | "
+                      f"Working: {len(working):,} ({rate:.1f}%)", end='')
+    
+    timeout = aiohttp.ClientTimeout(total=PROXY_TEST_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=0, ssl=False, force_close=True)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        proxies = iter(proxy_iter)
+        while not enough():
+            batch = list(itertools.islice(proxies, 500))
+            if not batch:
+                break
             
-            with sites_lock:
-                stats['searches'] += 1
+            known = cache.lookup(batch, max_age, mode) if cache else {}
+            for proxy in batch:
+                if enough():
+                    break
+                if proxy in known:
+                    counts['cached'] += 1
+                    ok, latency = known[proxy]
+                    if ok:
+                        working[proxy] = latency
+                    continue
                 
-                if urls:
-                    new_sites = 0
-                    for url in urls:
-                        if url not in found_sites:
-                            found_sites.add(url)
-                            new_sites += 1
-                    
-                    if new_sites > 0:
-                        stats['found'] = len(found_sites)
-                        local_found += new_sites
-                        print(f"🌐 [{len(found_sites)}] {engine['name']}: {urls[0][:60]}..." if urls else "")
-            
-            # Longer delay for proxyless to avoid rate limiting
-            delay = random.uniform(1.0, 3.0) if engine['name'] == 'Brave' else random.uniform(0.5, 1.5)
-            time.sleep(delay)
+                while len(pending) >= concurrency and not enough():
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done)
+                
+                # Send the test to the least loaded target
+                target = min(targets, key=lambda t: load[t['url']])
+                load[target['url']] += 1
+                task = asyncio.create_task(
+                    _test_proxy_async(session, proxy, target, limits[target['url']], strict_test))
+                pending[task] = target['url']
         
-        except:
-            time.sleep(1.0)
-            continue
+        while pending and not enough():
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            collect(done)
+        
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
     
-    return local_found
+    return working, counts
 
-# ============================================================================
-# MAIN SCRAPING FUNCTIONS
-# ============================================================================
+def test_proxies_stream(filename, proxy_type="http", strict_test=False, want_working=0,
+                        cache_path=PROXY_CACHE_FILE, cache_ttl=PROXY_CACHE_TTL, concurrency=MAX_PROXY_WORKERS):
+    """Stream proxies from file through the async tester
 
-def run_proxy_scraping(proxies, num_workers=50, duration_minutes=60):
-    """Run proxy-based scraping"""
-    print(f"\n🚀 Starting PROXY scraping")
-    print(f"👥 Workers: {num_workers}")
-    print(f"⏱️  Duration: {duration_minutes} minutes")
-    print(f"🌐 Proxies: {len(proxies):,}")
-    print(f"🔍 Search Engines: {len(SEARCH_ENGINES)}")
-    print(f"🔑 Dorks: {len(DORKS):,}")
-    print(f"\nPress Ctrl+C to stop early and save results\n")
-    
-    stats['start_time'] = time.time()
-    stats['working_proxies'] = len(proxies)
-    stop_flag.clear()
-    
-    # Calculate searches per worker based on duration
-    searches_per_minute = 20  # Estimated searches per minute per worker
-    max_searches = searches_per_minute * duration_minutes
-    
-    def status_monitor():
-        """Monitor and display status"""
-        last_display = 0
-        while not stop_flag.is_set():
-            current = time.time()
-            if current - last_display >= 5:  # Update every 5 seconds
-                print_stats()
-                last_display = current
-            time.sleep(1)
+    Proxies checked within cache_ttl minutes are taken from the on-disk
+    cache instead of being re-tested, and testing stops as soon as
+    want_working proxies (0 = all) have passed. Returns working proxies,
+    fastest first.
+    """
+    if not os.path.exists(filename):
+        print(f"❌ File not found: {filename}")
+        return []
     
-    # Start status monitor in background
-    monitor_thread = threading.Thread(target=status_monitor, daemon=True)
-    monitor_thread.start()
+    print(f"\n🧪 Streaming proxies from {filename} ({'STRICT' if strict_test else 'BASIC'} mode)")
+    if want_working:
+        print(f"🎯 Stopping after {want_working:,} working proxies")
     
+    cache = ProxyHealthCache(cache_path) if cache_path else None
     try:
-        # Start workers
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            futures = [executor.submit(proxy_scraper_worker, proxies, DORKS, max_searches) 
-                      for _ in range(num_workers)]
+        working, counts = asyncio.run(_test_proxies_stream(
+            iter_proxies_from_file(filename, proxy_type), strict_test, want_working,
+            concurrency, cache, cache_ttl * 60))
+    finally:
+        if cache:
+            cache.close()
+    
+    print()
+    print(f"✅ Testing complete: {len(working):,} working | {counts['tested']:,} tested | {counts['cached']:,} from cache")
+    fastest = sorted(working, key=lambda proxy: working[proxy] or 0)
+    return fastest[:want_working] if want_working else fastest
+
+# ============================================================================
+# HTTP SESSIONS
+# ============================================================================
+
+PROXY_SESSION_CAPACITY = 256  # Proxied sessions kept open before LRU eviction
+PROXY_POOL_MAXSIZE = 4        # Idle connections kept per host behind one proxy
+WARMUP_PROXIES = 20           # Proxies warmed up in proxy mode
+
+def _engine_hosts(engines):
+    """Return the distinct scheme://host roots of a list of engines"""
+    hosts = []
+    for engine in engines:
+        parts = urllib.parse.urlsplit(engine['url'])
+        root = f"{parts.scheme}://{parts.netloc}/"
+        if root not in hosts:
+            hosts.append(root)
+    return hosts
+
+def _build_session(pool_connections, pool_maxsize):
+    """Create a keep-alive session with one pool per engine host"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.verify = False
+    return session
+
+class SessionPool:
+    """Shared keep-alive sessions for direct and proxied searches
+
+    Direct searches share one thread-safe session whose per-host pools are
+    sized to the worker count. Proxied searches get one small session per
+    proxy, kept in an LRU so large proxy lists don't hold thousands of idle
+    sockets.
+    """
+
+    def __init__(self, engines, pool_maxsize=20, proxy_capacity=PROXY_SESSION_CAPACITY):
+        self.lock = threading.Lock()
+        self.proxy_capacity = proxy_capacity
+        self.evictions = 0
+        self._direct = None
+        self._proxied = OrderedDict()
+        self.configure(engines, pool_maxsize)
+
+    def configure(self, engines, pool_maxsize):
+        """Resize the pools for a run and drop existing connections"""
+        self.close()
+        with self.lock:
+            self.pool_connections = max(1, len(_engine_hosts(engines)))
+            self.pool_maxsize = max(1, pool_maxsize)
+
+    def direct(self):
+        """Session for proxyless searches"""
+        session = self._direct
+        if session is None:
+            with self.lock:
+                if self._direct is None:
+                    self._direct = _build_session(self.pool_connections, self.pool_maxsize)
+                session = self._direct
+        return session
+
+    def for_proxy(self, proxy):
+        """Session bound to a proxy, evicting the least recently used one"""
+        with self.lock:
+            session = self._proxied.get(proxy)
+            if session is not None:
+                self._proxied.move_to_end(proxy)
+                return session
+
+            session = _build_session(self.pool_connections, min(self.pool_maxsize, PROXY_POOL_MAXSIZE))
+            session.proxies = {'http': proxy, 'https': proxy}
+            self._proxied[proxy] = session
+            evicted = None
+            if len(self._proxied) > self.proxy_capacity:
+                _, evicted = self._proxied.popitem(last=False)
+                self.evictions += 1
+
+        if evicted is not None:
+            evicted.close()
+        return session
+
+    def warm_up(self, engines, proxies=None, connections=None, timeout=5):
+        """Open keep-alive connections to every engine host before workers start"""
+        hosts = _engine_hosts(engines)
+        jobs = []
+        if proxies:
+            for proxy in list(proxies)[:WARMUP_PROXIES]:
+                jobs.extend((host, proxy) for host in hosts)
+        else:
+            per_host = min(connections or self.pool_maxsize, self.pool_maxsize)
+            jobs.extend((host, None) for host in hosts for _ in range(per_host))
+
+        def open_connection(job):
+            host, proxy = job
+            session = self.for_proxy(proxy) if proxy else self.direct()
+            try:
+                session.head(host, headers=get_headers(), timeout=timeout, allow_redirects=False)
+                return True
+            except:
+                return False
+
+        print(f"🔥 Warming up {len(jobs):,} connections to {len(hosts)} hosts...")
+        with ThreadPoolExecutor(max_workers=min(MAX_SCRAPE_WORKERS, max(1, len(jobs)))) as executor:
+            opened = sum(executor.map(open_connection, jobs))
+        print(f"✅ Warm-up complete: {opened:,}/{len(jobs):,} connections open")
+        return opened
+
+    def close(self):
+        """Close every pooled connection"""
+        with self.lock:
+            sessions = list(self._proxied.values())
+            if self._direct is not None:
+                sessions.append(self._direct)
+            self._direct = None
+            self._proxied.clear()
+
+        for session in sessions:
+            session.close()
+
+session_pool = SessionPool(PROXYLESS_ENGINES + SEARCH_ENGINES)
+
+# ============================================================================
+# RESPONSE CACHE
+# ============================================================================
+
+RESPONSE_CACHE_FILE = 'response_cache.db'
+RESPONSE_CACHE_TTL = 360    # Minutes before a cached search result is fetched again
+RESPONSE_CACHE_SIZE = 256   # MB of URL lists (and bodies) kept before LRU eviction
+
+class ResponseCache:
+    """On-disk cache of search results keyed by engine + normalized params
+
+    Only the extracted URL list is stored unless keep_bodies is set, in
+    which case the zlib-compressed page is kept too. Entries expire after
+    ttl seconds and the least recently used ones are evicted once the
+    cache grows past max_bytes.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_FILE, ttl=RESPONSE_CACHE_TTL * 60,
+                 max_bytes=RESPONSE_CACHE_SIZE * 1024 * 1024, keep_bodies=False):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.keep_bodies = keep_bodies
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, engine TEXT NOT NULL, urls TEXT NOT NULL, body BLOB, '
+            'size INTEGER NOT NULL, stored_at REAL NOT NULL, used_at REAL NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_used ON responses (used_at)')
+        self.size = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    @staticmethod
+    def key(engine, params):
+        """Content address for a search: engine URL plus sorted, normalized params"""
+        normalized = sorted((str(name), ' '.join(str(value).lower().split())) for name, value in params.items())
+        return hashlib.sha1(json.dumps([engine['url'], normalized]).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Cached URL list for key, or None if missing or expired"""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute('SELECT urls FROM responses WHERE key = ? AND stored_at >= ?',
+                                    (key, now - self.ttl)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self.conn:
+                self.conn.execute('UPDATE responses SET used_at = ? WHERE key = ?', (now, key))
+        return row[0].split('\n') if row[0] else []
+
+    def put(self, key, engine_name, urls, body=None):
+        """Store the result of a successful search"""
+        text = '\n'.join(urls)
+        blob = zlib.compress(body) if body is not None and self.keep_bodies else None
+        size = len(text) + (len(blob) if blob else 0)
+        now = time.time()
+        with self.lock:
+            old = self.conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            with self.conn:
+                self.conn.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                  (key, engine_name, text, blob, size, now, now))
+            self.size += size - (old[0] if old else 0)
+            if self.size > self.max_bytes:
+                self._evict(now)
+
+    def _evict(self, now):
+        # Expired rows go first, then least recently used down to 90% of the cap
+        with self.conn:
+            self.conn.execute('DELETE FROM responses WHERE stored_at < ?', (now - self.ttl,))
+            self.size = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            target = self.max_bytes * 0.9
+            while self.size > target:
+                rows = self.conn.execute('SELECT key, size FROM responses ORDER BY used_at LIMIT 500').fetchall()
+                if not rows:
+                    break
+                victims = []
+                for key, size in rows:
+                    victims.append((key,))
+                    self.size -= size
+                    if self.size <= target:
+                        break
+                self.conn.executemany('DELETE FROM responses WHERE key = ?', victims)
+                self.evictions += len(victims)
+
+    def snapshot(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_rate': self.hits / lookups if lookups else 0.0, 'size_mb': self.size / (1024 * 1024)}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+response_cache = None
+
+def open_response_cache(path=RESPONSE_CACHE_FILE, ttl_minutes=RESPONSE_CACHE_TTL,
+                        max_mb=RESPONSE_CACHE_SIZE, keep_bodies=False):
+    """Enable the response cache for search workers"""
+    global response_cache
+    try:
+        response_cache = ResponseCache(path, ttl_minutes * 60, max_mb * 1024 * 1024, keep_bodies)
+        print(f"💾 Response cache: {path} ({response_cache.size / (1024 * 1024):.1f} MB, TTL {ttl_minutes} min)")
+    except Exception as e:
+        print(f"⚠️  Response cache disabled: {e}")
+        response_cache = None
+    return response_cache
+
+def close_response_cache():
+    global response_cache
+    if response_cache:
+        response_cache.close()
+        response_cache = None
+
+# ============================================================================
+# RESPONSE ARCHIVE
+# ============================================================================
+
+ARCHIVE_MAGIC = b'SSARCHV1'
+ARCHIVE_RECORD = struct.Struct('<II')  # metadata length, compressed body length
+
+class ResponseArchive:
+    """Append-only archive of raw engine responses for --record
+
+    Every record is a small header, JSON metadata (engine, url, params,
+    query, page, status, elapsed, time) and the zlib-compressed body,
+    written with a single write() on an O_APPEND descriptor so threads and
+    --processes shards can share one file. A record cut short by a crash
+    is skipped on replay.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if os.fstat(self.fd).st_size == 0:
+            os.write(self.fd, ARCHIVE_MAGIC)
+        self.lock = threading.Lock()
+        self.records = 0
+        self.bytes = 0
+
+    def record(self, engine, params, query, page, status, elapsed, content):
+        meta = json.dumps({
+            'engine': engine['name'], 'url': engine['url'], 'params': params, 'query': query, 'page': page,
+            'status': status, 'elapsed': round(elapsed, 4), 'time': round(time.time(), 3),
+        }).encode('utf-8')
+        body = zlib.compress(content or b'')
+        entry = ARCHIVE_RECORD.pack(len(meta), len(body)) + meta + body
+        with self.lock:
+            os.write(self.fd, entry)
+            self.records += 1
+            self.bytes += len(entry)
+
+    def close(self):
+        with self.lock:
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+
+def iter_archive(path):
+    """Yield (metadata, body) for every complete record of a response archive"""
+    with open(path, 'rb') as f:
+        if f.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            raise ValueError(f"{path} is not a response archive")
+        while True:
+            header = f.read(ARCHIVE_RECORD.size)
+            if len(header) < ARCHIVE_RECORD.size:
+                return
+            meta_len, body_len = ARCHIVE_RECORD.unpack(header)
+            meta = f.read(meta_len)
+            body = f.read(body_len)
+            if len(meta) < meta_len or len(body) < body_len:
+                return
+            yield json.loads(meta), zlib.decompress(body)
+
+def archive_response(engine, params, query, page, status, elapsed, content):
+    """Add one engine response to the --record archive, if there is one"""
+    if response_archive:
+        response_archive.record(engine, params, query, page, status, elapsed, content)
+
+def open_response_archive(path):
+    """Start recording engine responses to path"""
+    global response_archive
+    try:
+        response_archive = ResponseArchive(path)
+        print(f"📼 Recording engine responses to {path}")
+    except OSError as e:
+        print(f"⚠️  Response recording disabled: {e}")
+        response_archive = None
+    return response_archive
+
+def close_response_archive():
+    global response_archive
+    if response_archive:
+        if response_archive.records:
+            print(f"📼 Recorded {response_archive.records:,} responses "
+                  f"({response_archive.bytes / (1024 * 1024):.1f} MB) to {response_archive.path}")
+        response_archive.close()
+        response_archive = None
+
+response_archive = None
+
+# ============================================================================
+# RESULTS STORE
+# ============================================================================
+
+RESULTS_BATCH = 200          # Sites buffered before a write
+RESULTS_FLUSH_INTERVAL = 2.0 # Max seconds a found site waits in the buffer
+
+class ResultsStore:
+    """Append-only SQLite log of found sites with first-seen timestamps
+
+    Workers add sites as they are found; they are written in batches so a
+    crash loses at most RESULTS_FLUSH_INTERVAL seconds of discoveries.
+    The verification and enrichment stages fill in the later columns.
+    """
+
+    # Columns added after the first release, created on open when missing
+    LATER_COLUMNS = {'status': 'TEXT', 'verified_at': 'REAL', 'primary_domain': 'TEXT', 'shop_name': 'TEXT',
+                     'currency': 'TEXT', 'product_count': 'INTEGER', 'enriched_at': 'REAL'}
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pending = []
+        self.pending_status = []
+        self.pending_enrichment = []
+        self.last_flush = time.time()
+        self.written = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS sites ('
+            'url TEXT PRIMARY KEY, engine TEXT, dork TEXT, first_seen REAL NOT NULL)'
+        )
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(sites)')}
+        with self.conn:
+            for name, kind in self.LATER_COLUMNS.items():
+                if name not in columns:
+                    self.conn.execute(f'ALTER TABLE sites ADD COLUMN {name} {kind}')
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM sites').fetchone()[0]
+
+    def iter_sites(self):
+        """Every stored URL, oldest first"""
+        with self.lock:
+            rows = self.conn.execute('SELECT url FROM sites ORDER BY first_seen').fetchall()
+        return (url for url, in rows)
+
+    def iter_statuses(self):
+        """(url, status) for every stored site, oldest first; status is None until verified"""
+        with self.lock:
+            rows = self.conn.execute('SELECT url, status FROM sites ORDER BY first_seen').fetchall()
+        return iter(rows)
+
+    def iter_unverified(self):
+        """Stored sites the verifier has not classified yet, with their engine and dork"""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT url, engine, dork FROM sites WHERE status IS NULL ORDER BY first_seen').fetchall()
+        return iter(rows)
+
+    def enrichable(self, after, limit, stale_before, require_verified=False):
+        """(rowid, url) of live sites never enriched or enriched before stale_before, from rowid after on"""
+        status = "status = 'live'" if require_verified else "(status IS NULL OR status = 'live')"
+        with self.lock:
+            return self.conn.execute(
+                f'SELECT rowid, url FROM sites WHERE rowid > ? AND {status} '
+                'AND (enriched_at IS NULL OR enriched_at < ?) ORDER BY rowid LIMIT ?',
+                (after, stale_before, limit)).fetchall()
+
+    def add(self, urls, engine=None, dork=None):
+        """Buffer newly found sites, flushing in batches"""
+        now = time.time()
+        with self.lock:
+            self.pending.extend((url, engine, dork, now) for url in urls)
+            if len(self.pending) >= RESULTS_BATCH or now - self.last_flush >= RESULTS_FLUSH_INTERVAL:
+                self._flush(now)
+
+    def set_status(self, url, status):
+        """Buffer a verification result for a stored site"""
+        now = time.time()
+        with self.lock:
+            self.pending_status.append((status, now, url))
+            if len(self.pending_status) >= RESULTS_BATCH or now - self.last_flush >= RESULTS_FLUSH_INTERVAL:
+                self._flush(now)
+
+    def set_enrichment(self, url, primary_domain=None, shop_name=None, currency=None, product_count=None):
+        """Buffer an enrichment result for a stored site"""
+        now = time.time()
+        with self.lock:
+            self.pending_enrichment.append((primary_domain, shop_name, currency, product_count, now, url))
+            if len(self.pending_enrichment) >= RESULTS_BATCH or now - self.last_flush >= RESULTS_FLUSH_INTERVAL:
+                self._flush(now)
+
+    def _flush(self, now):
+        if self.pending:
+            with self.conn:
+                # OR IGNORE keeps the first-seen row when resuming over known sites
+                self.conn.executemany('INSERT OR IGNORE INTO sites (url, engine, dork, first_seen) VALUES (?, ?, ?, ?)',
+                                      self.pending)
+            self.written += len(self.pending)
+            self.pending = []
+        if self.pending_status:
+            with self.conn:
+                self.conn.executemany('UPDATE sites SET status = ?, verified_at = ? WHERE url = ?', self.pending_status)
+            self.pending_status = []
+        if self.pending_enrichment:
+            with self.conn:
+                self.conn.executemany(
+                    'UPDATE sites SET primary_domain = ?, shop_name = ?, currency = ?, product_count = ?, '
+                    'enriched_at = ? WHERE url = ?', self.pending_enrichment)
+            self.pending_enrichment = []
+        self.last_flush = now
+
+    def flush(self):
+        with self.lock:
+            self._flush(time.time())
+
+    def close(self):
+        with self.lock:
+            self._flush(time.time())
+            self.conn.close()
+
+results_store = None
+
+def open_results_store(path, resume=False):
+    """Enable the results store; with resume, seed found_sites from it"""
+    global results_store
+    if resume and not os.path.exists(path):
+        print(f"❌ Results store not found: {path}")
+        return None
+    try:
+        results_store = ResultsStore(path)
+    except Exception as e:
+        print(f"❌ Error opening results store: {e}")
+        results_store = None
+        return None
+    
+    if resume:
+        with sites_lock:
+            found_sites.update(results_store.iter_sites())
+            stats['found'] = len(found_sites)
+        print(f"🗄️  Resuming from {path}: {len(found_sites):,} known sites")
+    else:
+        print(f"🗄️  Saving sites as they are found to {path}")
+    return results_store
+
+def close_results_store():
+    global results_store
+    if results_store:
+        results_store.close()
+        results_store = None
+
+def iter_sites_from_file(path):
+    """Sites saved as JSON, in a results store (.db) or one per line"""
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                yield item['url'] if isinstance(item, dict) else item
+    elif path.endswith('.db'):
+        # Read-only: the store may belong to another run, and a missing path must not become an empty store
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No such results store: {path}")
+        conn = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(path))}?mode=ro", uri=True)
+        try:
+            yield from (url for url, in conn.execute('SELECT url FROM sites ORDER BY first_seen'))
+        finally:
+            conn.close()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                # Verified output has the status after a tab
+                line = line.split('\t', 1)[0].strip()
+                if line:
+                    yield line
+
+def load_known_sites(path):
+    """Bloom filter of sites found elsewhere; lists are converted once and cached as <path>.bloom"""
+    if path.endswith('.bloom'):
+        return BloomFilter.load(path)
+    
+    bloom_path = path + '.bloom'
+    if os.path.exists(bloom_path) and os.path.getmtime(bloom_path) >= os.path.getmtime(path):
+        return BloomFilter.load(bloom_path)
+    
+    labels = {site_label(url) for url in iter_sites_from_file(path)}
+    labels.discard(None)
+    bloom = BloomFilter(len(labels))
+    for label in labels:
+        bloom.add(label)
+    try:
+        bloom.save(bloom_path)
+    except OSError:
+        pass
+    return bloom
+
+# ============================================================================
+# RESULT WRITERS
+# ============================================================================
+
+RESULTS_FSYNC_INTERVAL = 5.0  # Max seconds a written site waits for fsync
+RESULTS_FSYNC_EVERY = 1000    # Sites written between fsyncs
+RESULTS_ROTATE_MB = 64        # Segment size before the writer starts a new file
+FINALIZE_CHUNK = 500000       # Records sorted in memory per run during finalize
+
+class SiteWriter:
+    """Streams found sites to rotating segment files as they are discovered
+
+    Segments are named <base>.001.<ext>, <base>.002.<ext>, ... and hold
+    sites in discovery order. finalize() external-merges them (plus any
+    extra sites, e.g. from a resumed store) into the sorted, deduplicated
+    <output>.<ext> and removes the segments. json output streams as JSONL
+    segments and is only turned into an array at finalize. With
+    with_status every site carries its verification status as well.
+    """
+
+    EXTENSIONS = {'txt': 'txt', 'csv': 'csv', 'jsonl': 'jsonl', 'json': 'jsonl'}
+
+    def __init__(self, base, format='txt', fsync_interval=RESULTS_FSYNC_INTERVAL,
+                 fsync_every=RESULTS_FSYNC_EVERY, rotate_mb=RESULTS_ROTATE_MB, with_status=False):
+        self.base = base
+        self.format = format
+        self.ext = self.EXTENSIONS[format]
+        self.with_status = with_status
+        self.header = ['URL', 'Domain'] + (['Status'] if with_status else [])
+        self.fsync_interval = fsync_interval
+        self.fsync_every = max(1, fsync_every)
+        self.rotate_bytes = rotate_mb * 1024 * 1024
+        self.lock = threading.Lock()
+        self.written = 0
+        self.unsynced = 0
+        self.last_sync = time.time()
+        self.csv_buffer = io.StringIO()
+        self.csv_writer = csv.writer(self.csv_buffer, lineterminator='\n')
+        # A rerun with the same base (e.g. after a crash) carries on after its segments
+        self.segments = self._existing_segments()
+        self.file = None
+        self._open_segment()
+
+    def _existing_segments(self):
+        pattern = re.compile(re.escape(self.base) + r'\.(\d{3,})\.' + re.escape(self.ext) + '$')
+        found = [path for path in glob.glob(glob.escape(self.base) + '.*.' + self.ext) if pattern.match(path)]
+        return sorted(found, key=lambda path: int(pattern.match(path).group(1)))
+
+    def _open_segment(self):
+        path = f"{self.base}.{len(self.segments) + 1:03d}.{self.ext}"
+        self.segments.append(path)
+        self.file = open(path, 'a', encoding='utf-8', newline='')
+        self.size = self.file.tell()
+        if self.format == 'csv' and self.size == 0:
+            self._write(self._csv_line(self.header))
+
+    @property
+    def path(self):
+        return self.segments[-1]
+
+    def _csv_line(self, fields):
+        self.csv_buffer.seek(0)
+        self.csv_buffer.truncate()
+        self.csv_writer.writerow(fields)
+        return self.csv_buffer.getvalue()
+
+    def record(self, url, engine=None, dork=None, first_seen=None, status=None):
+        """One site as a line of this writer's segment format"""
+        if self.ext == 'csv':
+            fields = [url, url.replace('https://', '').replace('http://', '')]
+            return self._csv_line(fields + [status or ''] if self.with_status else fields)
+        if self.ext == 'jsonl':
+            record = {'url': url, 'engine': engine, 'dork': dork,
+                      'first_seen': round(first_seen, 3) if first_seen else None}
+            if self.with_status:
+                record['status'] = status
+            return json.dumps(record) + '\n'
+        if self.with_status and status:
+            return f"{url}\t{status}\n"
+        return url + '\n'
+
+    def key(self, line):
+        """Site URL of a segment line"""
+        if self.ext == 'csv':
+            return next(csv.reader([line]))[0]
+        if self.ext == 'jsonl':
+            return json.loads(line)['url']
+        return line.split('\t', 1)[0].rstrip('\n')
+
+    def _write(self, line):
+        self.file.write(line)
+        self.size += len(line)
+
+    def add(self, urls, engine=None, dork=None, status=None):
+        """Append newly found sites; fsync and rotate when due"""
+        now = time.time()
+        with self.lock:
+            for url in urls:
+                self._write(self.record(url, engine, dork, now, status))
+            self.written += len(urls)
+            self.unsynced += len(urls)
+            if self.unsynced >= self.fsync_every or now - self.last_sync >= self.fsync_interval:
+                self._sync(now)
+            if self.size >= self.rotate_bytes:
+                self._sync(now)
+                self.file.close()
+                self._open_segment()
+
+    def _sync(self, now):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = now
+
+    def sync(self, force=False):
+        """fsync pending sites if the interval has passed (or always, with force)"""
+        now = time.time()
+        with self.lock:
+            if self.file and self.unsynced and (force or now - self.last_sync >= self.fsync_interval):
+                self._sync(now)
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self._sync(time.time())
+                self.file.close()
+                self.file = None
+
+    def _segment_lines(self):
+        for path in self.segments:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                if self.format == 'csv':
+                    next(f, None)
+                for line in f:
+                    # A crash can leave half a line at the end of a segment
+                    if line.endswith('\n'):
+                        yield line
+
+    def _spill(self, chunk, directory):
+        """Write one sorted run of (key, line) pairs to a temp file"""
+        chunk.sort(key=lambda item: item[0])
+        run = tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='', dir=directory,
+                                          suffix='.run', delete=False)
+        with run:
+            run.writelines(line for _, line in chunk)
+        return run.name
+
+    def _read_run(self, path):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for line in f:
+                yield self.key(line), line
+
+    def finalize(self, output, extra=()):
+        """Sorted, deduplicated <output>.<format> from every segment and extra; returns (path, count)
+
+        extra holds URLs or (url, status) pairs.
+        """
+        self.close()
+        filename = f"{output}.{self.format}"
+        directory = os.path.dirname(os.path.abspath(filename))
+        runs = []
+        try:
+            chunk = []
+            extra_lines = (self.record(item[0], status=item[1]) if isinstance(item, tuple) else self.record(item)
+                           for item in extra)
+            lines = itertools.chain(self._segment_lines(), extra_lines)
+            for line in lines:
+                chunk.append((self.key(line), line))
+                if len(chunk) >= FINALIZE_CHUNK:
+                    runs.append(self._spill(chunk, directory))
+                    chunk = []
+            if chunk:
+                runs.append(self._spill(chunk, directory))
+
+            # Runs are merged in order, so the first-seen record of a site wins
+            count = 0
+            last = None
+            with open(filename + '.tmp', 'w', encoding='utf-8', newline='') as f:
+                if self.format == 'csv':
+                    f.write(self._csv_line(self.header))
+                elif self.format == 'json':
+                    f.write('[')
+                merged = heapq.merge(*(self._read_run(path) for path in runs), key=lambda item: item[0])
+                for key, line in merged:
+                    if key == last:
+                        continue
+                    last = key
+                    if self.format == 'json':
+                        entry = {'url': key, 'status': json.loads(line).get('status')} if self.with_status else key
+                        f.write(f"{',' if count else ''}\n  {json.dumps(entry)}")
+                    else:
+                        f.write(line)
+                    count += 1
+                if self.format == 'json':
+                    f.write('\n]' if count else ']')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(filename + '.tmp', filename)
+        finally:
+            for path in runs:
+                os.remove(path)
+        for path in self.segments:
+            os.remove(path)
+        self.segments = []
+        return filename, count
+
+site_writer = None
+
+def open_site_writer(base, format='txt', fsync_interval=RESULTS_FSYNC_INTERVAL,
+                     fsync_every=RESULTS_FSYNC_EVERY, rotate_mb=RESULTS_ROTATE_MB, with_status=False):
+    """Stream found sites to disk while scraping"""
+    global site_writer
+    try:
+        site_writer = SiteWriter(base, format, fsync_interval, fsync_every, rotate_mb, with_status)
+        print(f"📝 Writing sites as they are found to {site_writer.path}")
+    except Exception as e:
+        print(f"⚠️  Streaming output disabled: {e}")
+        site_writer = None
+    return site_writer
+
+def close_site_writer(output=None, extra=()):
+    """Finalize the streamed output into one sorted file and return its path"""
+    global site_writer
+    if not site_writer:
+        return None
+    writer, site_writer = site_writer, None
+    if output is None:
+        writer.close()
+        if not writer.written:
+            os.remove(writer.path)
+        return None
+    try:
+        filename, count = writer.finalize(output, extra)
+    except Exception as e:
+        print(f"❌ Error finalizing output: {e} (sites are still in {', '.join(writer.segments)})")
+        return None
+    if not count:
+        os.remove(filename)
+        print("❌ No sites to save!")
+        return None
+    print(f"✅ Saved {count:,} sites to {filename}")
+    return filename
+
+# ============================================================================
+# VERIFICATION
+# ============================================================================
+
+VERIFY_WORKERS = 32         # Stores probed at once
+VERIFY_QUEUE_SIZE = 50000   # Sites waiting for a probe before discovery is held back
+VERIFY_TIMEOUT = 10         # Seconds per probe request
+VERIFY_STATUSES = ['live', 'password', 'closed', 'non_shopify', 'error']
+
+def _is_shopify_response(response):
+    """Whether a response carries the headers Shopify's storefront edge adds"""
+    if response.headers.get('Powered-By', '').lower() == 'shopify':
+        return True
+    return any(name.lower().startswith(('x-shopify', 'x-shopid', 'x-sorting-hat')) for name in response.headers)
+
+def _redirects_to_password(response):
+    location = response.headers.get('Location', '')
+    return 300 <= response.status_code < 400 and urllib.parse.urlsplit(location).path.rstrip('/') == '/password'
+
+def probe_store(session, url, timeout=VERIFY_TIMEOUT):
+    """Classify a store as live, password, closed, non_shopify or error
+
+    A HEAD of / (redirects not followed) tells password-protected and
+    closed stores apart from everything else; stores that answer are
+    confirmed with /meta.json, which every live storefront serves.
+    """
+    base = url.rstrip('/')
+    try:
+        response = session.head(base + '/', headers=get_headers(), allow_redirects=False, timeout=timeout)
+        if _redirects_to_password(response):
+            return 'password'
+        if not _is_shopify_response(response):
+            return 'non_shopify'
+        if response.status_code in (402, 404, 410, 423):
+            return 'closed'
+        if response.status_code == 429 or response.status_code >= 500:
+            return 'error'
+        
+        meta = session.get(base + '/meta.json', headers=get_headers(), allow_redirects=False, timeout=timeout)
+        if _redirects_to_password(meta):
+            return 'password'
+        if meta.status_code in (402, 404, 410, 423):
+            return 'closed'
+        return 'live'
+    except requests.exceptions.RequestException:
+        return 'error'
+
+class SiteVerifier:
+    """Pipeline stage that probes newly found sites on its own thread pool
+
+    The discovery aggregator submits sites to a bounded queue; once
+    VERIFY_QUEUE_SIZE sites are waiting, submit() blocks, which holds the
+    aggregator and, through its own bounded queue, the search workers
+    back. Results go to the results store's status column and, with the
+    status next to the URL, to the output writer.
+    """
+
+    def __init__(self, workers=VERIFY_WORKERS, timeout=VERIFY_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self.queue = queue.Queue(VERIFY_QUEUE_SIZE)
+        self.session = _build_session(workers * 2, 2)
+        self.lock = threading.Lock()
+        self.counts = dict.fromkeys(VERIFY_STATUSES, 0)
+        self.threads = []
+        self.unfed = deque()  # Items feed() hasn't queued yet
+        self.feeder = None
+        self.stopping = threading.Event()
+
+    def start(self):
+        self.threads = [threading.Thread(target=self._run, name=f'verify-{i}', daemon=True)
+                        for i in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, urls, engine=None, dork=None):
+        for url in urls:
+            self.queue.put((url, engine, dork))
+
+    def feed(self, items):
+        """Queue (url, engine, dork) items from a thread of its own, as the queue is bounded"""
+        self.unfed.extend(items)
+        self.feeder = threading.Thread(target=self._feed, name='verify-resume', daemon=True)
+        self.feeder.start()
+
+    def _feed(self):
+        while self.unfed and not self.stopping.is_set():
+            try:
+                self.queue.put(self.unfed[0], timeout=0.25)
+            except queue.Full:
+                continue
+            self.unfed.popleft()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            url, engine, dork = item
+            status = probe_store(self.session, url, self.timeout)
+            with self.lock:
+                self.counts[status] += 1
+            if results_store:
+                results_store.set_status(url, status)
+            if site_writer:
+                site_writer.add([url], engine, dork, status)
+
+    def snapshot(self):
+        """Counts per status and backlog, for stats output"""
+        with self.lock:
+            return dict(self.counts, backlog=self.queue.qsize())
+
+    def stop(self, drop_queued=False):
+        """Stop the pool after the probes in flight; unless drop_queued, everything queued is probed first
+
+        Returns the (url, engine, dork) items that were dropped unprobed,
+        including any that feed() hadn't queued yet.
+        """
+        # The feeder must be done before the sentinels go in, or its items would land behind them
+        self.stopping.set()
+        if self.feeder:
+            self.feeder.join()
+        dropped = []
+        while drop_queued:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                dropped.append(item)
+        dropped.extend(self.unfed)
+        self.unfed.clear()
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        self.session.close()
+        return dropped
+
+verifier = None
+
+def open_verifier(workers=VERIFY_WORKERS, timeout=VERIFY_TIMEOUT, resume=False):
+    """Start probing found sites; with resume, re-queue stored sites that were never verified"""
+    global verifier
+    verifier = SiteVerifier(workers, timeout)
+    verifier.start()
+    print(f"🔎 Verifying found sites with {workers} probes at a time")
+    if resume and results_store:
+        pending = list(results_store.iter_unverified())
+        if pending:
+            print(f"🔎 Re-queueing {len(pending):,} stored sites that were never verified")
+            verifier.feed(pending)
+    return verifier
+
+def close_verifier():
+    global verifier
+    if verifier:
+        if stop_flag.is_set():
+            # Don't hold up shutdown for the backlog: only probes in flight are finished
+            dropped = verifier.stop(drop_queued=True)
+        else:
+            backlog = verifier.queue.qsize()
+            if backlog:
+                print(f"🔎 Finishing verification of {backlog:,} queued sites...")
+            dropped = verifier.stop()
+        if dropped:
+            print(f"🔎 Stopped with {len(dropped):,} sites unverified"
+                  + (" (--resume verifies them)" if results_store else ""))
+            if site_writer:
+                for url, engine, dork in dropped:
+                    site_writer.add([url], engine, dork)
+        verifier = None
+
+# ============================================================================
+# ENRICHMENT
+# ============================================================================
+
+ENRICH_CONCURRENCY = 50  # Stores fetched at once
+ENRICH_PER_HOST = 2      # Connections per host (custom domains can share one)
+ENRICH_DNS_TTL = 600     # Seconds a resolved host is cached
+ENRICH_TTL = 168         # Hours before an enriched store is fetched again
+ENRICH_TIMEOUT = 15      # Seconds per store
+ENRICH_POLL = 2.0        # Seconds between store scans once everything due is queued
+ENRICH_BATCH = 500       # Rows read from the store per scan
+
+class SiteEnricher:
+    """Pipeline stage that fetches the primary domain and shop metadata of stored sites
+
+    The results store is the queue: a scan walks the sites table by rowid
+    for live (or not yet verified) stores that were never enriched or
+    were enriched more than ttl hours ago, so a stopped run picks up
+    where it left off. Fetching runs on its own event loop thread with
+    one aiohttp session whose connector caps connections per host and
+    caches DNS lookups. /meta.json, with redirects followed, gives the
+    primary domain, name, currency and published product count.
+    """
+
+    def __init__(self, store, concurrency=ENRICH_CONCURRENCY, ttl_hours=ENRICH_TTL,
+                 require_verified=False, timeout=ENRICH_TIMEOUT, drain=False):
+        self.store = store
+        self.concurrency = concurrency
+        self.ttl = ttl_hours * 3600
+        self.require_verified = require_verified
+        self.timeout = timeout
+        self.drain = drain  # Stop by itself once nothing is due
+        self.stopping = threading.Event()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.enriched = 0
+        self.custom_domains = 0
+        self.failed = 0
+        self.active = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=lambda: asyncio.run(self._main()), name='enrich', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Finish the stores already queued; the rest stay due in the store"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def done(self):
+        return self.thread is None or not self.thread.is_alive()
+
+    async def _main(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=ENRICH_PER_HOST,
+                                         ttl_dns_cache=ENRICH_DNS_TTL, ssl=False)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        self.queue = asyncio.Queue(self.concurrency * 2)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            workers = [asyncio.create_task(self._worker(session)) for _ in range(self.concurrency)]
+            await self._feed()
+            for _ in workers:
+                await self.queue.put(None)
+            await asyncio.gather(*workers)
+
+    async def _feed(self):
+        loop = asyncio.get_running_loop()
+        seen = set()  # Queued this run; their rows may not be flushed yet
+        cursor = 0
+        found_any = False
+        while not self.stopping.is_set():
+            stale_before = time.time() - self.ttl
+            rows = await loop.run_in_executor(None, self.store.enrichable, cursor, ENRICH_BATCH,
+                                              stale_before, self.require_verified)
+            if not rows:
+                # End of the table: start over for sites added or gone stale meanwhile
+                if not found_any:
+                    if self.drain and self.queue.empty() and not self.active:
+                        return
+                    await asyncio.sleep(ENRICH_POLL)
+                cursor = 0
+                found_any = False
+                continue
+            cursor = rows[-1][0]
+            for _, url in rows:
+                if url in seen:
+                    continue
+                seen.add(url)
+                found_any = True
+                await self.queue.put(url)
+                if self.stopping.is_set():
+                    return
+
+    async def _worker(self, session):
+        while True:
+            url = await self.queue.get()
+            if url is None:
+                return
+            self.active += 1
+            try:
+                info = await self._fetch(session, url)
+            finally:
+                self.active -= 1
+            with self.lock:
+                if info is None:
+                    self.failed += 1
+                else:
+                    self.enriched += 1
+                    if info['primary_domain'] and not info['primary_domain'].endswith('.myshopify.com'):
+                        self.custom_domains += 1
+            # Failures are recorded too, so they wait out the TTL instead of being retried every scan
+            self.store.set_enrichment(url, **(info or {}))
+
+    async def _fetch(self, session, url):
+        """primary_domain, shop_name, currency and product_count of one store; None if unreachable"""
+        info = {'primary_domain': None, 'shop_name': None, 'currency': None, 'product_count': None}
+        try:
+            async with session.get(url.rstrip('/') + '/meta.json', headers=get_headers()) as response:
+                # Stores with a custom domain redirect there
+                info['primary_domain'] = response.url.host
+                if response.status != 200:
+                    return info
+                try:
+                    meta = await response.json(content_type=None)
+                except ValueError:
+                    # Password pages answer with HTML
+                    return info
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+        if isinstance(meta, dict):
+            info['primary_domain'] = meta.get('domain') or info['primary_domain']
+            info['shop_name'] = meta.get('name')
+            info['currency'] = meta.get('currency')
+            count = meta.get('published_products_count')
+            info['product_count'] = count if isinstance(count, int) else None
+        return info
+
+    def snapshot(self):
+        """Progress counters for stats output"""
+        with self.lock:
+            return {'enriched': self.enriched, 'custom_domains': self.custom_domains,
+                    'failed': self.failed, 'in_flight': self.active}
+
+enricher = None
+
+def open_enricher(concurrency=ENRICH_CONCURRENCY, ttl_hours=ENRICH_TTL, require_verified=False,
+                  timeout=ENRICH_TIMEOUT, drain=False):
+    """Start enriching stores in the results store"""
+    global enricher
+    if not results_store:
+        print("⚠️  Enrichment needs the results store (drop --no-store)")
+        return None
+    if not async_engine_available():
+        print("⚠️  Enrichment requires aiohttp (pip install aiohttp)")
+        return None
+    enricher = SiteEnricher(results_store, concurrency, ttl_hours, require_verified, timeout, drain)
+    enricher.start()
+    print(f"🏷️  Enriching stores with {concurrency} fetches at a time (refresh after {ttl_hours} h)")
+    return enricher
+
+def close_enricher():
+    global enricher
+    if enricher:
+        enricher.stop()
+        enricher = None
+
+def run_enrichment(path, concurrency=ENRICH_CONCURRENCY, ttl_hours=ENRICH_TTL, timeout=ENRICH_TIMEOUT):
+    """Enrich every due store in an existing results store, then return"""
+    global results_store
+    if not os.path.exists(path):
+        print(f"❌ Results store not found: {path}")
+        return
+    results_store = ResultsStore(path)
+    print(f"🗄️  Enriching {path} ({results_store.count():,} sites)")
+    stats['start_time'] = time.time()
+    if not open_enricher(concurrency, ttl_hours, False, timeout, drain=True):
+        close_results_store()
+        return
+    try:
+        last_display = time.time()
+        while not enricher.done() and not stop_flag.is_set():
+            time.sleep(1)
+            if time.time() - last_display >= 5:
+                progress = enricher.snapshot()
+                print(f"🏷️  {progress['enriched']:,} enriched | {progress['failed']:,} unreachable | "
+                      f"{progress['in_flight']:,} in flight | {time.time() - stats['start_time']:.0f}s")
+                last_display = time.time()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping...")
+    finally:
+        done = enricher.snapshot()
+        close_enricher()
+        close_results_store()
+        print(f"\n🏷️  Enriched {done['enriched']:,} stores ({done['custom_domains']:,} with a custom domain), "
+              f"{done['failed']:,} unreachable")
+
+# ============================================================================
+# ADAPTIVE SELECTION
+# ============================================================================
+
+SELECTOR_FILE = 'selector_stats.json'
+BANDIT_PRIOR_YIELD = 0.5   # Assumed new sites/request for an arm with no history
+BANDIT_PRIOR_WEIGHT = 2.0  # How many requests the prior counts for
+BANDIT_EXPLORE = 0.05      # Chance that an arm is promoted regardless of yield
+BANDIT_DECAY = 0.5         # Weight kept by stats carried over from earlier runs
+
+class YieldBandit:
+    """Thompson sampling over new unique sites per request
+
+    Each arm's yield is a Gamma posterior over a Poisson rate: the prior
+    is worth BANDIT_PRIOR_WEIGHT requests at the arm's prior yield, and
+    every request adds its new-site count. Arms are ranked by a sample
+    from their posterior, so uncertain arms still get tried; on top of
+    that each arm is promoted at random BANDIT_EXPLORE of the time.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.arms = {}    # key -> [requests, new_sites]
+        self.priors = {}  # key -> prior yield
+
+    def set_priors(self, priors):
+        with self.lock:
+            self.priors.update(priors)
+
+    def _score(self, key):
+        if random.random() < BANDIT_EXPLORE:
+            return float('inf')
+        sent, found = self.arms.get(key, (0, 0))
+        prior = self.priors.get(key, BANDIT_PRIOR_YIELD)
+        shape = max(1e-3, BANDIT_PRIOR_WEIGHT * prior + found)
+        return random.gammavariate(shape, 1 / (BANDIT_PRIOR_WEIGHT + sent))
+
+    def choose(self, items, key=None):
+        """Pick the item whose arm samples the highest yield"""
+        if len(items) == 1:
+            return items[0]
+        key = key or (lambda item: item)
+        with self.lock:
+            return max(items, key=lambda item: self._score(key(item)))
+
+    def order(self, items):
+        """Items sorted by sampled yield, best first"""
+        with self.lock:
+            scores = {item: self._score(item) for item in items}
+        return sorted(items, key=scores.__getitem__, reverse=True)
+
+    def record(self, key, new_sites):
+        with self.lock:
+            arm = self.arms.setdefault(key, [0, 0])
+            arm[0] += 1
+            arm[1] += new_sites
+
+    def table(self, limit=None):
+        """Per-arm yield rows, most productive first"""
+        with self.lock:
+            rows = [{'arm': key, 'requests': round(sent), 'new_sites': round(found),
+                     'yield': found / sent if sent else 0.0}
+                    for key, (sent, found) in self.arms.items()]
+        rows.sort(key=lambda row: (row['yield'], row['requests']), reverse=True)
+        return rows[:limit] if limit else rows
+
+    def load(self, arms, decay=BANDIT_DECAY):
+        with self.lock:
+            self.arms = {key: [sent * decay, found * decay] for key, (sent, found) in arms.items()}
+
+    def dump(self):
+        with self.lock:
+            return {key: list(arm) for key, arm in self.arms.items()}
+
+    def merge(self, arms):
+        """Add requests and new sites counted elsewhere (e.g. by another process)"""
+        with self.lock:
+            for key, (sent, found) in arms.items():
+                arm = self.arms.setdefault(key, [0, 0])
+                arm[0] += sent
+                arm[1] += found
+
+engine_bandit = YieldBandit()
+dork_bandit = YieldBandit()
+
+def set_engine_priors(engines):
+    """Seed engine arms from their 'weight' (best weight = BANDIT_PRIOR_YIELD)"""
+    top = max(engine.get('weight', 1.0) for engine in engines)
+    engine_bandit.set_priors({engine['name']: BANDIT_PRIOR_YIELD * engine.get('weight', 1.0) / top
+                              for engine in engines})
+
+def load_selector_stats(filename=SELECTOR_FILE):
+    """Restore learned engine/dork yields from a previous run"""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        engine_bandit.load(data.get('engines', {}))
+        dork_bandit.load(data.get('dorks', {}))
+        print(f"🎰 Loaded selector stats for {len(engine_bandit.arms)} engines and {len(dork_bandit.arms):,} dorks")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"⚠️  Ignoring selector stats in {filename}: {e}")
+
+def save_selector_stats(filename=SELECTOR_FILE):
+    """Persist learned engine/dork yields for the next run"""
+    try:
+        temp = f"{filename}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'engines': engine_bandit.dump(), 'dorks': dork_bandit.dump(),
+                       'saved': datetime.now().isoformat()}, f)
+        os.replace(temp, filename)
+    except Exception as e:
+        print(f"⚠️  Could not save selector stats: {e}")
+
+# ============================================================================
+# RATE SCHEDULING
+# ============================================================================
+
+MAX_RETRY_AFTER = 300  # Cap on a single Retry-After / back-off pause (seconds)
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, min(MAX_RETRY_AFTER, float(value)))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, min(MAX_RETRY_AFTER, when.timestamp() - time.time()))
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Token bucket implemented as a virtual schedule of free slots"""
+
+    def __init__(self, rate, burst=1):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.next_slot = 0.0      # theoretical arrival time of the next request
+        self.blocked_until = 0.0  # set by 429/503 responses
+        self.strikes = 0
+
+    def wait_time(self, now):
+        """Seconds until a request could start without reserving it"""
+        start = max(self.next_slot - (self.burst - 1) / self.rate, self.blocked_until)
+        return max(0.0, start - now)
+
+    def reserve(self, now):
+        """Reserve the next slot and return how long to wait for it"""
+        wait = self.wait_time(now)
+        self.next_slot = max(self.next_slot, now + wait) + 1.0 / self.rate
+        return wait
+
+class RateScheduler:
+    """Per-engine (and per-proxy) request pacing shared by all workers
+
+    Workers reserve a slot instead of sleeping for a fixed delay, so the
+    request rate to an engine stays at its configured 'rate' however many
+    workers run. 429/503 answers halve the bucket's rate and pause it for
+    Retry-After (or an exponential back-off); successes recover the rate.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.rates = {}
+        self.proxy_rate = DEFAULT_PROXY_RATE
+
+    def configure(self, engines, proxy_rate=DEFAULT_PROXY_RATE, overrides=None):
+        """Reset all buckets for a run"""
+        overrides = overrides or {}
+        with self.lock:
+            self.buckets.clear()
+            self.rates = {e['name']: overrides.get(e['name'], e.get('rate', DEFAULT_ENGINE_RATE)) for e in engines}
+            self.proxy_rate = proxy_rate
+
+    def _bucket(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            rate = self.rates.get(key, self.proxy_rate)
+            bucket = self.buckets[key] = TokenBucket(rate, burst=max(1, int(rate)))
+        return bucket
+
+    def choose(self, engines, pick=random.choice):
+        """Pick the engine that can be searched soonest (pick() breaks ties)"""
+        now = time.time()
+        with self.lock:
+            waits = [(self._bucket(e['name']).wait_time(now), e) for e in engines]
+        soonest = min(wait for wait, _ in waits)
+        return pick([e for wait, e in waits if wait <= soonest + 0.05])
+
+    def reserve(self, *keys):
+        """Reserve a slot on every key and return the longest wait"""
+        now = time.time()
+        with self.lock:
+            return max(self._bucket(key).reserve(now) for key in keys if key)
+
+    def try_reserve(self, *keys):
+        """Reserve a slot on every key if all of them are free right now; False (reserving nothing) if not"""
+        now = time.time()
+        with self.lock:
+            buckets = [self._bucket(key) for key in keys if key]
+            if any(bucket.wait_time(now) > 0 for bucket in buckets):
+                return False
+            for bucket in buckets:
+                bucket.reserve(now)
+            return True
+
+    def acquire(self, *keys):
+        """Block until every key has a free slot; False if the run stopped"""
+        wait = self.reserve(*keys)
+        if wait > 0:
+            return not stop_flag.wait(wait)
+        return not stop_flag.is_set()
+
+    async def acquire_async(self, *keys):
+        """Event-loop version of acquire()"""
+        wait = self.reserve(*keys)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return not stop_flag.is_set()
+
+    def report(self, key, status, retry_after=None):
+        """Feed a response status back into the key's bucket"""
+        if not key or status is None:
+            return
+
+        with self.lock:
+            bucket = self._bucket(key)
+            if status in (429, 503):
+                bucket.strikes += 1
+                bucket.rate = max(bucket.base_rate / 16, bucket.rate / 2)
+                pause = parse_retry_after(retry_after)
+                if pause is None:
+                    pause = min(MAX_RETRY_AFTER, 2 ** bucket.strikes)
+                bucket.blocked_until = max(bucket.blocked_until, time.time() + pause)
+            elif 200 <= status < 400:
+                bucket.strikes = 0
+                bucket.rate = min(bucket.base_rate, bucket.rate + bucket.base_rate / 10)
+                return
+            else:
+                return
+
+        with sites_lock:
+            stats['throttled'] = stats.get('throttled', 0) + 1
+
+    def snapshot(self):
+        """Current rate and pause per bucket, for stats output"""
+        now = time.time()
+        with self.lock:
+            return {
+                key: {'rate': round(b.rate, 3), 'base_rate': b.base_rate,
+                      'paused_for': round(max(0.0, b.blocked_until - now), 1)}
+                for key, b in self.buckets.items()
+                if key in self.rates
+            }
+
+rate_scheduler = RateScheduler()
+
+# ============================================================================
+# CONCURRENCY CONTROL
+# ============================================================================
+
+SEARCH_TIMEOUT = 15             # Hard deadline of a single search, connect to last byte (seconds)
+SEARCH_CONNECT_TIMEOUT = 4.0    # Seconds allowed to connect to an engine or proxy
+SEARCH_READ_TIMEOUT = 6.0       # Longest wait for the response headers or the next bytes of the body
+CONCURRENCY_START = 8           # In-flight searches allowed before the first adjustment
+CONCURRENCY_MIN = 1
+CONCURRENCY_INTERVAL = 1.0      # Seconds of finished searches behind every adjustment
+CONCURRENCY_MIN_SAMPLES = 5     # Hold the limit until an interval has this many searches
+CONCURRENCY_ERROR_RISE = 0.15   # Back off when the error rate rises this far above its best
+CONCURRENCY_TOLERANCE = 1.5     # Back off when median latency exceeds this multiple of its best
+CONCURRENCY_BACKOFF = 0.7       # Multiplicative decrease on errors
+CONCURRENCY_FORGET = 1.05       # Per-interval drift of the best latency back up
+DEADLINE_MARGIN = 0.5           # Least time (seconds) a search is started with
+
+class ConcurrencyController:
+    """Adaptive limit on in-flight searches that also enforces the run deadline
+
+    --workers is the ceiling. Every CONCURRENCY_INTERVAL the limit is adjusted
+    from the searches that finished in it: an error rate CONCURRENCY_ERROR_RISE
+    above the best interval cuts it by CONCURRENCY_BACKOFF, a median latency
+    past CONCURRENCY_TOLERANCE times the best scales it down by the ratio, and
+    otherwise it grows if the limit was what held searches back: doubling
+    until the first back-off (slow start), by sqrt(limit) after that.
+    The error baseline matters for proxy runs, where dead proxies fail at a
+    steady rate whatever the concurrency. A search only starts if the time
+    left before the deadline covers the median latency, and its timeout is
+    capped at that time, so no search outlives the run. Workers take their
+    slot before they reserve a rate token, so no token is spent on a search
+    the deadline rules out, and check the deadline again with budget() once
+    the token's wait is over. Hedges count against the limit too: with
+    hedging on, workers leave hedge_share of it free, and a hedge only goes
+    out if try_acquire() finds a slot, which it holds until its copy
+    finishes.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.configure(CONCURRENCY_START)
+
+    def configure(self, ceiling, deadline=None, adaptive=True, hedge_share=0.0):
+        """Reset the controller for a run of at most ceiling concurrent searches"""
+        with self.cond:
+            self.ceiling = max(CONCURRENCY_MIN, ceiling)
+            self.adaptive = adaptive
+            self.hedge_share = hedge_share
+            self.limit = float(min(self.ceiling, CONCURRENCY_START) if adaptive else self.ceiling)
+            self.deadline = deadline
+            self.in_flight = 0
+            self.peak = 0
+            self.window_start = time.time()
+            self.latencies = []
+            self.errors = 0
+            self.throughput = 0.0
+            self.error_rate = 0.0
+            self.best_error_rate = None
+            self.median_latency = None
+            self.best_latency = None
+            self.decision = 'fixed' if not adaptive else 'start'
+            self.slow_start = adaptive
+            self.waiters = deque()  # Futures of coroutines waiting in acquire_async()
+            self.increases = 0
+            self.decreases = 0
+            self.skipped = 0  # Searches not started because the deadline was too close
+            self.cond.notify_all()
+
+    def _budget(self):
+        """Timeout for a search starting now, or None if it could not finish in time"""
+        if self.deadline is None:
+            return SEARCH_TIMEOUT
+        remaining = self.deadline - time.time()
+        if remaining < max(DEADLINE_MARGIN, self.median_latency or 0):
+            return None
+        return min(SEARCH_TIMEOUT, remaining)
+
+    def budget(self):
+        """Timeout for a search that holds a slot and starts now; None if it can't finish in time"""
+        with self.cond:
+            budget = self._budget()
+            if budget is None:
+                self.skipped += 1
+            return budget
+
+    def _reserved(self):
+        """Slots of the limit kept free for hedges"""
+        return int(int(self.limit) * self.hedge_share)
+
+    def _try_start(self, hedge=False):
+        """Take a slot if there is one: (started, timeout); timeout None means the run is over"""
+        budget = self._budget()
+        if budget is None:
+            self.skipped += 1
+            return True, None
+        if self.in_flight >= int(self.limit) - (0 if hedge else self._reserved()):
+            return False, None
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        return True, budget
+
+    def acquire(self):
+        """Block until a search may start and return its timeout; None once the run is over"""
+        with self.cond:
+            while not stop_flag.is_set():
+                done, budget = self._try_start()
+                if done:
+                    return budget
+                self.cond.wait(0.25)
+        return None
+
+    def try_acquire(self):
+        """Take a slot without waiting and return its timeout; None if none is free or the run is over"""
+        with self.cond:
+            return self._try_start(hedge=True)[1]
+
+    async def acquire_async(self):
+        """Event-loop version of acquire()"""
+        loop = asyncio.get_running_loop()
+        while not stop_flag.is_set():
+            with self.cond:
+                done, budget = self._try_start()
+                if done:
+                    return budget
+                waiter = loop.create_future()
+                self.waiters.append((loop, waiter))
+            try:
+                await asyncio.wait_for(waiter, 0.25)
+            except asyncio.TimeoutError:
+                pass
+        return None
+
+    def _wake(self, count=1):
+        """Wake up to count threads and coroutines waiting for a slot"""
+        self.cond.notify(count)
+        while count > 0 and self.waiters:
+            loop, waiter = self.waiters.popleft()
+            if not waiter.done():
+                loop.call_soon_threadsafe(_resolve_waiter, waiter)
+                count -= 1
+
+    def release(self, success=None, latency=None):
+        """Give back a slot; searches that ran also report their outcome"""
+        with self.cond:
+            self.in_flight -= 1
+            if latency is not None:
+                self.latencies.append(latency)
+                if not success:
+                    self.errors += 1
+            self._wake()
+            if time.time() - self.window_start >= CONCURRENCY_INTERVAL:
+                self._adjust()
+
+    def _adjust(self):
+        samples = len(self.latencies)
+        if samples < CONCURRENCY_MIN_SAMPLES:
+            return
+        now = time.time()
+        self.throughput = samples / (now - self.window_start)
+        self.error_rate = self.errors / samples
+        self.median_latency = percentile(self.latencies, 50)
+        # Both baselines drift back up slowly so a lasting change is accepted
+        if self.best_latency is None:
+            self.best_latency, self.best_error_rate = self.median_latency, self.error_rate
+        else:
+            self.best_latency = min(self.best_latency * CONCURRENCY_FORGET, self.median_latency)
+            self.best_error_rate = min(self.best_error_rate + 0.01, self.error_rate)
+        
+        if self.adaptive:
+            limit = self.limit
+            if self.error_rate > self.best_error_rate + CONCURRENCY_ERROR_RISE:
+                limit *= CONCURRENCY_BACKOFF
+                self.decision = 'errors'
+            elif self.median_latency > self.best_latency * CONCURRENCY_TOLERANCE:
+                limit *= max(CONCURRENCY_BACKOFF, self.best_latency * CONCURRENCY_TOLERANCE / self.median_latency)
+                self.decision = 'latency'
+            elif self.peak >= int(self.limit) - self._reserved():
+                limit = limit * 2 if self.slow_start else limit + math.sqrt(limit)
+                self.decision = 'grow'
+            else:
+                self.decision = 'hold'
+            if self.decision in ('errors', 'latency'):
+                self.slow_start = False
+            limit = max(CONCURRENCY_MIN, min(self.ceiling, limit))
+            if int(limit) > int(self.limit):
+                self.increases += 1
+            elif int(limit) < int(self.limit):
+                self.decreases += 1
+            grown = int(limit) - int(self.limit)
+            self.limit = limit
+            if grown > 0:
+                self._wake(grown)
+        
+        self.window_start = now
+        self.latencies = []
+        self.errors = 0
+        self.peak = self.in_flight
+
+    def snapshot(self):
+        """Current limit and the measurements behind it, for stats output"""
+        with self.cond:
+            return {
+                'limit': int(self.limit), 'ceiling': self.ceiling, 'in_flight': self.in_flight,
+                'throughput': round(self.throughput, 2), 'error_rate': round(self.error_rate, 3),
+                'p50_latency': self.median_latency, 'best_latency': self.best_latency,
+                'decision': self.decision, 'increases': self.increases, 'decreases': self.decreases,
+                'skipped': self.skipped,
+                'time_left': max(0.0, self.deadline - time.time()) if self.deadline else None,
+            }
+
+def _resolve_waiter(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+concurrency = ConcurrencyController()
+
+# ============================================================================
+# ENGINE HEALTH
+# ============================================================================
+
+BREAKER_FAILURES = 3            # Failed searches in a row that open an engine's circuit
+BREAKER_STALL = 4.0             # Seconds without an answer, with BREAKER_FAILURES searches in flight, that do too,
+                                # until some engine has answered BREAKER_MIN_SAMPLES searches
+BREAKER_STALL_FACTOR = 3.0      # After that: this multiple of the engine's p90 latency...
+BREAKER_STALL_MIN = 2.0         # ...but never less than this (seconds)
+BREAKER_WINDOW = 100            # Recent answers per engine the p90 is taken over
+BREAKER_MIN_SAMPLES = 10        # Answers an engine needs before its own latency is used
+BREAKER_COOLDOWN = 5.0          # Seconds an open circuit waits before it is probed
+BREAKER_MAX_COOLDOWN = 120.0    # Cooldown cap; it doubles after every failed probe
+BREAKER_PROBE_TIMEOUT = 5.0     # Total deadline of a probe search
+
+def search_timeouts(budget):
+    """(connect, read) timeouts for a search that must be over within budget seconds
+
+    Together they bound the wait for the response headers by the budget;
+    the body is then read against the budget itself by read_search_body().
+    """
+    connect = min(SEARCH_CONNECT_TIMEOUT, budget / 2)
+    return connect, min(SEARCH_READ_TIMEOUT, budget - connect)
+
+def read_search_body(response, scanner, deadline, cancel=None):
+    """Feed a streamed requests response to scanner; TimeoutError once deadline passes
+
+    Every read returns what a single recv() got, with the socket timeout cut
+    to the time left, so a server that drips bytes can't keep a worker past
+    the deadline the way a per-read timeout alone lets it. A SearchCancel
+    gets the socket too and raises SearchCancelled once it is used.
+    """
+    raw = response.raw
+    if not hasattr(raw, 'read1'):
+        # urllib3 1.x: the deadline is only checked between chunks
+        for chunk in response.iter_content(SCAN_CHUNK_SIZE):
+            if not scanner.feed(chunk):
+                return
+            if time.time() > deadline:
+                raise TimeoutError("search deadline exceeded")
+            if cancel is not None and cancel.cancelled:
+                raise SearchCancelled()
+        return
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise TimeoutError("search deadline exceeded")
+        connection = raw.connection
+        if connection is not None and connection.sock is not None:
+            if cancel is not None and not cancel.attach(connection.sock):
+                raise SearchCancelled()
+            connection.sock.settimeout(min(SEARCH_READ_TIMEOUT, remaining))
+        try:
+            chunk = raw.read1(4 * SCAN_CHUNK_SIZE, decode_content=True)
+        except Exception:
+            if cancel is not None and cancel.cancelled:
+                raise SearchCancelled()
+            raise
+        # A shut down socket reads as the end of the body
+        if cancel is not None and cancel.cancelled:
+            raise SearchCancelled()
+        if not chunk or not scanner.feed(chunk):
+            return
+
+def engine_is_up(status):
+    """Whether an HTTP status shows the engine answering (429/503 are throttling, not outages)"""
+    return status < 500 or status == 503
+
+class Circuit:
+    """Breaker state of one engine"""
+    __slots__ = ('state', 'failures', 'cooldown', 'retry_at', 'trips', 'in_flight', 'waiting_since', 'latencies',
+                 'stall')
+
+    def __init__(self):
+        self.state = 'closed'
+        self.failures = 0           # Failures in a row
+        self.cooldown = BREAKER_COOLDOWN
+        self.retry_at = 0.0
+        self.trips = 0
+        self.in_flight = 0
+        self.waiting_since = 0.0    # Last answer, or when searches went in flight after none were
+        self.latencies = deque(maxlen=BREAKER_WINDOW)
+        self.stall = None           # Stall threshold from the latencies, once there are enough
+
+class EngineBreaker:
+    """Circuit breaker per engine for direct searches
+
+    An engine's circuit opens after BREAKER_FAILURES searches in a row fail
+    to connect, time out or get a 5xx, or when that many are in flight and
+    none has been answered for BREAKER_STALL_FACTOR times the engine's p90
+    latency (an engine that accepts connections and then stalls would
+    otherwise keep taking workers until the first timeouts), and
+    WorkScheduler stops handing out its tasks. An engine that hasn't
+    answered enough searches yet is judged by the slowest engine that has,
+    so a slow but healthy engine isn't cut off for being slower than a fixed
+    threshold. When the cooldown is over the circuit goes half-open and one
+    probe search runs on a background thread: an answer closes the circuit,
+    a failure opens it again for twice as long, up to BREAKER_MAX_COOLDOWN.
+    Searches through proxies aren't recorded, since their failures are
+    mostly the proxy's and ProxyPool already deals with those.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.configure([])
+
+    def configure(self, engines):
+        """Close every circuit; engines are what open circuits get probed with"""
+        with self.lock:
+            self.engines = {engine['name']: engine for engine in engines}
+            self.circuits = {}
+
+    def allow(self, name):
+        """Whether the engine is in rotation; starts the probe of a circuit that is due"""
+        with self.lock:
+            circuit = self.circuits.get(name)
+            if circuit is None:
+                return True
+            if circuit.state == 'closed':
+                if circuit.in_flight < BREAKER_FAILURES or time.time() - circuit.waiting_since < self._stall(circuit):
+                    return True
+                self._open(name, circuit, f"{circuit.in_flight} searches stalled")
+                return False
+            if circuit.state == 'open' and time.time() >= circuit.retry_at and name in self.engines:
+                circuit.state = 'half-open'
+                threading.Thread(target=self._probe, args=(self.engines[name], circuit),
+                                 name=f'probe-{name}', daemon=True).start()
+            return False
+
+    def begin(self, name):
+        """Note a direct search going out; every begin() is followed by a record()"""
+        with self.lock:
+            circuit = self.circuits.setdefault(name, Circuit())
+            if not circuit.in_flight:
+                circuit.waiting_since = time.time()
+            circuit.in_flight += 1
+
+    def _stall(self, circuit):
+        """Seconds without an answer after which the circuit's searches count as stalled"""
+        if circuit.stall is not None:
+            return circuit.stall
+        known = [other.stall for other in self.circuits.values() if other.stall is not None]
+        return max(known) if known else BREAKER_STALL
+
+    def record(self, name, up, latency=None):
+        """Count the outcome of a direct search; up=None (cancelled) says nothing about the engine"""
+        with self.lock:
+            circuit = self.circuits.setdefault(name, Circuit())
+            circuit.in_flight = max(0, circuit.in_flight - 1)
+            if up is None:
+                return
+            if up:
+                circuit.waiting_since = time.time()
+                if latency is not None:
+                    circuit.latencies.append(latency)
+                    samples = len(circuit.latencies)
+                    if samples >= BREAKER_MIN_SAMPLES and samples % 10 == 0:
+                        circuit.stall = max(BREAKER_STALL_MIN,
+                                            BREAKER_STALL_FACTOR * percentile(list(circuit.latencies), 90))
+                # A search that was in flight when the circuit opened can close it early
+                if circuit.state == 'open':
+                    print(f"🔌 {name}: answering again, back in rotation")
+                circuit.state = 'closed'
+                circuit.failures = 0
+                circuit.cooldown = BREAKER_COOLDOWN
+                return
+            circuit.failures += 1
+            if circuit.state == 'closed' and circuit.failures >= BREAKER_FAILURES:
+                self._open(name, circuit, f"{circuit.failures} failures in a row")
+
+    def _open(self, name, circuit, reason):
+        circuit.state = 'open'
+        circuit.retry_at = time.time() + circuit.cooldown
+        circuit.trips += 1
+        metrics.inc('scraper_breaker_trips_total', (name,))
+        print(f"🔌 {name}: {reason}, out of rotation for {circuit.cooldown:.0f}s")
+
+    def _probe(self, engine, circuit):
+        up = False
+        if not stop_flag.is_set():
+            started = time.time()
+            try:
+                params, headers = build_search_params(random.choice(DORKS), engine)
+                with session_pool.direct().get(
+                    engine['url'],
+                    params=params,
+                    headers=headers,
+                    timeout=search_timeouts(BREAKER_PROBE_TIMEOUT),
+                    verify=False,
+                    allow_redirects=True,
+                    stream=True
+                ) as response:
+                    rate_scheduler.report(engine['name'], response.status_code, response.headers.get('Retry-After'))
+                    # The whole page has to arrive in time: some engines stall after the headers
+                    if 200 <= response.status_code < 400:
+                        read_search_body(response, engine_adapter(engine).parser(engine, params), started + BREAKER_PROBE_TIMEOUT)
+                    up = engine_is_up(response.status_code)
+            except Exception:
+                pass
+        
+        with self.lock:
+            # A reconfigured breaker or an in-flight search may have settled it already
+            if self.circuits.get(engine['name']) is not circuit or circuit.state != 'half-open':
+                return
+            if up:
+                circuit.state = 'closed'
+                circuit.failures = 0
+                circuit.cooldown = BREAKER_COOLDOWN
+                print(f"🔌 {engine['name']}: probe answered, back in rotation")
+            else:
+                circuit.cooldown = min(BREAKER_MAX_COOLDOWN, circuit.cooldown * 2)
+                circuit.state = 'open'
+                circuit.retry_at = time.time() + circuit.cooldown
+
+    def snapshot(self):
+        """Circuits that ever opened, for stats output"""
+        now = time.time()
+        with self.lock:
+            return {
+                name: {'state': circuit.state, 'trips': circuit.trips,
+                       'retry_in': round(max(0.0, circuit.retry_at - now), 1) if circuit.state == 'open' else None}
+                for name, circuit in self.circuits.items() if circuit.trips
+            }
+
+engine_breaker = EngineBreaker()
+
+# ============================================================================
+# HEDGING
+# ============================================================================
+
+HEDGE_QUANTILE = 90      # Latency percentile of an engine after which its searches are hedged
+HEDGE_WINDOW = 200       # Recent searches per engine the percentile is taken over
+HEDGE_MIN_SAMPLES = 20   # Searches an engine needs before its searches are hedged
+HEDGE_MIN_DELAY = 0.2    # Never hedge sooner than this (seconds)
+HEDGE_BUDGET = 0.1       # Most hedges as a share of searches
+HEDGE_BURST = 10         # Hedges allowed ahead of the budget
+
+class SearchCancelled(Exception):
+    """A search was stopped because another copy of it answered first"""
+
+class SearchCancel:
+    """Lets another thread stop a search that is reading its response"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cancelled = False
+        self.sock = None
+
+    def attach(self, sock):
+        """Note the socket the search reads from; False if it was cancelled already"""
+        with self.lock:
+            self.sock = sock
+            return not self.cancelled
+
+    def cancel(self):
+        """Stop the search: a blocked read returns at once and the search raises SearchCancelled"""
+        with self.lock:
+            self.cancelled = True
+            sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+class Hedger:
+    """When a slow search gets a second copy, and how the copies fared
+
+    A search still running after its engine's recent HEDGE_QUANTILE latency
+    is sent again, to another engine or through another proxy, as long as
+    hedges stay within HEDGE_BUDGET of all searches (plus HEDGE_BURST).
+    The first copy to answer is used and the other is cancelled. A search
+    whose first copy was cancelled still counts towards the percentile with
+    the time it had run, so the tail isn't forgotten because it was cut short.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.configure(False)
+
+    def configure(self, enabled):
+        """Reset for a run; nothing is hedged unless enabled"""
+        with self.lock:
+            self.enabled = enabled
+            self.latencies = {}  # engine -> deque of recent latencies
+            self.delays = {}     # engine -> hedge delay, refreshed every few samples
+            self.searches = 0
+            self.hedged = 0
+            self.hedge_wins = 0
+            self.primary_wins = 0
+            self.both_failed = 0
+            self.cancelled = 0
+            self.refused = 0     # Hedges that were due but over budget or without a free target
+
+    def delay(self, engine):
+        """Seconds a search on engine runs before it is hedged; None if it won't be"""
+        with self.lock:
+            self.searches += 1
+            return self.delays.get(engine)
+
+    def observe(self, engine, latency):
+        """Add the (possibly cut short) latency of a search on engine"""
+        with self.lock:
+            window = self.latencies.setdefault(engine, deque(maxlen=HEDGE_WINDOW))
+            window.append(latency)
+            if len(window) >= HEDGE_MIN_SAMPLES and len(window) % 10 == 0:
+                self.delays[engine] = max(HEDGE_MIN_DELAY, percentile(list(window), HEDGE_QUANTILE))
+
+    def allow(self):
+        """Whether the budget has room for another hedge"""
+        with self.lock:
+            return self.hedged < HEDGE_BUDGET * self.searches + HEDGE_BURST
+
+    def start(self):
+        """Count a hedge that is going out"""
+        with self.lock:
+            self.hedged += 1
+
+    def refuse(self):
+        """Count a hedge that was due but had no budget or target"""
+        with self.lock:
+            self.refused += 1
+
+    def settle(self, engine, winner, cancelled):
+        """Score a hedged search: winner is 'primary', 'hedge' or None if both failed"""
+        with self.lock:
+            if winner == 'hedge':
+                self.hedge_wins += 1
+            elif winner == 'primary':
+                self.primary_wins += 1
+            else:
+                self.both_failed += 1
+            self.cancelled += cancelled
+        metrics.inc('scraper_hedges_total', (engine, winner or 'failed'))
+
+    def snapshot(self):
+        """Hedge counts for stats output"""
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'searches': self.searches,
+                'hedged': self.hedged,
+                'hedge_rate': self.hedged / self.searches if self.searches else 0.0,
+                'hedge_wins': self.hedge_wins,
+                'primary_wins': self.primary_wins,
+                'both_failed': self.both_failed,
+                'cancelled': self.cancelled,
+                'refused': self.refused,
+                'delays': {engine: round(delay, 3) for engine, delay in self.delays.items()},
+            }
+
+def hedge_target(work, task, engine, proxy, pool, deadline):
+    """Where a hedge of task goes, as (engine, proxy) with its concurrency and rate slots taken; None if nowhere
+
+    Proxy runs send it to the same engine through another proxy; proxyless
+    runs send the same dork and page to another engine that is in rotation.
+    The hedge counts against the concurrency limit like any other search,
+    so it is skipped when no slot is free.
+    """
+    if deadline - time.time() < DEADLINE_MARGIN or not hedger.allow() or concurrency.try_acquire() is None:
+        hedger.refuse()
+        return None
+    if pool is not None:
+        other = pool.choose()
+        if other is not None and other != proxy and rate_scheduler.try_reserve(engine['name'], other):
+            hedger.start()
+            return engine, other
+    else:
+        names = [name for name in work.engines if name != task.engine]
+        random.shuffle(names)
+        for name in names:
+            other = work.engines[name]
+            if task.page and not other.get('page_param'):
+                continue
+            if engine_breaker.allow(name) and rate_scheduler.try_reserve(name):
+                hedger.start()
+                return other, None
+    concurrency.release()
+    hedger.refuse()
+    return None
+
+def run_hedged(engine_name, search, hedge):
+    """Run search(cancel), racing a hedge against it once it is slower than the engine's hedge delay
+
+    hedge() returns the second copy (a callable like search) or None. Both
+    copies return (urls, success, has_next, engine name); the first
+    successful answer is returned and the other copy is cancelled.
+    """
+    if not hedger.enabled or hedge_executor is None:
+        return search(None)
+    delay = hedger.delay(engine_name)
+    started = time.time()
+    if delay is None:
+        result = search(None)
+        if result[1]:
+            hedger.observe(engine_name, time.time() - started)
+        return result
+    
+    cancels = [SearchCancel()]
+    futures = [hedge_executor.submit(search, cancels[0])]
+    done, _ = wait_futures(futures, timeout=delay)
+    if not done:
+        second = hedge()
+        if second is not None:
+            cancels.append(SearchCancel())
+            futures.append(hedge_executor.submit(second, cancels[1]))
+    
+    result = winner = None
+    pending = set(futures)
+    while pending and winner is None:
+        done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+        for future in sorted(done, key=futures.index):
+            result = future.result()
+            if result[1]:
+                winner = futures.index(future)
+                break
+    
+    for cancel, future in zip(cancels, futures):
+        if not future.done():
+            cancel.cancel()
+    if winner == 0 or futures[0] in pending:
+        # A cut-short primary still ran at least this long
+        hedger.observe(engine_name, time.time() - started)
+    if len(futures) > 1:
+        hedger.settle(engine_name, (None, 'primary', 'hedge')[0 if winner is None else winner + 1], len(pending))
+    return result
+
+async def run_hedged_async(engine_name, search, hedge):
+    """Event-loop version of run_hedged(); search and hedge() give coroutine functions"""
+    if not hedger.enabled:
+        return await search()
+    delay = hedger.delay(engine_name)
+    started = time.time()
+    if delay is None:
+        result = await search()
+        if result[1]:
+            hedger.observe(engine_name, time.time() - started)
+        return result
+    
+    tasks = [asyncio.ensure_future(search())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            second = hedge()
+            if second is not None:
+                tasks.append(asyncio.ensure_future(second()))
+        
+        result = winner = None
+        pending = set(tasks)
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.index):
+                result = task.result()
+                if result[1]:
+                    winner = tasks.index(task)
+                    break
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+    
+    if winner == 0 or tasks[0] in pending:
+        hedger.observe(engine_name, time.time() - started)
+    if len(tasks) > 1:
+        hedger.settle(engine_name, (None, 'primary', 'hedge')[0 if winner is None else winner + 1], len(pending))
+    return result
+
+hedger = Hedger()
+hedge_executor = None  # Runs both copies of hedged thread-engine searches
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+METRICS_ADDRESS = '127.0.0.1:9464'  # Default --metrics listen address
+METRICS_MAX_PROXIES = 500           # Proxies with their own series; the rest count as 'other'
+METRICS_TOP_PROXIES = 20            # Proxies listed in the JSON snapshot
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 15.0)
+EXTRACT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+NEW_SITES_BUCKETS = (0, 1, 2, 5, 10, 20, 50)
+BUFFER_BUCKETS = (16384, 32768, 65536, 131072, 262144, 524288, 1048576)
+
+# name -> (type, labels, buckets, help); buckets=None on a summary means sum/count only
+METRIC_DEFS = {
+    'scraper_search_requests_total': ('counter', ('engine', 'status'), None,
+                                      'Searches sent, by HTTP status (or timeout/error/cancelled)'),
+    'scraper_search_latency_seconds': ('histogram', ('engine',), LATENCY_BUCKETS, 'Search round-trip time'),
+    'scraper_search_bytes_total': ('counter', ('engine',), None, 'Response bytes downloaded'),
+    'scraper_extract_seconds': ('histogram', ('engine',), EXTRACT_BUCKETS, 'Time spent extracting URLs from a page'),
+    'scraper_new_sites': ('histogram', ('engine',), NEW_SITES_BUCKETS, 'New sites per search'),
+    'scraper_scan_buffer_bytes': ('histogram', ('engine',), BUFFER_BUCKETS,
+                                  'Largest buffer held while scanning a response'),
+    'scraper_scan_stops_total': ('counter', ('engine', 'reason'), None,
+                                 'Responses whose scan stopped early (results_end or max_bytes)'),
+    'scraper_cache_hits_total': ('counter', ('engine',), None, 'Searches answered by the response cache'),
+    'scraper_breaker_trips_total': ('counter', ('engine',), None, 'Times an engine was taken out of rotation'),
+    'scraper_hedges_total': ('counter', ('engine', 'winner'), None,
+                             'Hedged searches, by the copy that answered first (or failed)'),
+    'scraper_proxy_requests_total': ('counter', ('proxy', 'outcome'), None, 'Searches sent through each proxy'),
+    'scraper_proxy_latency_seconds': ('summary', ('proxy',), None, 'Search round-trip time through each proxy'),
+}
+
+class Histogram:
+    """Cumulative-bucket histogram (or plain sum/count without buckets)"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets or ()
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def merge(self, counts, total, count):
+        for i, n in enumerate(counts):
+            self.counts[i] += n
+        self.sum += total
+        self.count += count
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket, like histogram_quantile()"""
+        if not self.count or not self.buckets:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, n in zip(self.buckets, self.counts):
+            if n and seen + n >= rank:
+                return lower + (bound - lower) * (rank - seen) / n
+            seen += n
+            lower = bound
+        return self.buckets[-1]
+
+def proxy_label(proxy):
+    """host:port of a proxy URL, without credentials"""
+    parts = urllib.parse.urlsplit(proxy)
+    return f"{parts.hostname}:{parts.port}" if parts.port else (parts.hostname or proxy)
+
+def _status_label(error):
+    """Status label for a search that got no HTTP response"""
+    if isinstance(error, (requests.Timeout, asyncio.TimeoutError, TimeoutError, urllib3.exceptions.TimeoutError)):
+        return 'timeout'
+    if isinstance(error, (SearchCancelled, asyncio.CancelledError)):
+        return 'cancelled'
+    return 'error'
+
+class MetricsRegistry:
+    """Per-engine and per-proxy counters and histograms for the whole process
+
+    Counters only ever grow, as Prometheus expects. --processes shards send
+    their registry dumps with their counters and the parent adds them on
+    output, so /metrics covers every shard.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {name: {} for name in METRIC_DEFS}
+        self.proxies = set()
+        self.shards = {}  # shard index -> latest dump()
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            series = self.series[name]
+            series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            self._histogram(name, labels).observe(value)
+
+    def _histogram(self, name, labels):
+        histogram = self.series[name].get(labels)
+        if histogram is None:
+            histogram = self.series[name][labels] = Histogram(METRIC_DEFS[name][2])
+        return histogram
+
+    def record_search(self, engine, proxy, status, latency, size=0, extract_time=None):
+        """Account one search that went out to an engine"""
+        status = str(status)
+        with self.lock:
+            series = self.series['scraper_search_requests_total']
+            series[(engine, status)] = series.get((engine, status), 0) + 1
+            self._histogram('scraper_search_latency_seconds', (engine,)).observe(latency)
+            if size:
+                series = self.series['scraper_search_bytes_total']
+                series[(engine,)] = series.get((engine,), 0) + size
+            if extract_time is not None:
+                self._histogram('scraper_extract_seconds', (engine,)).observe(extract_time)
+            if proxy:
+                label = proxy_label(proxy)
+                if label not in self.proxies:
+                    if len(self.proxies) >= METRICS_MAX_PROXIES:
+                        label = 'other'
+                    else:
+                        self.proxies.add(label)
+                outcome = 'ok' if status.isdigit() and 200 <= int(status) < 400 else 'failed'
+                series = self.series['scraper_proxy_requests_total']
+                series[(label, outcome)] = series.get((label, outcome), 0) + 1
+                self._histogram('scraper_proxy_latency_seconds', (label,)).observe(latency)
+
+    def record_scan(self, engine, peak, stopped):
+        """Account the buffer a response scan needed and why it stopped early, if it did"""
+        with self.lock:
+            self._histogram('scraper_scan_buffer_bytes', (engine,)).observe(peak)
+            if stopped:
+                series = self.series['scraper_scan_stops_total']
+                series[(engine, stopped)] = series.get((engine, stopped), 0) + 1
+
+    def dump(self):
+        """Plain-data copy of every series, for sending between processes"""
+        with self.lock:
+            return {
+                name: [[list(labels), [value.counts, value.sum, value.count] if isinstance(value, Histogram) else value]
+                       for labels, value in series.items()]
+                for name, series in self.series.items()
+            }
+
+    def load_shard(self, index, dump):
+        """Remember a shard's latest dump; it is added to this registry on output"""
+        with self.lock:
+            self.shards[index] = dump
+
+    def _merged(self):
+        """Own series plus every shard's, as name -> labels -> value"""
+        with self.lock:
+            merged = {}
+            for name, series in self.series.items():
+                merged[name] = {}
+                for labels, value in series.items():
+                    if isinstance(value, Histogram):
+                        copy = Histogram(value.buckets)
+                        copy.merge(value.counts, value.sum, value.count)
+                        value = copy
+                    merged[name][labels] = value
+            dumps = list(self.shards.values())
+        for dump in dumps:
+            for name, rows in dump.items():
+                series = merged.setdefault(name, {})
+                for labels, value in rows:
+                    labels = tuple(labels)
+                    if isinstance(value, list):
+                        histogram = series.get(labels)
+                        if histogram is None:
+                            histogram = series[labels] = Histogram(METRIC_DEFS[name][2])
+                        histogram.merge(*value)
+                    else:
+                        series[labels] = series.get(labels, 0) + value
+        return merged
+
+    def render(self):
+        """Prometheus text exposition of every metric plus the run's stats"""
+        lines = []
+        for name, series in self._merged().items():
+            kind, label_names, buckets, help_text = METRIC_DEFS[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series.items()):
+                pairs = dict(zip(label_names, labels))
+                if not isinstance(value, Histogram):
+                    lines.append(_sample(name, pairs, value))
+                    continue
+                cumulative = 0
+                for bound, n in zip(value.buckets, value.counts):
+                    cumulative += n
+                    lines.append(_sample(name + '_bucket', dict(pairs, le=bound), cumulative))
+                if value.buckets:
+                    lines.append(_sample(name + '_bucket', dict(pairs, le='+Inf'), value.count))
+                lines.append(_sample(name + '_sum', pairs, value.sum))
+                lines.append(_sample(name + '_count', pairs, value.count))
+        
+        gauges = [
+            ('scraper_sites_found', 'gauge', 'Unique sites found', stats['found']),
+            ('scraper_searches_total', 'counter', 'Searches performed (including cache hits)', stats['searches']),
+            ('scraper_throttled_total', 'counter', '429/503 answers', stats.get('throttled', 0)),
+        ]
+        limit = stats.get('concurrency')
+        if limit:
+            gauges.append(('scraper_concurrency_limit', 'gauge', 'Adaptive in-flight search limit', limit['limit']))
+            gauges.append(('scraper_searches_in_flight', 'gauge', 'Searches in flight', limit['in_flight']))
+        for name, kind, help_text, value in gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """Per-engine and top per-proxy summary as JSON-friendly data"""
+        merged = self._merged()
+        engines = {}
+        for (engine, status), n in merged['scraper_search_requests_total'].items():
+            row = engines.setdefault(engine, {'requests': 0, 'errors': 0, 'statuses': {}})
+            row['requests'] += n
+            row['statuses'][status] = n
+            if not (status.isdigit() and 200 <= int(status) < 400):
+                row['errors'] += n
+        for engine, row in engines.items():
+            latency = merged['scraper_search_latency_seconds'].get((engine,))
+            extract = merged['scraper_extract_seconds'].get((engine,))
+            new_sites = merged['scraper_new_sites'].get((engine,))
+            row['error_rate'] = row['errors'] / row['requests']
+            row['p50_latency'] = latency.quantile(0.5) if latency else None
+            row['p95_latency'] = latency.quantile(0.95) if latency else None
+            row['bytes'] = merged['scraper_search_bytes_total'].get((engine,), 0)
+            row['extract_ms'] = extract.sum / extract.count * 1000 if extract and extract.count else None
+            row['new_sites_per_request'] = new_sites.sum / new_sites.count if new_sites and new_sites.count else 0.0
+            row['cache_hits'] = merged['scraper_cache_hits_total'].get((engine,), 0)
+            buffers = merged['scraper_scan_buffer_bytes'].get((engine,))
+            row['p95_scan_buffer'] = buffers.quantile(0.95) if buffers else None
+            row['scan_stops'] = {reason: n for (name, reason), n in merged['scraper_scan_stops_total'].items()
+                                 if name == engine}
+        
+        proxies = {}
+        for (proxy, outcome), n in merged['scraper_proxy_requests_total'].items():
+            row = proxies.setdefault(proxy, {'requests': 0, 'failed': 0})
+            row['requests'] += n
+            if outcome == 'failed':
+                row['failed'] += n
+        for proxy, row in proxies.items():
+            latency = merged['scraper_proxy_latency_seconds'].get((proxy,))
+            row['mean_latency'] = latency.sum / latency.count if latency and latency.count else None
+        top = sorted(proxies.items(), key=lambda item: -item[1]['requests'])[:METRICS_TOP_PROXIES]
+        
+        elapsed = time.time() - stats['start_time'] if stats['start_time'] else 0
+        return {
+            'time': time.time(),
+            'elapsed': elapsed,
+            'found': stats['found'],
+            'searches': stats['searches'],
+            'throttled': stats.get('throttled', 0),
+            'concurrency': stats.get('concurrency'),
+            'engines': engines,
+            'proxies': dict(top),
+            'proxy_count': len(proxies),
+        }
+
+def _sample(name, labels, value):
+    """One exposition line: name{key="value",...} value"""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    pairs = ','.join(f'{key}="{v}"' for key, v in zip(labels, escaped))
+    return f"{name}{{{pairs}}} {value}" if pairs else f"{name} {value}"
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """GET /metrics (Prometheus text) and /metrics.json (snapshot())"""
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/metrics':
+            body, content_type = metrics.render().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+        elif path == '/metrics.json':
+            body, content_type = json.dumps(metrics.snapshot()).encode('utf-8'), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def open_metrics_server(address=METRICS_ADDRESS):
+    """Serve /metrics and /metrics.json from a background thread"""
+    global metrics_server
+    try:
+        metrics_server = http.server.ThreadingHTTPServer(parse_address(address, 9464), _MetricsHandler)
+    except OSError as e:
+        print(f"❌ Can't serve metrics on {address}: {e}")
+        return None
+    metrics_server.daemon_threads = True
+    threading.Thread(target=metrics_server.serve_forever, name='metrics', daemon=True).start()
+    host, port = metrics_server.server_address[:2]
+    print(f"📈 Metrics at http://{host}:{port}/metrics (JSON at /metrics.json)")
+    return metrics_server
+
+def close_metrics_server():
+    global metrics_server
+    if metrics_server:
+        metrics_server.shutdown()
+        metrics_server.server_close()
+        metrics_server = None
+
+metrics = MetricsRegistry()
+metrics_server = None
+
+# ============================================================================
+# WORK SCHEDULING
+# ============================================================================
+
+MAX_PAGES = 10          # Deepest result page requested per dork/engine lane
+MAX_TASK_ATTEMPTS = 3   # Tries per page before a failing lane is dropped
+LANE_COOLDOWN = 1800    # Seconds a lane that stopped paging waits before it starts again from page 0
+
+SearchTask = namedtuple('SearchTask', 'dork engine page attempts')
+
+class WorkScheduler:
+    """Coverage-driven queue of (dork, engine, page) searches
+
+    Every dork/engine pair is a lane that is paged one request at a time.
+    A lane keeps paging while its pages bring new sites and a result set
+    it has not seen before, and stops otherwise, or as soon as the engine
+    adapter reports that a page was the last one. Failed searches are
+    re-queued up to MAX_TASK_ATTEMPTS times. A lane that stopped sits out
+    LANE_COOLDOWN before it starts again from page 0, and keeps the hashes
+    of the result sets it has seen, so a restart that only finds the same
+    results stops after one search. When every lane is paged or cooling
+    down there is no work until the first cooldown ends.
+    """
+
+    def __init__(self, dorks, engines, max_pages=MAX_PAGES):
+        self.cond = threading.Condition()
+        self.dorks = list(dorks)
+        self.engines = {engine['name']: engine for engine in engines}
+        self.max_pages = {name: max_pages if engine.get('page_param') else 1
+                          for name, engine in self.engines.items()}
+        self.ready = {name: deque() for name in self.engines}
+        self.active = {name: set() for name in self.engines}  # Dorks queued or in flight
+        self.cooling = {name: deque() for name in self.engines}  # (ready_at, dork) in stop order
+        self.result_hashes = {}
+        self.in_flight = dict.fromkeys(self.engines, 0)
+        self.exhausted = 0
+        self.restarted = 0
+        self.last_pages = 0  # Lanes stopped because the engine had no next page
+        self.retried = 0
+        self.deepest_page = 0
+        for name in self.engines:
+            self._start_lanes(name, self.dorks)
+
+    def _start_lanes(self, name, dorks):
+        self.active[name].update(dorks)
+        # Most productive dorks first, so they get the time a short run has
+        self.ready[name].extend(SearchTask(dork, name, 0, 0) for dork in dork_bandit.order(dorks))
+
+    def _exhaust(self, task):
+        self.exhausted += 1
+        self.active[task.engine].discard(task.dork)
+        self.cooling[task.engine].append((time.time() + LANE_COOLDOWN, task.dork))
+
+    def _restart_cooled(self, name):
+        """Queue page 0 of the engine's lanes whose cooldown is over"""
+        cooling = self.cooling[name]
+        now = time.time()
+        dorks = []
+        while cooling and cooling[0][0] <= now:
+            dorks.append(cooling.popleft()[1])
+        if dorks:
+            self.restarted += len(dorks)
+            self._start_lanes(name, dorks)
+            self.cond.notify_all()
+
+    def _pop(self):
+        for name in self.cooling:
+            self._restart_cooled(name)
+        engines = [self.engines[name] for name, tasks in self.ready.items() if tasks and engine_breaker.allow(name)]
+        if not engines:
+            return None
+
+        # Serve an engine whose rate limit frees up first, by yield among those
+        engine = rate_scheduler.choose(engines, lambda ready: engine_bandit.choose(ready, key=lambda e: e['name']))
+        self.in_flight[engine['name']] += 1
+        return self.ready[engine['name']].popleft()
+
+    def get(self):
+        """Block until a task is available; None once the run stops"""
+        with self.cond:
+            while not stop_flag.is_set():
+                task = self._pop()
+                if task is not None:
+                    return task
+                self.cond.wait(0.5)
+        return None
+
+    def get_nowait(self):
+        """Next task if one is ready, else None"""
+        with self.cond:
+            return self._pop()
+
+    def release(self, task):
+        """Put back a task that was handed out but never searched"""
+        with self.cond:
+            self.in_flight[task.engine] -= 1
+            self.ready[task.engine].appendleft(task)
+            self.cond.notify()
+
+    async def get_async(self):
+        """Coroutine version of get() for the async engine"""
+        while not stop_flag.is_set():
+            with self.cond:
+                task = self._pop()
+            if task is not None:
+                return task
+            # Every lane has a page in flight; wait for one to finish
+            await asyncio.sleep(0.1)
+        return None
+
+    def done(self, task, success, urls, new_sites, has_next=None, answered=None):
+        """Report a finished task and queue the lane's next page
+
+        has_next is what the engine's adapter read from the page: False
+        ends the lane, None leaves it to the new-sites heuristic. answered
+        is the engine that answered if it wasn't task.engine (a hedge won);
+        it gets the credit, and the lane's own page is searched again.
+        """
+        answered = answered or task.engine
+        # A blocked search counts against the engine but says nothing about the dork
+        engine_bandit.record(answered, new_sites)
+        if success:
+            dork_bandit.record(task.dork, new_sites)
+
+        with self.cond:
+            self.in_flight[task.engine] -= 1
+            lane = (task.dork, task.engine)
+
+            # Another engine's page says nothing about how deep this lane goes
+            if not success or answered != task.engine:
+                if task.attempts + 1 < MAX_TASK_ATTEMPTS:
+                    self.retried += 1
+                    self.ready[task.engine].append(task._replace(attempts=task.attempts + 1))
+                else:
+                    self._exhaust(task)
+                self.cond.notify()
+                return
+
+            digest = hash(frozenset(urls))
+            seen = self.result_hashes.setdefault(lane, set())
+            if has_next is False:
+                self.last_pages += 1
+                self._exhaust(task)
+            elif new_sites and digest not in seen and task.page + 1 < self.max_pages[task.engine]:
+                seen.add(digest)
+                # Productive lanes go first: their next page is the best bet for new sites
+                self.ready[task.engine].appendleft(SearchTask(task.dork, task.engine, task.page + 1, 0))
+                self.deepest_page = max(self.deepest_page, task.page + 1)
+            else:
+                self._exhaust(task)
+            self.cond.notify()
+
+    def snapshot(self):
+        """Coverage summary for stats output"""
+        with self.cond:
+            return {
+                'lanes': len(self.dorks) * len(self.engines),
+                'active': sum(len(active) for active in self.active.values()),
+                'cooling': sum(len(cooling) for cooling in self.cooling.values()),
+                'restarted': self.restarted,
+                'exhausted': self.exhausted,
+                'last_pages': self.last_pages,
+                'queued': sum(len(tasks) for tasks in self.ready.values()),
+                'in_flight': sum(self.in_flight.values()),
+                'retried': self.retried,
+                'deepest_page': self.deepest_page,
+            }
+
+# ============================================================================
+# DISCOVERY PIPELINE
+# ============================================================================
+
+class SearchCounter:
+    """Per-thread search counters, summed on read"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.local = threading.local()
+            self.shards = []
+
+    def add(self, n=1):
+        shard = getattr(self.local, 'shard', None)
+        if shard is None:
+            shard = self.local.shard = [0]
+            with self.lock:
+                self.shards.append(shard)
+        # Only the owning thread writes a shard, so no lock is needed here
+        shard[0] += n
+
+    def total(self):
+        return sum(shard[0] for shard in self.shards[:])
+
+DISCOVERY_QUEUE_SIZE = 10000  # Pending results before workers wait for the aggregator
+DISCOVERY_INTERVAL = 0.05     # Seconds the aggregator lets results pile up between drains
+
+class DiscoveryPipeline:
+    """Single aggregator thread that owns dedup, found-site stats and output
+
+    Workers pre-filter their URLs against found_sites without a lock and
+    submit (task, new_urls, icon, engine_name) only when something looks
+    new. The aggregator drains the queue, dedups the whole drain under one
+    sites_lock acquisition, prints the discoveries in a single write and
+    appends them to the results store and output writer (or verifier). The
+    queue is bounded so a slow aggregator holds workers back instead of
+    buffering without limit.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue(DISCOVERY_QUEUE_SIZE)
+        self.thread = None
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name='discovery', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Process everything already submitted, then stop the aggregator"""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        stats['searches'] = search_counter.total()
+
+    def submit(self, item):
+        self.queue.put(item)
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self.queue.get(timeout=0.25)]
+            except queue.Empty:
+                stats['searches'] = search_counter.total()
+                if site_writer:
+                    site_writer.sync()
+                continue
+
+            # Drain whatever else is waiting so it is handled as one batch
+            while batch[-1] is not None and len(batch) < DISCOVERY_QUEUE_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = batch[-1] is None
+            if stopping:
+                batch.pop()
+            if batch:
+                self._process(batch)
+            if stopping:
+                return
+            # Waking per result would compete with the workers for the GIL
+            time.sleep(DISCOVERY_INTERVAL)
+
+    def _process(self, batch):
+        stored = []
+        lines = []
+        with sites_lock:
+            for task, urls, icon, engine_name in batch:
+                # Another worker may have submitted the same site in this drain
+                new_urls = []
+                for url in urls:
+                    if url not in found_sites:
+                        found_sites.add(url)
+                        new_urls.append(url)
+                if new_urls:
+                    source = f"{engine_name}: " if engine_name else ""
+                    lines.append(f"{icon} [{len(found_sites)}] {source}{new_urls[0][:60]}...")
+                    stored.append((task, new_urls))
+            stats['found'] = len(found_sites)
+            stats['searches'] = search_counter.total()
+
+        if lines:
+            print('\n'.join(lines))
+        for task, new_urls in stored:
+            if results_store:
+                results_store.add(new_urls, task.engine, task.dork)
+            # Verified sites reach the writer once their status is known
+            if verifier:
+                verifier.submit(new_urls, task.engine, task.dork)
+            elif site_writer:
+                site_writer.add(new_urls, task.engine, task.dork)
+
+search_counter = SearchCounter()
+discovery = DiscoveryPipeline()
+
+# ============================================================================
+# SCRAPING FUNCTIONS
+# ============================================================================
+
+def build_search_params(query, engine, proxied=False, page=0):
+    """Build query params and headers for one search"""
+    return engine_adapter(engine).build(engine, query, page, proxied)
+
+def record_search_results(work, task, success, urls, icon, engine_name=None, has_next=None, answered=None):
+    """Count one search and hand its new URLs to the discovery pipeline
+
+    answered is the engine that answered, when a hedge sent the task to
+    another one; its sites and yield are credited to that engine.
+    """
+    search_counter.add()
+    answered = answered or task.engine
+    # Set lookups are safe while the aggregator adds to found_sites, so only
+    # URLs that look new are queued; the aggregator has the final word
+    new_urls = [url for url in urls if url not in found_sites]
+    if success:
+        metrics.observe('scraper_new_sites', (answered,), len(new_urls))
+    if new_urls:
+        found_by = task if answered == task.engine else task._replace(engine=answered)
+        discovery.submit((found_by, new_urls, icon, engine_name))
+    work.done(task, success, urls, len(new_urls), has_next, answered)
+
+def serve_cached_search(work, task, engine, proxied, icon):
+    """Answer a task from the response cache without network I/O
+
+    Returns (cache_key, hit).
+    """
+    if response_cache is None:
+        return None, False
+    params, _ = build_search_params(task.dork, engine, proxied, task.page)
+    cache_key = response_cache.key(engine, params)
+    urls = response_cache.get(cache_key)
+    if urls is None:
+        return cache_key, False
+    metrics.inc('scraper_cache_hits_total', (engine['name'],))
+    record_search_results(work, task, True, urls, icon, None if proxied else engine['name'])
+    return cache_key, True
+
+def _keep_bodies():
+    """Whether search responses must be kept whole (response cache bodies or --record)"""
+    return response_archive is not None or (response_cache is not None and response_cache.keep_bodies)
+
+def _finish_search(engine, proxy, query, page, params, cache_key, status, started, scanner):
+    """Account for, archive and cache one streamed search response; returns (urls, success, has_next)"""
+    latency = time.time() - started
+    success = 200 <= status < 400
+    engine_adapter(engine).report(engine, params, status)
+    urls = scanner.finish() if success else []
+    if proxy is None:
+        engine_breaker.record(engine['name'], engine_is_up(status), latency)
+    metrics.record_search(engine['name'], proxy, status, latency, scanner.size,
+                          scanner.scan_time if success else None)
+    if success:
+        metrics.record_scan(engine['name'], scanner.peak, scanner.stopped)
+    # The search is accounted for: a failed write must not reach the caller's except and count it again
+    try:
+        content = scanner.content()
+        archive_response(engine, params, query, page, status, latency, content)
+        if success and cache_key and response_cache:
+            response_cache.put(cache_key, engine['name'], urls, content)
+    except Exception as e:
+        print(f"⚠️  Could not store {engine['name']} response: {e}")
+    return urls, success, scanner.has_next
+
+def search_with_proxy(query, proxy, engine, page=0, cache_key=None, timeout=SEARCH_TIMEOUT, cancel=None):
+    """Search using proxy"""
+    started = time.time()
+    try:
+        params, headers = build_search_params(query, engine, proxied=True, page=page)
+        
+        with session_pool.for_proxy(proxy).get(
+            engine['url'],
+            params=params,
+            headers=headers,
+            proxies={'http': proxy, 'https': proxy},
+            timeout=search_timeouts(timeout),
+            verify=False,
+            allow_redirects=True,
+            stream=True
+        ) as response:
+            rate_scheduler.report(proxy, response.status_code, response.headers.get('Retry-After'))
+            
+            # Error pages are only read when they are being recorded
+            scanner = engine_adapter(engine).parser(engine, params, _keep_bodies())
+            if 200 <= response.status_code < 400 or response_archive:
+                read_search_body(response, scanner, started + timeout, cancel)
+            return _finish_search(engine, proxy, query, page, params, cache_key, response.status_code,
+                                  started, scanner)
+    
+    except Exception as e:
+        metrics.record_search(engine['name'], proxy, _status_label(e), time.time() - started)
+        return [], False, None
+
+def search_proxyless(query, engine, page=0, cache_key=None, timeout=SEARCH_TIMEOUT, cancel=None):
+    """Search without proxy"""
+    started = time.time()
+    engine_breaker.begin(engine['name'])
+    try:
+        params, headers = build_search_params(query, engine, page=page)
+        
+        with session_pool.direct().get(
+            engine['url'],
+            params=params,
+            headers=headers,
+            timeout=search_timeouts(timeout),
+            verify=False,
+            allow_redirects=True,
+            stream=True
+        ) as response:
+            rate_scheduler.report(engine['name'], response.status_code, response.headers.get('Retry-After'))
+            
+            scanner = engine_adapter(engine).parser(engine, params, _keep_bodies())
+            if 200 <= response.status_code < 400 or response_archive:
+                read_search_body(response, scanner, started + timeout, cancel)
+            return _finish_search(engine, None, query, page, params, cache_key, response.status_code,
+                                  started, scanner)
+    
+    except Exception as e:
+        metrics.record_search(engine['name'], None, _status_label(e), time.time() - started)
+        engine_breaker.record(engine['name'], None if isinstance(e, SearchCancelled) else False)
+        return [], False, None
+
+def _search_copy(task, engine, proxy, pool, cache_key, timeout, slot=False):
+    """One copy of task's search as fn(cancel) for run_hedged(), proxied if proxy is set
+
+    A copy with its own concurrency slot (a hedge) gives it back when it
+    finishes, cancelled or not.
+    """
+    def search(cancel):
+        started = time.time()
+        success = False
+        try:
+            if proxy is None:
+                urls, success, has_next = search_proxyless(task.dork, engine, task.page, cache_key, timeout, cancel)
+            else:
+                urls, success, has_next = search_with_proxy(task.dork, proxy, engine, task.page, cache_key, timeout,
+                                                            cancel)
+                # A cancelled search says nothing about its proxy
+                if cancel is None or not cancel.cancelled:
+                    pool.report(proxy, success, time.time() - started)
+            return urls, success, has_next, engine['name']
+        finally:
+            if slot:
+                if cancel is not None and cancel.cancelled:
+                    concurrency.release()
+                else:
+                    concurrency.release(success, time.time() - started)
+    return search
+
+def _hedge_copy(work, task, engine, proxy, pool, cache_key, deadline):
+    """The hedge of a slow search, or None if it can't be hedged now"""
+    target = hedge_target(work, task, engine, proxy, pool, deadline)
+    if target is None:
+        return None
+    other, other_proxy = target
+    return _search_copy(task, other, other_proxy, pool, cache_key if other is engine else None,
+                        deadline - time.time(), slot=True)
+
+def proxy_scraper_worker(pool, work, max_searches=1000):
+    """Worker for proxy-based scraping"""
+    searches = 0
+    
+    for i in range(max_searches):
+        if stop_flag.is_set():
+            break
+        
+        try:
+            proxy = pool.choose()
+            if proxy is None:
+                break
+            task = work.get()
+            if task is None:
+                break
+            engine = work.engines[task.engine]
+            
+            cache_key, cached = serve_cached_search(work, task, engine, True, "💾")
+            searches += 1
+            if cached:
+                continue
+            
+            # Take a search slot first: a token reserved while waiting for one would go unused
+            timeout = concurrency.acquire()
+            if timeout is None:
+                work.release(task)
+                break
+            # Wait for both the engine and the proxy to have a free slot
+            if not rate_scheduler.acquire(engine['name'], proxy):
+                concurrency.release()
+                work.release(task)
+                break
+            # The token's wait counts against the run deadline too
+            timeout = concurrency.budget()
+            if timeout is None:
+                concurrency.release()
+                work.release(task)
+                break
+            
+            started = time.time()
+            success = False
+            try:
+                urls, success, has_next, answered = run_hedged(
+                    engine['name'], _search_copy(task, engine, proxy, pool, cache_key, timeout),
+                    lambda: _hedge_copy(work, task, engine, proxy, pool, cache_key, started + timeout))
+            finally:
+                concurrency.release(success, time.time() - started)
+            record_search_results(work, task, success, urls, "✅", has_next=has_next, answered=answered)
+        
+        except:
+            time.sleep(0.5)
+            continue
+    
+    return searches
+
+def proxyless_scraper_worker(work, max_searches=500):
+    """Worker for proxyless scraping"""
+    searches = 0
+    
+    for i in range(max_searches):
+        if stop_flag.is_set():
+            break
+        
+        try:
+            task = work.get()
+            if task is None:
+                break
+            engine = work.engines[task.engine]
+            
+            cache_key, cached = serve_cached_search(work, task, engine, False, "💾")
+            searches += 1
+            if cached:
+                continue
+            
+            timeout = concurrency.acquire()
+            if timeout is None:
+                work.release(task)
+                break
+            if not rate_scheduler.acquire(engine['name']):
+                concurrency.release()
+                work.release(task)
+                break
+            # The token's wait counts against the run deadline too
+            timeout = concurrency.budget()
+            if timeout is None:
+                concurrency.release()
+                work.release(task)
+                break
+            
+            started = time.time()
+            success = False
+            try:
+                urls, success, has_next, answered = run_hedged(
+                    engine['name'], _search_copy(task, engine, None, None, cache_key, timeout),
+                    lambda: _hedge_copy(work, task, engine, None, None, cache_key, started + timeout))
+            finally:
+                concurrency.release(success, time.time() - started)
+            record_search_results(work, task, success, urls, "🌐", answered, has_next, answered)
+        
+        except:
+            time.sleep(1.0)
+            continue
+    
+    return searches
+
+def run_thread_workers(num_workers, duration_minutes, max_searches, work, pool=None, adaptive=True, hedge=False):
+    """Run the search loop for all workers on a thread pool until the deadline"""
+    global hedge_executor
+    deadline = time.time() + duration_minutes * 60
+    concurrency.configure(num_workers, deadline, adaptive, HEDGE_BUDGET if hedge else 0.0)
+    hedger.configure(hedge)
+    if hedge:
+        # Hedged searches run here, both copies, while their worker waits
+        hedge_executor = ThreadPoolExecutor(max_workers=num_workers * 2, thread_name_prefix='hedge')
+    discovery.start()
+    try:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            if pool:
+                futures = [executor.submit(proxy_scraper_worker, pool, work, max_searches) 
+                          for _ in range(num_workers)]
+            else:
+                futures = [executor.submit(proxyless_scraper_worker, work, max_searches) 
+                          for _ in range(num_workers)]
             
-            # Wait for duration or until stopped
-            start_time = time.time()
-            while time.time() - start_time < duration_minutes * 60:
-                if stop_flag.is_set():
+            # Wait for the deadline, a stop, or every worker running out of work
+            while time.time() < deadline and not stop_flag.is_set():
+                if all(future.done() for future in futures):
                     break
-                time.sleep(1)
+                stop_flag.wait(min(1.0, max(0.0, deadline - time.time())))
             
             # Signal stop to workers
             stop_flag.set()
             
             # Wait for completion
-            for future in as_completed(futures):
-                pass
+            return sum(future.result() for future in as_completed(futures))
+    finally:
+        if hedge_executor is not None:
+            # Cancelled losers finish on their own, by their deadline
+            hedge_executor.shutdown(wait=False)
+            hedge_executor = None
+        # Let the aggregator catch up with everything the workers submitted
+        discovery.stop()
+
+# ============================================================================
+# ASYNC ENGINE
+# ============================================================================
+
+def async_engine_available():
+    """Whether the optional aiohttp dependency is installed"""
+    return aiohttp is not None
+
+async def search_async(session, query, engine, proxy=None, page=0, cache_key=None, timeout=SEARCH_TIMEOUT):
+    """Search on the event loop, optionally through an HTTP proxy"""
+    started = time.time()
+    connect, read = search_timeouts(timeout)
+    if proxy is None:
+        engine_breaker.begin(engine['name'])
+    try:
+        params, headers = build_search_params(query, engine, proxied=proxy is not None, page=page)
+        
+        async with session.get(
+            engine['url'],
+            params=params,
+            headers=headers,
+            proxy=proxy,
+            allow_redirects=True,
+            # aiohttp rounds timeouts longer than ceil_threshold up to whole seconds
+            timeout=aiohttp.ClientTimeout(total=timeout, sock_connect=connect, sock_read=read, ceil_threshold=math.inf)
+        ) as response:
+            rate_scheduler.report(proxy or engine['name'], response.status, response.headers.get('Retry-After'))
+            
+            scanner = engine_adapter(engine).parser(engine, params, _keep_bodies())
+            if 200 <= response.status < 400 or response_archive:
+                async for chunk in response.content.iter_chunked(SCAN_CHUNK_SIZE):
+                    if not scanner.feed(chunk):
+                        break
+            return _finish_search(engine, proxy, query, page, params, cache_key, response.status, started, scanner)
+    
+    except asyncio.CancelledError as e:
+        metrics.record_search(engine['name'], proxy, _status_label(e), time.time() - started)
+        if proxy is None:
+            engine_breaker.record(engine['name'], None)
+        raise
+    except Exception as e:
+        metrics.record_search(engine['name'], proxy, _status_label(e), time.time() - started)
+        if proxy is None:
+            engine_breaker.record(engine['name'], False)
+        return [], False, None
+
+def _search_copy_async(session, task, engine, proxy, pool, cache_key, timeout, slot=False):
+    """Coroutine-function version of _search_copy() for run_hedged_async()"""
+    async def search():
+        started = time.time()
+        try:
+            urls, success, has_next = await search_async(session, task.dork, engine, proxy, task.page, cache_key,
+                                                          timeout)
+        except asyncio.CancelledError:
+            if slot:
+                concurrency.release()
+            raise
+        if slot:
+            concurrency.release(success, time.time() - started)
+        if proxy is not None:
+            pool.report(proxy, success, time.time() - started)
+        return urls, success, has_next, engine['name']
+    return search
+
+def _hedge_copy_async(session, work, task, engine, proxy, pool, cache_key, deadline):
+    """Coroutine-function version of _hedge_copy()"""
+    target = hedge_target(work, task, engine, proxy, pool, deadline)
+    if target is None:
+        return None
+    other, other_proxy = target
+    return _search_copy_async(session, task, other, other_proxy, pool, cache_key if other is engine else None,
+                              deadline - time.time(), slot=True)
+
+async def async_scraper_worker(session, work, max_searches, pool=None):
+    """Coroutine equivalent of proxy_scraper_worker/proxyless_scraper_worker"""
+    proxied = pool is not None
+    searches = 0
+    
+    for i in range(max_searches):
+        if stop_flag.is_set():
+            break
+        
+        try:
+            proxy = pool.choose() if proxied else None
+            if proxied and proxy is None:
+                break
+            task = await work.get_async()
+            if task is None:
+                break
+            engine = work.engines[task.engine]
+            
+            cache_key, cached = serve_cached_search(work, task, engine, proxied, "💾")
+            searches += 1
+            if cached:
+                await asyncio.sleep(0)
+                continue
+            
+            timeout = await concurrency.acquire_async()
+            if timeout is None:
+                work.release(task)
+                break
+            if not await rate_scheduler.acquire_async(engine['name'], proxy):
+                concurrency.release()
+                work.release(task)
+                break
+            # The token's wait counts against the run deadline too
+            timeout = concurrency.budget()
+            if timeout is None:
+                concurrency.release()
+                work.release(task)
+                break
+            
+            started = time.time()
+            success = False
+            try:
+                urls, success, has_next, answered = await run_hedged_async(
+                    engine['name'], _search_copy_async(session, task, engine, proxy, pool, cache_key, timeout),
+                    lambda: _hedge_copy_async(session, work, task, engine, proxy, pool, cache_key, started + timeout))
+            finally:
+                concurrency.release(success, time.time() - started)
+            if proxied:
+                record_search_results(work, task, success, urls, "✅", has_next=has_next, answered=answered)
+            else:
+                record_search_results(work, task, success, urls, "🌐", answered, has_next, answered)
+        
+        except asyncio.CancelledError:
+            break
+        except Exception:
+            await asyncio.sleep(0.5 if proxied else 1.0)
+    
+    return searches
+
+async def _run_async_workers(num_workers, duration_minutes, max_searches, work, pool=None, adaptive=True, hedge=False):
+    """Run num_workers search loops on the current event loop until the deadline"""
+    deadline = time.time() + duration_minutes * 60
+    concurrency.configure(num_workers, deadline, adaptive, HEDGE_BUDGET if hedge else 0.0)
+    hedger.configure(hedge)
+    connector = aiohttp.TCPConnector(limit=num_workers, ssl=False, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=SEARCH_TIMEOUT)
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = [asyncio.create_task(async_scraper_worker(session, work, max_searches, pool))
+                 for _ in range(num_workers)]
+        
+        while time.time() < deadline and not stop_flag.is_set():
+            if all(task.done() for task in tasks):
+                break
+            await asyncio.sleep(min(0.5, max(0.0, deadline - time.time())))
+        
+        stop_flag.set()
+        # Searches in flight were started with timeouts that end by the deadline
+        await asyncio.wait(tasks, timeout=DEADLINE_MARGIN)
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    return sum(r for r in results if isinstance(r, int))
+
+def run_async_workers(num_workers, duration_minutes, max_searches, work, pool=None, adaptive=True, hedge=False):
+    """Run the search loop for all workers on a single event loop"""
+    discovery.start()
+    try:
+        return asyncio.run(_run_async_workers(num_workers, duration_minutes, max_searches, work, pool, adaptive, hedge))
+    finally:
+        discovery.stop()
+
+# ============================================================================
+# MAIN SCRAPING FUNCTIONS
+# ============================================================================
+
+def run_proxy_scraping(proxies, num_workers=50, duration_minutes=60, warm_up=False, engine='thread',
+                       engine_rates=None, proxy_rate=DEFAULT_PROXY_RATE, selector_file=SELECTOR_FILE, adaptive=True,
+                       hedge=False):
+    """Run proxy-based scraping"""
+    if engine == 'async' and any(p.startswith('socks') for p in proxies):
+        print("⚠️  SOCKS proxies are not supported by the async engine, using threads")
+        engine = 'thread'
+    if engine == 'async' and not async_engine_available():
+        print("❌ The async engine requires aiohttp (pip install aiohttp)")
+        return []
+    
+    print(f"\n🚀 Starting PROXY scraping")
+    print(f"👥 Workers: {num_workers} ({engine})")
+    print(f"⏱️  Duration: {duration_minutes} minutes")
+    print(f"🌐 Proxies: {len(proxies):,}")
+    print(f"🔍 Search Engines: {len(SEARCH_ENGINES)}")
+    print(f"🔑 Dorks: {len(DORKS):,}")
+    print(f"\nPress Ctrl+C to stop early and save results\n")
+    
+    session_pool.configure(SEARCH_ENGINES, num_workers)
+    rate_scheduler.configure(SEARCH_ENGINES, proxy_rate, engine_rates)
+    engine_breaker.configure(SEARCH_ENGINES)
+    if warm_up:
+        session_pool.warm_up(SEARCH_ENGINES, proxies=proxies)
+    
+    if selector_file:
+        load_selector_stats(selector_file)
+    set_engine_priors(SEARCH_ENGINES)
+    
+    global proxy_pool, work_scheduler
+    search_counter.reset()
+    proxy_pool = ProxyPool(proxies)
+    work_scheduler = WorkScheduler(DORKS, SEARCH_ENGINES)
+    stats['start_time'] = time.time()
+    stats['working_proxies'] = len(proxies)
+    stats['proxy_pool'] = proxy_pool.snapshot()
+    stats['coverage'] = work_scheduler.snapshot()
+    stop_flag.clear()
+    
+    def status_monitor():
+        """Monitor and display status"""
+        last_display = 0
+        while not stop_flag.is_set():
+            current = time.time()
+            if current - last_display >= 5:  # Update every 5 seconds
+                stats['proxy_pool'] = proxy_pool.snapshot()
+                stats['coverage'] = work_scheduler.snapshot()
+                stats['concurrency'] = concurrency.snapshot()
+                print_stats()
+                if results_store:
+                    results_store.flush()
+                last_display = current
+            time.sleep(1)
+    
+    # Start status monitor in background
+    monitor_thread = threading.Thread(target=status_monitor, daemon=True)
+    monitor_thread.start()
+    
+    try:
+        run_workers = run_async_workers if engine == 'async' else run_thread_workers
+        # Workers search until the deadline; the concurrency controller decides how many at once
+        run_workers(num_workers, duration_minutes, sys.maxsize, work_scheduler, proxy_pool, adaptive, hedge)
     
     except KeyboardInterrupt:
         print("\n🛑 Stopping...")
@@ -763,33 +4901,59 @@ def run_proxy_scraping(proxies, num_workers=50, duration_minutes=60):
         print("\n" + "="*80)
         print("🎉 SCRAPING COMPLETE")
         print("="*80)
+        stats['proxy_pool'] = proxy_pool.snapshot()
+        stats['coverage'] = work_scheduler.snapshot()
+        stats['concurrency'] = concurrency.snapshot()
         print_stats()
+        if selector_file:
+            save_selector_stats(selector_file)
+        if results_store:
+            results_store.flush()
         
         return list(found_sites)
 
-def run_proxyless_scraping(num_workers=20, duration_minutes=60):
+def run_proxyless_scraping(num_workers=20, duration_minutes=60, warm_up=False, engine='thread',
+                           engine_rates=None, selector_file=SELECTOR_FILE, adaptive=True, hedge=False):
     """Run proxyless scraping"""
+    if engine == 'async' and not async_engine_available():
+        print("❌ The async engine requires aiohttp (pip install aiohttp)")
+        return []
+    
     print(f"\n🚀 Starting PROXYLESS scraping")
-    print(f"👥 Workers: {num_workers}")
+    print(f"👥 Workers: {num_workers} ({engine})")
     print(f"⏱️  Duration: {duration_minutes} minutes")
     print(f"🌐 Search Engines: {len(PROXYLESS_ENGINES)}")
     print(f"🔑 Dorks: {len(DORKS):,}")
     print(f"\nPress Ctrl+C to stop early and save results\n")
     
+    session_pool.configure(PROXYLESS_ENGINES, num_workers)
+    rate_scheduler.configure(PROXYLESS_ENGINES, overrides=engine_rates)
+    engine_breaker.configure(PROXYLESS_ENGINES)
+    if warm_up:
+        session_pool.warm_up(PROXYLESS_ENGINES)
+    
+    if selector_file:
+        load_selector_stats(selector_file)
+    set_engine_priors(PROXYLESS_ENGINES)
+    
+    global work_scheduler
+    search_counter.reset()
+    work_scheduler = WorkScheduler(DORKS, PROXYLESS_ENGINES)
     stats['start_time'] = time.time()
+    stats['coverage'] = work_scheduler.snapshot()
     stop_flag.clear()
     
-    # Fewer searches per worker for proxyless (to avoid rate limiting)
-    searches_per_minute = 10
-    max_searches = searches_per_minute * duration_minutes
-    
     def status_monitor():
         """Monitor and display status"""
         last_display = 0
         while not stop_flag.is_set():
             current = time.time()
             if current - last_display >= 5:
+                stats['coverage'] = work_scheduler.snapshot()
+                stats['concurrency'] = concurrency.snapshot()
                 print_stats()
+                if results_store:
+                    results_store.flush()
                 last_display = current
             time.sleep(1)
     
@@ -798,31 +4962,886 @@ def run_proxyless_scraping(num_workers=20, duration_minutes=60):
     monitor_thread.start()
     
     try:
-        # Start workers
-        with ThreadPoolExecutor(max_workers=num_workers) as executor:
-            futures = [executor.submit(proxyless_scraper_worker, DORKS, max_searches) 
-                      for _ in range(num_workers)]
+        run_workers = run_async_workers if engine == 'async' else run_thread_workers
+        run_workers(num_workers, duration_minutes, sys.maxsize, work_scheduler, None, adaptive, hedge)
+    
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping...")
+        stop_flag.set()
+    
+    finally:
+        print("\n" + "="*80)
+        print("🎉 PROXYLESS SCRAPING COMPLETE")
+        print("="*80)
+        stats['coverage'] = work_scheduler.snapshot()
+        stats['concurrency'] = concurrency.snapshot()
+        print_stats()
+        if selector_file:
+            save_selector_stats(selector_file)
+        if results_store:
+            results_store.flush()
+        
+        return list(found_sites)
+
+class ReplayWork:
+    """WorkScheduler stand-in that only tallies what each engine's responses yielded"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.engines = {}  # name -> [responses, failed, urls, new sites]
+
+    def done(self, task, success, urls, new_sites, has_next=None, answered=None):
+        with self.lock:
+            row = self.engines.setdefault(task.engine, [0, 0, 0, 0])
+            row[0] += 1
+            row[1] += not success
+            row[2] += len(urls)
+            row[3] += new_sites
+
+def run_replay(path):
+    """Feed a --record archive through extraction and the discovery pipeline, without network"""
+    print(f"\n🚀 Replaying engine responses from {path}")
+    print(f"\nPress Ctrl+C to stop early and save results\n")
+    
+    search_counter.reset()
+    work = ReplayWork()
+    engines = {engine['name']: engine for engine in SEARCH_ENGINES + PROXYLESS_ENGINES}
+    stats['start_time'] = time.time()
+    stop_flag.clear()
+    records = 0
+    raw_bytes = 0
+    extract_time = 0.0
+    started = time.perf_counter()
+    
+    discovery.start()
+    try:
+        for meta, body in iter_archive(path):
+            if stop_flag.is_set():
+                break
+            records += 1
+            raw_bytes += len(body)
+            task = SearchTask(meta['query'], meta['engine'], meta['page'], 0)
+            success = 200 <= meta['status'] < 400
+            urls = []
+            has_next = None
+            if success:
+                # Parse the body the way a live search streams it
+                engine = engines.get(meta['engine'], {})
+                scanner = engine_adapter(engine).parser(engine, meta.get('params', {}))
+                for offset in range(0, len(body), SCAN_CHUNK_SIZE):
+                    if not scanner.feed(body[offset:offset + SCAN_CHUNK_SIZE]):
+                        break
+                urls = scanner.finish()
+                has_next = scanner.has_next
+                extract_time += scanner.scan_time
+            record_search_results(work, task, success, urls, "🔁", meta['engine'], has_next)
+    
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping...")
+        stop_flag.set()
+    
+    except (OSError, ValueError, zlib.error) as e:
+        print(f"❌ Can't read {path}: {e}")
+    
+    finally:
+        discovery.stop()
+        elapsed = max(1e-9, time.perf_counter() - started)
+        
+        print("\n" + "="*80)
+        print("🎉 REPLAY COMPLETE")
+        print("="*80)
+        print(f"📼 Responses: {records:,} ({raw_bytes / (1024 * 1024):.1f} MB uncompressed)")
+        print(f"⚡ Throughput: {records / elapsed:,.0f} responses/s | {raw_bytes / elapsed / (1024 * 1024):.1f} MB/s | "
+              f"extraction {extract_time / elapsed * 100:.0f}% of {elapsed:.2f}s")
+        print(f"🎯 Sites Found: {len(found_sites):,}")
+        for name, (responses, failed, urls, new_sites) in sorted(work.engines.items()):
+            print(f"   {name}: {responses:,} responses | {failed:,} failed | {urls:,} URLs | "
+                  f"{new_sites:,} new | {urls / max(1, responses - failed):.2f} URLs/page")
+        if results_store:
+            results_store.flush()
+        
+        return list(found_sites)
+
+# ============================================================================
+# MULTI-PROCESS SHARDING
+# ============================================================================
+
+SHARD_REPORT_INTERVAL = 0.5  # Seconds between a shard's reports to the parent
+SHARD_QUEUE_SIZE = 1000      # Reports in flight before shards wait for the parent
+
+class ShardForwarder:
+    """Takes the DiscoveryPipeline's place inside a --processes shard
+
+    Dedups submitted results against the shard's own found_sites and sends
+    the new sites to the parent, together with the shard's counters, every
+    SHARD_REPORT_INTERVAL. The parent's pipeline has the final word on
+    duplicates between shards.
+    """
+
+    def __init__(self, index, results, work, pool, baselines):
+        self.index = index
+        self.results = results
+        self.work = work
+        self.pool = pool
+        self.baselines = baselines
+        self.lock = threading.Lock()
+        self.pending = []
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self._run, name='shard-forwarder', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopping.set()
+            self.thread.join()
+            self.thread = None
+        self._report()
+
+    def submit(self, item):
+        with self.lock:
+            self.pending.append(item)
+
+    def _run(self):
+        while not self.stopping.wait(SHARD_REPORT_INTERVAL):
+            self._report()
+
+    def counters(self):
+        """Everything the parent needs for its stats output"""
+        engine_base, dork_base = self.baselines
+        return {
+            'searches': search_counter.total(),
+            'throttled': stats.get('throttled', 0),
+            'coverage': self.work.snapshot(),
+            'proxy_pool': self.pool.snapshot() if self.pool else None,
+            'response_cache': response_cache.snapshot() if response_cache else None,
+            'concurrency': concurrency.snapshot(),
+            'breaker': engine_breaker.snapshot(),
+            'hedging': hedger.snapshot(),
+            'metrics': metrics.dump(),
+            'engines': _bandit_delta(engine_bandit, engine_base),
+            'dorks': _bandit_delta(dork_bandit, dork_base),
+        }
+
+    def _report(self):
+        with self.lock:
+            batch, self.pending = self.pending, []
+        sites = []
+        with sites_lock:
+            for task, urls, icon, engine_name in batch:
+                new_urls = [url for url in urls if url not in found_sites]
+                found_sites.update(new_urls)
+                if new_urls:
+                    sites.append((task.dork, task.engine, new_urls, icon, engine_name))
+        self.results.put(('report', self.index, sites, self.counters()))
+
+def _bandit_delta(bandit, base):
+    """Requests and new sites an arm gained since base was taken"""
+    delta = {}
+    for key, (sent, found) in bandit.dump().items():
+        base_sent, base_found = base.get(key, (0, 0))
+        if sent > base_sent:
+            delta[key] = [sent - base_sent, found - base_found]
+    return delta
+
+def _shard_main(index, config, results, stop_event):
+    """Entry point of one --processes shard (runs in a spawned process)"""
+    global discovery, work_scheduler, proxy_pool
+    # The parent turns Ctrl+C into stop_event and does all the printing
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sys.stdout = open(os.devnull, 'w')
+    
+    engines = config['engines']
+    proxies = config['proxies']
+    session_pool.configure(engines, config['workers'])
+    rate_scheduler.configure(engines, config['proxy_rate'], config['engine_rates'])
+    engine_breaker.configure(engines)
+    if config['warm_up']:
+        session_pool.warm_up(engines, proxies=proxies or None)
+    if config['selector_file']:
+        load_selector_stats(config['selector_file'])
+    set_engine_priors(engines)
+    if config['response_cache']:
+        open_response_cache(**config['response_cache'])
+    if config['archive']:
+        open_response_archive(config['archive'])
+    if config['known']:
+        found_sites.known = load_known_sites(config['known'])
+    
+    search_counter.reset()
+    proxy_pool = ProxyPool(proxies) if proxies else None
+    work_scheduler = WorkScheduler(config['dorks'], engines)
+    discovery = ShardForwarder(index, results, work_scheduler, proxy_pool,
+                               (engine_bandit.dump(), dork_bandit.dump()))
+    stats['start_time'] = time.time()
+    stop_flag.clear()
+    
+    def watch_stop():
+        # Poll rather than wait(): a shard that exits while blocked in wait()
+        # leaves the event's condition expecting it, and the parent's set() hangs
+        while not stop_flag.wait(0.2):
+            if stop_event.is_set():
+                stop_flag.set()
+    threading.Thread(target=watch_stop, daemon=True).start()
+    
+    try:
+        run_workers = run_async_workers if config['engine'] == 'async' else run_thread_workers
+        # Spawning takes a while; all shards stop at the parent's deadline
+        duration = max(0.0, config['deadline'] - time.time()) / 60
+        run_workers(config['workers'], duration, config['max_searches'], work_scheduler, proxy_pool, config['adaptive'],
+                    config['hedge'])
+    finally:
+        close_response_cache()
+        close_response_archive()
+        results.put(('done', index, [], discovery.counters()))
+
+def _merge_shard_counters(counters, bandit_bases):
+    """Combine the latest counters of every shard into the parent's stats and bandits"""
+    reports = [c for c in counters.values() if c]
+    for bandit, base, key in zip((engine_bandit, dork_bandit), bandit_bases, ('engines', 'dorks')):
+        bandit.load(base, decay=1.0)
+        for c in reports:
+            bandit.merge(c[key])
+    stats['throttled'] = sum(c['throttled'] for c in reports)
+    
+    coverages = [c['coverage'] for c in reports]
+    if coverages:
+        stats['coverage'] = {
+            key: (max if key == 'deepest_page' else sum)(c[key] for c in coverages)
+            for key in coverages[0]
+        }
+    
+    pools = [c['proxy_pool'] for c in reports if c['proxy_pool']]
+    if pools:
+        sent = sum(p['requests'] for p in pools)
+        medians = [(p['p50_latency'], p['requests']) for p in pools if p['p50_latency'] is not None]
+        tails = [p['p95_latency'] for p in pools if p['p95_latency'] is not None]
+        stats['proxy_pool'] = {
+            'healthy': sum(p['healthy'] for p in pools),
+            'quarantined': sum(p['quarantined'] for p in pools),
+            'requests': sent,
+            'success_rate': sum(p['success_rate'] * p['requests'] for p in pools) / sent if sent else 0.0,
+            # Shards keep their own latency windows: request-weighted p50, worst p95
+            'p50_latency': sum(l * n for l, n in medians) / max(1, sum(n for _, n in medians)) if medians else None,
+            'p95_latency': max(tails) if tails else None,
+        }
+    
+    caches = [c['response_cache'] for c in reports if c['response_cache']]
+    if caches:
+        hits = sum(c['hits'] for c in caches)
+        misses = sum(c['misses'] for c in caches)
+        stats['response_cache'] = {
+            'hits': hits, 'misses': misses, 'evictions': sum(c['evictions'] for c in caches),
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'size_mb': max(c['size_mb'] for c in caches),  # Shards share one cache file
+        }
+    
+    limits = [c['concurrency'] for c in reports]
+    if limits:
+        throughput = sum(l['throughput'] for l in limits)
+        latencies = [l['p50_latency'] for l in limits if l['p50_latency'] is not None]
+        bests = [l['best_latency'] for l in limits if l['best_latency'] is not None]
+        lefts = [l['time_left'] for l in limits if l['time_left'] is not None]
+        merged = {key: sum(l[key] for l in limits)
+                  for key in ('limit', 'ceiling', 'in_flight', 'increases', 'decreases', 'skipped')}
+        merged.update({
+            'throughput': round(throughput, 2),
+            'error_rate': sum(l['error_rate'] * l['throughput'] for l in limits) / throughput if throughput else 0.0,
+            'p50_latency': max(latencies) if latencies else None,
+            'best_latency': min(bests) if bests else None,
+            'decision': '/'.join(sorted({l['decision'] for l in limits})),
+            'time_left': max(lefts) if lefts else None,
+        })
+        stats['concurrency'] = merged
+    
+    # Every shard has its own breaker: an engine counts as open where any shard has it open
+    circuits = {}
+    for c in reports:
+        for name, circuit in c['breaker'].items():
+            merged = circuits.setdefault(name, {'state': 'closed', 'trips': 0, 'retry_in': None})
+            merged['trips'] += circuit['trips']
+            if circuit['state'] != 'closed' and merged['state'] != 'open':
+                merged['state'] = circuit['state']
+            if circuit['retry_in'] is not None:
+                merged['retry_in'] = max(merged['retry_in'] or 0.0, circuit['retry_in'])
+    stats['breaker'] = circuits
+    
+    hedges = [c['hedging'] for c in reports if c['hedging']['enabled']]
+    if hedges:
+        merged = {key: sum(h[key] for h in hedges)
+                  for key in ('searches', 'hedged', 'hedge_wins', 'primary_wins', 'both_failed', 'cancelled', 'refused')}
+        merged.update({
+            'enabled': True,
+            'hedge_rate': merged['hedged'] / merged['searches'] if merged['searches'] else 0.0,
+            # Shards learn their own delays: show the longest
+            'delays': {name: max(h['delays'][name] for h in hedges if name in h['delays'])
+                       for name in {name for h in hedges for name in h['delays']}},
+        })
+        stats['hedging'] = merged
+
+def run_sharded_scraping(processes, proxies=None, num_workers=20, duration_minutes=60, warm_up=False,
+                         engine='thread', engine_rates=None, proxy_rate=DEFAULT_PROXY_RATE,
+                         selector_file=SELECTOR_FILE, response_cache_config=None, known=None, max_searches=None,
+                         adaptive=True, archive=None, hedge=False):
+    """Run proxyless (proxies=None) or proxy scraping across several processes
+
+    Each shard process gets every processes-th dork, an equal share of the
+    engines' request rates and, in proxy mode, a disjoint slice of the
+    proxies. Shards stream new sites to this process, which owns dedup,
+    stats, the results store and the output files.
+    """
+    proxied = proxies is not None
+    engines = SEARCH_ENGINES if proxied else PROXYLESS_ENGINES
+    if proxied and engine == 'async' and any(p.startswith('socks') for p in proxies):
+        print("⚠️  SOCKS proxies are not supported by the async engine, using threads")
+        engine = 'thread'
+    if engine == 'async' and not async_engine_available():
+        print("❌ The async engine requires aiohttp (pip install aiohttp)")
+        return []
+    processes = max(1, min(processes, len(DORKS), len(proxies) if proxied else processes))
+    workers = max(1, -(-num_workers // processes))
+    
+    print(f"\n🚀 Starting {'PROXY' if proxied else 'PROXYLESS'} scraping in {processes} processes")
+    print(f"👥 Workers: {workers * processes} ({workers} {engine} workers per process)")
+    print(f"⏱️  Duration: {duration_minutes} minutes")
+    if proxied:
+        print(f"🌐 Proxies: {len(proxies):,}")
+    print(f"🔍 Search Engines: {len(engines)}")
+    print(f"🔑 Dorks: {len(DORKS):,}")
+    print(f"\nPress Ctrl+C to stop early and save results\n")
+    
+    # Every shard paces its engines at 1/processes of the rate, so the total stays the same
+    base_rates = {e['name']: (engine_rates or {}).get(e['name'], e.get('rate', DEFAULT_ENGINE_RATE)) for e in engines}
+    shard_rates = {name: rate / processes for name, rate in base_rates.items()}
+    
+    if selector_file:
+        load_selector_stats(selector_file)
+    set_engine_priors(engines)
+    bandit_bases = (engine_bandit.dump(), dork_bandit.dump())
+    
+    global shard_processes
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue(SHARD_QUEUE_SIZE)
+    stop_event = context.Event()
+    shard_processes = []
+    deadline = time.time() + duration_minutes * 60
+    for index in range(processes):
+        config = {
+            'engines': engines, 'dorks': DORKS[index::processes],
+            'proxies': proxies[index::processes] if proxied else None,
+            'workers': workers, 'deadline': deadline, 'adaptive': adaptive, 'hedge': hedge, 'engine': engine,
+            'warm_up': warm_up,
+            'max_searches': max_searches or sys.maxsize,
+            'engine_rates': shard_rates, 'proxy_rate': proxy_rate, 'selector_file': selector_file,
+            'response_cache': response_cache_config, 'known': known, 'archive': archive,
+        }
+        process = context.Process(target=_shard_main, args=(index, config, results, stop_event),
+                                  name=f'shard-{index}', daemon=True)
+        process.start()
+        shard_processes.append(process)
+    
+    search_counter.reset()
+    stats['start_time'] = time.time()
+    if proxied:
+        stats['working_proxies'] = len(proxies)
+    stop_flag.clear()
+    counters = dict.fromkeys(range(processes))
+    finished = set()
+    searches_seen = 0
+    last_display = time.time()
+    discovery.start()
+    
+    try:
+        while len(finished) < processes:
+            if stop_flag.is_set() or time.time() >= deadline:
+                stop_event.set()
+            try:
+                kind, index, sites, report = results.get(timeout=0.5)
+            except queue.Empty:
+                # A shard that died without saying goodbye is finished too
+                finished.update(i for i, p in enumerate(shard_processes) if not p.is_alive() and results.empty())
+                continue
             
-            # Wait for duration
-            start_time = time.time()
-            while time.time() - start_time < duration_minutes * 60:
-                if stop_flag.is_set():
-                    break
-                time.sleep(1)
+            for dork, engine_name, urls, icon, source in sites:
+                discovery.submit((SearchTask(dork, engine_name, 0, 0), urls, icon, source))
+            counters[index] = report
+            metrics.load_shard(index, report['metrics'])
+            if kind == 'done':
+                finished.add(index)
             
-            stop_flag.set()
+            searches = sum(c['searches'] for c in counters.values() if c)
+            search_counter.add(searches - searches_seen)
+            searches_seen = searches
             
-            for future in as_completed(futures):
-                pass
+            if time.time() - last_display >= 5:
+                _merge_shard_counters(counters, bandit_bases)
+                print_stats()
+                if results_store:
+                    results_store.flush()
+                last_display = time.time()
+    
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping...")
+        stop_event.set()
+    
+    finally:
+        stop_flag.set()
+        stop_event.set()
+        for process in shard_processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+        discovery.stop()
+        
+        print("\n" + "="*80)
+        print("🎉 SCRAPING COMPLETE")
+        print("="*80)
+        _merge_shard_counters(counters, bandit_bases)
+        print_stats()
+        if selector_file:
+            save_selector_stats(selector_file)
+        if results_store:
+            results_store.flush()
+        shard_processes = []
+        
+        return list(found_sites)
+
+# ============================================================================
+# DISTRIBUTED MODE
+# ============================================================================
+
+COORDINATOR_ADDRESS = '127.0.0.1:8765'  # Default listen address (use 0.0.0.0:PORT for other machines)
+LEASE_SECONDS = 120      # A leased task is handed to someone else if not reported by then
+LEASE_MAX = 500          # Most tasks handed out in one lease
+LEASE_POLL = 1.0         # Seconds a worker waits before asking again when nothing is leasable
+REMOTE_REPORT_INTERVAL = 1.0  # Seconds between a worker's result reports
+COORDINATOR_DRAIN = 15   # Seconds the coordinator waits for outstanding leases at the end
+COORDINATOR_TIMEOUT = 30 # Socket timeout for coordinator requests
+
+def parse_address(address, default_port=8765):
+    """'host:port' (or just 'host') as a (host, port) tuple"""
+    host, _, port = address.rpartition(':')
+    if not host:
+        return address or '127.0.0.1', default_port
+    return host.strip('[]'), int(port)
+
+class Coordinator:
+    """Leases search tasks to remote workers and takes back what they found
+
+    Workers talk newline-delimited JSON, one response per request:
+
+      {"op": "hello", "worker": name, "engines": "proxy" | "proxyless"}
+      {"op": "lease", "worker": name, "max": n}
+          -> {"tasks": [[lease_id, dork, engine, page, attempts], ...]}
+      {"op": "report", "worker": name, "results": [[lease_id, task, success, urls, has_next, answered], ...],
+       "returned": [lease_id, ...]}
+
+    answered is the engine that answered the task if a hedge sent it
+    elsewhere; it may be null or left out. Every response carries "stop"
+    once the run is over. Leases that are not reported within lease_seconds
+    go back in the queue, so a dead worker's tasks are searched by someone
+    else.
+    """
+
+    def __init__(self, work, engines, deadline, lease_seconds=LEASE_SECONDS):
+        self.work = work
+        self.engines = engines
+        self.deadline = deadline
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.leases = {}   # lease_id -> (task, deadline, worker)
+        self.workers = {}  # name -> last seen
+        self.expired = 0
+        self.closed = threading.Event()
+        self.reaper = threading.Thread(target=self._reap, name='lease-reaper', daemon=True)
+        self.reaper.start()
+
+    def handle(self, message):
+        op = message.get('op')
+        worker = str(message.get('worker', '?'))
+        with self.lock:
+            self.workers[worker] = time.time()
+        if op == 'hello':
+            response = {'engines': self.engines, 'remaining': max(0.0, self.deadline - time.time())}
+        elif op == 'lease':
+            response = {'tasks': self._lease(worker, int(message.get('max', 1)))}
+        elif op == 'report':
+            response = {'accepted': self._report(worker, message.get('results', []), message.get('returned', []))}
+        else:
+            response = {'error': f"unknown op {op!r}"}
+        response['stop'] = stop_flag.is_set()
+        return response
+
+    def _lease(self, worker, count):
+        tasks = []
+        if stop_flag.is_set():
+            return tasks
+        deadline = time.time() + self.lease_seconds
+        for _ in range(max(0, min(count, LEASE_MAX))):
+            task = self.work.get_nowait()
+            if task is None:
+                break
+            with self.lock:
+                lease_id = next(self.ids)
+                self.leases[lease_id] = (task, deadline, worker)
+            tasks.append([lease_id, *task])
+        return tasks
+
+    def _report(self, worker, results, returned):
+        # Unpack the whole batch first, so a malformed entry rejects it before any of it counts
+        entries = [(lease_id, SearchTask(*fields), success, urls, has_next, answered[0] if answered else None)
+                   for lease_id, fields, success, urls, has_next, *answered in results]
+        accepted = 0
+        for lease_id, task, success, urls, has_next, answered in entries:
+            with self.lock:
+                lease = self.leases.pop(lease_id, None)
+            search_counter.add()
+            new_urls = [url for url in urls if url not in found_sites]
+            if new_urls:
+                discovery.submit((task._replace(engine=answered or task.engine), new_urls, "🛰️", worker))
+            # An expired lease was already re-queued; its sites still count
+            if lease is not None:
+                self.work.done(lease[0], success, urls, len(new_urls), has_next, answered)
+                accepted += 1
+        for lease_id in returned:
+            with self.lock:
+                lease = self.leases.pop(lease_id, None)
+            if lease is not None:
+                self.work.release(lease[0])
+        return accepted
+
+    def _reap(self):
+        while not self.closed.wait(1.0):
+            now = time.time()
+            with self.lock:
+                expired = [lease_id for lease_id, (_, deadline, _) in self.leases.items() if deadline < now]
+                tasks = [self.leases.pop(lease_id)[0] for lease_id in expired]
+                self.expired += len(tasks)
+            for task in tasks:
+                self.work.release(task)
+
+    def outstanding(self):
+        with self.lock:
+            return len(self.leases)
+
+    def snapshot(self):
+        """Cluster summary for stats output"""
+        now = time.time()
+        with self.lock:
+            return {
+                'workers': sum(1 for seen in self.workers.values() if now - seen < self.lease_seconds),
+                'leased': len(self.leases),
+                'expired': self.expired,
+            }
+
+    def close(self):
+        self.closed.set()
+        self.reaper.join()
+
+class _CoordinatorHandler(socketserver.StreamRequestHandler):
+    """One worker connection: a JSON request per line, a JSON response per line"""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.coordinator.handle(json.loads(line))
+            except Exception as e:
+                response = {'error': str(e), 'stop': stop_flag.is_set()}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+class _CoordinatorServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+def run_coordinator(address=COORDINATOR_ADDRESS, duration_minutes=60, proxied=False,
+                    lease_seconds=LEASE_SECONDS, selector_file=SELECTOR_FILE):
+    """Own the task queue and global dedup for workers started with --connect"""
+    engines = SEARCH_ENGINES if proxied else PROXYLESS_ENGINES
+    host, port = parse_address(address)
+    try:
+        server = _CoordinatorServer((host, port), _CoordinatorHandler)
+    except OSError as e:
+        print(f"❌ Can't listen on {host}:{port}: {e}")
+        return []
+    
+    print(f"\n🚀 Starting COORDINATOR on {host}:{server.server_address[1]}")
+    print(f"⏱️  Duration: {duration_minutes} minutes")
+    print(f"🔍 Search Engines: {len(engines)} ({'proxy' if proxied else 'proxyless'} workers)")
+    print(f"🔑 Dorks: {len(DORKS):,}")
+    print(f"\nStart workers with: python scraper.py worker --connect {host}:{server.server_address[1]}"
+          f"{' --proxy-file proxies.txt' if proxied else ''}")
+    print(f"Press Ctrl+C to stop early and save results\n")
+    
+    # Nothing is searched here, so the buckets only rank engines for leasing
+    rate_scheduler.configure(engines)
+    if selector_file:
+        load_selector_stats(selector_file)
+    set_engine_priors(engines)
+    
+    global work_scheduler
+    search_counter.reset()
+    work_scheduler = WorkScheduler(DORKS, engines)
+    stats['start_time'] = time.time()
+    deadline = stats['start_time'] + duration_minutes * 60
+    coordinator = Coordinator(work_scheduler, 'proxy' if proxied else 'proxyless', deadline, lease_seconds)
+    server.coordinator = coordinator
+    stats['coverage'] = work_scheduler.snapshot()
+    stats['cluster'] = coordinator.snapshot()
+    stop_flag.clear()
+    discovery.start()
+    threading.Thread(target=server.serve_forever, args=(0.5,), name='coordinator', daemon=True).start()
+    
+    try:
+        last_display = time.time()
+        while time.time() < deadline and not stop_flag.is_set():
+            time.sleep(1)
+            if time.time() - last_display >= 5:
+                stats['coverage'] = work_scheduler.snapshot()
+                stats['cluster'] = coordinator.snapshot()
+                print_stats()
+                if results_store:
+                    results_store.flush()
+                last_display = time.time()
+    
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping...")
+    
+    finally:
+        stop_flag.set()
+        # Workers learn about the stop on their next request; take in what they already searched
+        drain_until = time.time() + COORDINATOR_DRAIN
+        while coordinator.outstanding() and time.time() < drain_until:
+            time.sleep(0.5)
+        server.shutdown()
+        server.server_close()
+        coordinator.close()
+        discovery.stop()
+        
+        print("\n" + "="*80)
+        print("🎉 COORDINATOR COMPLETE")
+        print("="*80)
+        stats['coverage'] = work_scheduler.snapshot()
+        stats['cluster'] = coordinator.snapshot()
+        print_stats()
+        if selector_file:
+            save_selector_stats(selector_file)
+        if results_store:
+            results_store.flush()
+        
+        return list(found_sites)
+
+class RemoteWork:
+    """WorkScheduler stand-in for a worker that leases tasks from a coordinator
+
+    Keeps a local buffer of leased tasks, refilled by one thread at a time,
+    and reports finished tasks in batches every REMOTE_REPORT_INTERVAL.
+    Tasks still buffered when the run stops are handed back.
+    """
+
+    def __init__(self, address, proxied, batch):
+        self.name = f"{socket.gethostname()}-{os.getpid()}"
+        self.sock = socket.create_connection(parse_address(address), timeout=COORDINATOR_TIMEOUT)
+        self.file = self.sock.makefile('rwb')
+        self.request_lock = threading.Lock()
+        self.cond = threading.Condition()
+        self.batch = batch
+        self.ready = deque()
+        self.ids = {}  # task -> lease_id
+        self.results = []
+        self.fetching = False
+        self.lost = False
+        
+        kind = 'proxy' if proxied else 'proxyless'
+        hello = self._request({'op': 'hello', 'engines': kind})
+        if hello.get('engines') != kind:
+            self.sock.close()
+            raise ValueError(f"the coordinator schedules {hello.get('engines')} engines, this worker runs {kind}")
+        self.remaining = hello.get('remaining', 0)
+        self.engines = {engine['name']: engine for engine in (SEARCH_ENGINES if proxied else PROXYLESS_ENGINES)}
+        
+        self.closed = threading.Event()
+        self.reporter = threading.Thread(target=self._report_loop, name='remote-reporter', daemon=True)
+        self.reporter.start()
+
+    def _request(self, message):
+        """Send one request and return the response; stops the run if the coordinator is gone"""
+        message['worker'] = self.name
+        try:
+            with self.request_lock:
+                self.file.write(json.dumps(message).encode('utf-8') + b'\n')
+                self.file.flush()
+                line = self.file.readline()
+            if not line:
+                raise ConnectionError("coordinator closed the connection")
+            response = json.loads(line)
+        except (OSError, ValueError) as e:
+            if not self.lost:
+                print(f"❌ Lost the coordinator: {e}")
+            self.lost = True
+            stop_flag.set()
+            return {}
+        if response.get('stop'):
+            stop_flag.set()
+        return response
+
+    def _refill(self):
+        """Lease another batch unless a thread already is; False if nothing could be leased"""
+        with self.cond:
+            if self.ready:
+                return True
+            if self.fetching:
+                self.cond.wait(LEASE_POLL)
+                return bool(self.ready)
+            self.fetching = True
+        tasks = []
+        try:
+            if not self.lost:
+                tasks = self._request({'op': 'lease', 'max': self.batch}).get('tasks', [])
+        finally:
+            with self.cond:
+                for lease_id, *fields in tasks:
+                    task = SearchTask(*fields)
+                    self.ids[task] = lease_id
+                    self.ready.append(task)
+                self.fetching = False
+                self.cond.notify_all()
+        return bool(tasks)
+
+    def _take(self):
+        with self.cond:
+            return self.ready.popleft() if self.ready else None
+
+    def get(self):
+        """Block until a leased task is available; None once the run stops"""
+        while not stop_flag.is_set():
+            task = self._take()
+            if task is not None:
+                return task
+            if not self._refill():
+                stop_flag.wait(LEASE_POLL)
+        return None
+
+    async def get_async(self):
+        """Coroutine version of get() for the async engine"""
+        loop = asyncio.get_running_loop()
+        while not stop_flag.is_set():
+            task = self._take()
+            if task is not None:
+                return task
+            if not await loop.run_in_executor(None, self._refill):
+                await asyncio.sleep(LEASE_POLL)
+        return None
+
+    def release(self, task):
+        """Put back a leased task that was never searched"""
+        with self.cond:
+            self.ready.appendleft(task)
+            self.cond.notify()
+
+    def done(self, task, success, urls, new_sites, has_next=None, answered=None):
+        """Queue a finished task for the next report"""
+        with self.cond:
+            lease_id = self.ids.pop(task, None)
+            if lease_id is not None:
+                self.results.append([lease_id, list(task), success, list(urls), has_next, answered])
+
+    def _flush(self, returned=()):
+        with self.cond:
+            results, self.results = self.results, []
+        if (results or returned) and not self.lost:
+            self._request({'op': 'report', 'results': results, 'returned': list(returned)})
+
+    def _report_loop(self):
+        while not self.closed.wait(REMOTE_REPORT_INTERVAL):
+            self._flush()
+
+    def close(self):
+        """Report what is left, hand back unstarted tasks and disconnect"""
+        self.closed.set()
+        self.reporter.join()
+        with self.cond:
+            returned = [self.ids.pop(task) for task in self.ready if task in self.ids]
+            self.ready.clear()
+        self._flush(returned)
+        self.sock.close()
+
+def run_remote_worker(address, proxies=None, num_workers=20, engine='thread', engine_rates=None,
+                      proxy_rate=DEFAULT_PROXY_RATE, warm_up=False, adaptive=True, hedge=False):
+    """Search tasks leased from a coordinator until it says stop"""
+    proxied = proxies is not None
+    engines = SEARCH_ENGINES if proxied else PROXYLESS_ENGINES
+    if proxied and engine == 'async' and any(p.startswith('socks') for p in proxies):
+        print("⚠️  SOCKS proxies are not supported by the async engine, using threads")
+        engine = 'thread'
+    if engine == 'async' and not async_engine_available():
+        print("❌ The async engine requires aiohttp (pip install aiohttp)")
+        return []
+    
+    try:
+        work = RemoteWork(address, proxied, max(num_workers * 2, 10))
+    except (OSError, ValueError) as e:
+        print(f"❌ Can't join the coordinator at {address}: {e}")
+        return []
+    
+    print(f"\n🚀 Starting WORKER for the coordinator at {address}")
+    print(f"👥 Workers: {num_workers} ({engine})")
+    if proxied:
+        print(f"🌐 Proxies: {len(proxies):,}")
+    print(f"⏱️  Coordinator stops in {work.remaining / 60:.1f} minutes")
+    print(f"\nPress Ctrl+C to stop early\n")
+    
+    session_pool.configure(engines, num_workers)
+    rate_scheduler.configure(engines, proxy_rate, engine_rates)
+    if warm_up:
+        session_pool.warm_up(engines, proxies=proxies)
+    
+    global proxy_pool, work_scheduler
+    search_counter.reset()
+    proxy_pool = ProxyPool(proxies) if proxied else None
+    work_scheduler = work
+    stats['start_time'] = time.time()
+    if proxied:
+        stats['working_proxies'] = len(proxies)
+    stop_flag.clear()
+    
+    def status_monitor():
+        """Monitor and display status"""
+        last_display = 0
+        while not stop_flag.is_set():
+            current = time.time()
+            if current - last_display >= 5:
+                if proxy_pool:
+                    stats['proxy_pool'] = proxy_pool.snapshot()
+                stats['concurrency'] = concurrency.snapshot()
+                print_stats()
+                last_display = current
+            time.sleep(1)
+    
+    monitor_thread = threading.Thread(target=status_monitor, daemon=True)
+    monitor_thread.start()
+    
+    try:
+        run_workers = run_async_workers if engine == 'async' else run_thread_workers
+        # The coordinator decides when the run ends; the extra minute covers clock skew
+        run_workers(num_workers, work.remaining / 60 + 1, sys.maxsize, work, proxy_pool, adaptive, hedge)
     
     except KeyboardInterrupt:
         print("\n🛑 Stopping...")
         stop_flag.set()
     
     finally:
+        work.close()
         print("\n" + "="*80)
-        print("🎉 PROXYLESS SCRAPING COMPLETE")
+        print("🎉 WORKER COMPLETE")
         print("="*80)
+        if proxy_pool:
+            stats['proxy_pool'] = proxy_pool.snapshot()
+        stats['concurrency'] = concurrency.snapshot()
         print_stats()
         
         return list(found_sites)
@@ -839,45 +5858,164 @@ def main():
         epilog="""
 Examples:
   %(prog)s --proxyless --duration 30 --workers 20
+  %(prog)s --proxyless --engine async --workers 2000
   %(prog)s --proxy-file proxies.txt --proxy-type http --duration 60
   %(prog)s --proxy-file proxies.txt --test-proxies --strict-test
+  %(prog)s --proxy-file proxies.txt --test-proxies --want-working 300
   %(prog)s --load-sites saved_sites.txt --display --save-format json
+  %(prog)s --proxyless --verify --enrich --store sites.db
+  %(prog)s --enrich-store sites.db --enrich-ttl 24
+  %(prog)s --proxyless --known other_run_sites.txt
+  %(prog)s --proxyless --processes 4 --workers 200
+  %(prog)s coordinator 0.0.0.0:8765 --duration 120
+  %(prog)s worker --connect coordinator-host:8765 --workers 50
         """
     )
     
     # Mode selection
-    mode_group = parser.add_mutually_exclusive_group(required=True)
+    mode_group = parser.add_mutually_exclusive_group()
     mode_group.add_argument('--proxyless', action='store_true', help='Use proxyless mode (no proxies needed)')
     mode_group.add_argument('--proxy-file', type=str, help='Path to proxy file for proxy mode')
     mode_group.add_argument('--load-sites', type=str, help='Load and display/save previously found sites')
+    mode_group.add_argument('--enrich-store', type=str, metavar='STORE',
+                           help='Only enrich the due stores in a results store (.db), then exit')
+    mode_group.add_argument('--coordinator', type=str, nargs='?', const=COORDINATOR_ADDRESS, metavar='HOST:PORT',
+                           help=f'Hand out searches to remote workers (also: coordinator [HOST:PORT]; default: {COORDINATOR_ADDRESS})')
+    mode_group.add_argument('--replay', type=str, metavar='ARCHIVE',
+                           help='Run the responses in a --record archive through extraction and dedup, without network')
+    
+    # Distributed options
+    parser.add_argument('--connect', type=str, metavar='HOST:PORT',
+                       help='Run as a worker for a coordinator (also: worker --connect HOST:PORT)')
+    parser.add_argument('--proxy-engines', action='store_true',
+                       help='Coordinator: schedule the proxy engine list (workers run with --proxy-file)')
+    parser.add_argument('--lease-seconds', type=int, default=LEASE_SECONDS,
+                       help=f'Coordinator: re-queue tasks a worker has not reported after this long (default: {LEASE_SECONDS})')
     
     # Proxy options
     parser.add_argument('--proxy-type', choices=['http', 'socks4', 'socks5'], default='http',
                        help='Type of proxies in the file (default: http)')
     parser.add_argument('--test-proxies', action='store_true', help='Test proxies before scraping')
     parser.add_argument('--strict-test', action='store_true', help='Use strict testing (search query test)')
+    parser.add_argument('--want-working', type=int, default=0,
+                       help='Stop testing once this many proxies work (default: 0 = test all)')
+    parser.add_argument('--proxy-cache', type=str, default=PROXY_CACHE_FILE,
+                       help=f'Proxy test result cache (default: {PROXY_CACHE_FILE})')
+    parser.add_argument('--proxy-cache-ttl', type=int, default=PROXY_CACHE_TTL,
+                       help=f'Minutes before a cached proxy result is re-tested (default: {PROXY_CACHE_TTL})')
+    parser.add_argument('--no-proxy-cache', action='store_true', help='Don\'t read or write the proxy test cache')
     
     # Scraping options
     parser.add_argument('--duration', type=int, default=30, help='Scraping duration in minutes (default: 30)')
-    parser.add_argument('--workers', type=int, default=20, help='Number of worker threads (default: 20)')
+    parser.add_argument('--workers', type=int, default=20,
+                       help='Most searches in flight at once; the limit adapts below it (default: 20)')
+    parser.add_argument('--fixed-workers', action='store_true',
+                       help='Keep all --workers searching instead of adapting the concurrency')
+    parser.add_argument('--hedge', action='store_true',
+                       help='Send searches slower than their engine\'s p90 a second time (another engine, '
+                            'or another proxy) and keep the first answer')
+    parser.add_argument('--engine', choices=['thread', 'async'], default='thread',
+                       help='Run workers as threads or as tasks on one event loop (default: thread)')
+    parser.add_argument('--processes', type=int, default=1,
+                       help='Split dorks, engine rates and proxies across this many processes (default: 1)')
+    parser.add_argument('--warm-up', action='store_true', help='Open connections to every engine before workers start')
+    parser.add_argument('--engine-rate', action='append', default=[], metavar='NAME=RATE',
+                       help='Override an engine\'s searches/second (repeatable, e.g. Brave=0.3)')
+    parser.add_argument('--proxy-rate', type=float, default=DEFAULT_PROXY_RATE,
+                       help=f'Max searches/second through one proxy (default: {DEFAULT_PROXY_RATE})')
+    parser.add_argument('--selector-stats', type=str, default=SELECTOR_FILE,
+                       help=f'Learned engine/dork yields, kept between runs (default: {SELECTOR_FILE})')
+    parser.add_argument('--no-selector-stats', action='store_true', help='Start the selector from scratch and don\'t save it')
+    parser.add_argument('--response-cache', type=str, nargs='?', const=RESPONSE_CACHE_FILE,
+                       help=f'Reuse search results from an on-disk cache (default file: {RESPONSE_CACHE_FILE})')
+    parser.add_argument('--response-cache-ttl', type=int, default=RESPONSE_CACHE_TTL,
+                       help=f'Minutes a cached search result stays valid (default: {RESPONSE_CACHE_TTL})')
+    parser.add_argument('--response-cache-size', type=int, default=RESPONSE_CACHE_SIZE,
+                       help=f'Response cache size cap in MB (default: {RESPONSE_CACHE_SIZE})')
+    parser.add_argument('--cache-bodies', action='store_true', help='Also keep compressed result pages in the response cache')
     
     # Output options
     parser.add_argument('--display', action='store_true', help='Display found sites in console')
     parser.add_argument('--display-limit', type=int, default=50, help='Max sites to display (default: 50)')
-    parser.add_argument('--save-format', choices=['txt', 'csv', 'json'], default='txt',
+    parser.add_argument('--save-format', choices=['txt', 'csv', 'json', 'jsonl'], default='txt',
                        help='Format for saving sites (default: txt)')
     parser.add_argument('--output', type=str, help='Output filename (default: auto-generated)')
     parser.add_argument('--no-save', action='store_true', help='Don\'t save results to file')
+    parser.add_argument('--fsync-interval', type=float, default=RESULTS_FSYNC_INTERVAL,
+                       help=f'Max seconds before streamed sites are fsynced (default: {RESULTS_FSYNC_INTERVAL})')
+    parser.add_argument('--fsync-every', type=int, default=RESULTS_FSYNC_EVERY,
+                       help=f'Streamed sites between fsyncs (default: {RESULTS_FSYNC_EVERY})')
+    parser.add_argument('--rotate-mb', type=int, default=RESULTS_ROTATE_MB,
+                       help=f'Start a new output segment after this many MB (default: {RESULTS_ROTATE_MB})')
+    parser.add_argument('--store', type=str,
+                       help='SQLite store that sites are written to as they are found (default: auto-generated)')
+    parser.add_argument('--resume', type=str, metavar='STORE',
+                       help='Continue a previous run: skip sites already in STORE and keep adding to it')
+    parser.add_argument('--no-store', action='store_true', help='Only keep sites in memory until the run ends')
+    parser.add_argument('--verify', action='store_true',
+                       help='Probe found sites and record live/password/closed/non_shopify next to each URL')
+    parser.add_argument('--verify-workers', type=int, default=VERIFY_WORKERS,
+                       help=f'Stores probed at once with --verify (default: {VERIFY_WORKERS})')
+    parser.add_argument('--verify-timeout', type=float, default=VERIFY_TIMEOUT,
+                       help=f'Seconds per verification request (default: {VERIFY_TIMEOUT})')
+    parser.add_argument('--enrich', action='store_true',
+                       help='Fetch primary domain, name, currency and product count of found stores into the store')
+    parser.add_argument('--enrich-workers', type=int, default=ENRICH_CONCURRENCY,
+                       help=f'Stores enriched at once (default: {ENRICH_CONCURRENCY})')
+    parser.add_argument('--enrich-ttl', type=int, default=ENRICH_TTL,
+                       help=f'Hours before an enriched store is fetched again (default: {ENRICH_TTL})')
+    parser.add_argument('--known', type=str, metavar='FILE',
+                       help='Skip sites already found elsewhere (site list, .db store or prebuilt .bloom filter)')
+    parser.add_argument('--record', type=str, metavar='ARCHIVE',
+                       help='Append every raw engine response (compressed, with its metadata) to ARCHIVE')
+    parser.add_argument('--metrics', type=str, nargs='?', const=METRICS_ADDRESS, metavar='HOST:PORT',
+                       help=f'Serve Prometheus /metrics and /metrics.json while running (default: {METRICS_ADDRESS})')
+    
+    # "coordinator [HOST:PORT]" and "worker --connect HOST:PORT" are shorthands for the flags
+    argv = sys.argv[1:]
+    if argv[:1] == ['coordinator']:
+        argv = ['--coordinator'] + argv[1:]
+    elif argv[:1] == ['worker']:
+        argv = argv[1:]
+        if '--connect' not in argv:
+            parser.error("worker needs --connect HOST:PORT")
+    args = parser.parse_args(argv)
+    
+    if args.connect and (args.load_sites or args.coordinator or args.enrich_store or args.replay):
+        parser.error("--connect can't be combined with --load-sites, --enrich-store, --coordinator or --replay")
+    if not (args.proxyless or args.proxy_file or args.load_sites or args.coordinator or args.enrich_store
+            or args.replay):
+        if not args.connect:
+            parser.error("one of the arguments --proxyless --proxy-file --load-sites --enrich-store "
+                         "--coordinator --replay is required")
+        args.proxyless = True
     
-    args = parser.parse_args()
+    engine_rates = {}
+    for item in args.engine_rate:
+        name, _, rate = item.partition('=')
+        try:
+            engine_rates[name] = float(rate)
+        except ValueError:
+            parser.error(f"invalid --engine-rate {item!r} (expected NAME=RATE)")
+    selector_file = None if args.no_selector_stats else args.selector_stats
+    adaptive = not args.fixed_workers
     
-    # Handle Ctrl+C gracefully
+    # Handle Ctrl+C gracefully: the first one lets workers finish and results get saved
     def signal_handler(sig, frame):
-        print("\n\n🛑 Received Ctrl+C. Stopping...")
+        if stop_flag.is_set():
+            print("\n\n🛑 Forced exit.")
+            for process in shard_processes:
+                process.terminate()
+            if results_store:
+                path = results_store.path
+                results_store.close()
+                print(f"🗄️  {len(found_sites):,} sites are saved in {path} (continue with --resume {path})")
+            if site_writer:
+                site_writer.close()
+                print(f"📝 Streamed sites are in {', '.join(site_writer.segments)}")
+            os._exit(130)
+        print("\n\n🛑 Received Ctrl+C. Finishing in-flight searches and saving (Ctrl+C again to force)...")
         stop_flag.set()
-        time.sleep(1)
-        print("\nPartial results have been saved.")
-        sys.exit(0)
     
     signal.signal(signal.SIGINT, signal_handler)
     
@@ -887,22 +6025,14 @@ Examples:
     # Clear global variables
     global found_sites, stats
     found_sites.clear()
-    stats = {'found': 0, 'searches': 0, 'start_time': None, 'working_proxies': 0, 'failed_proxies': 0}
+    stats = {'found': 0, 'searches': 0, 'start_time': None, 'working_proxies': 0, 'failed_proxies': 0, 'throttled': 0}
     
     # Option 1: Load and display/save existing sites
     if args.load_sites:
         print(f"📁 Loading sites from: {args.load_sites}")
         
         try:
-            if args.load_sites.endswith('.json'):
-                with open(args.load_sites, 'r', encoding='utf-8') as f:
-                    loaded_sites = json.load(f)
-            else:
-                # Assume text file
-                with open(args.load_sites, 'r', encoding='utf-8') as f:
-                    loaded_sites = [line.strip() for line in f if line.strip()]
-            
-            found_sites.update(loaded_sites)
+            found_sites.update(iter_sites_from_file(args.load_sites))
             stats['found'] = len(found_sites)
             
             print(f"✅ Loaded {len(found_sites):,} sites")
@@ -919,46 +6049,179 @@ Examples:
             print(f"❌ Error loading file: {e}")
             return
     
+    if args.metrics:
+        open_metrics_server(args.metrics)
+    
+    # Enrich-only mode: fill in metadata for an existing results store
+    if args.enrich_store:
+        run_enrichment(args.enrich_store, args.enrich_workers, args.enrich_ttl)
+        return
+    
+    if args.known:
+        try:
+            found_sites.known = load_known_sites(args.known)
+            print(f"🧮 Skipping {found_sites.known.count:,} sites known from {args.known}")
+        except Exception as e:
+            print(f"❌ Error loading known sites: {e}")
+            return
+    
+    run_stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
+    def open_store():
+        """Open the results store and output writer for this run; False if the store can't be used"""
+        if args.resume:
+            opened = open_results_store(args.resume, resume=True) is not None
+        elif args.no_store:
+            opened = True
+        else:
+            opened = open_results_store(args.store or f"shopify_sites_{run_stamp}.db") is not None
+        if opened and not args.no_save:
+            open_site_writer(args.output or f"shopify_sites_{run_stamp}", args.save_format,
+                             args.fsync_interval, args.fsync_every, args.rotate_mb, args.verify)
+        if opened and args.verify:
+            open_verifier(args.verify_workers, args.verify_timeout, resume=bool(args.resume))
+        if opened and args.enrich:
+            open_enricher(args.enrich_workers, args.enrich_ttl, require_verified=args.verify)
+        return opened
+    
+    # With --processes every shard opens the response cache itself
+    response_cache_config = None
+    if args.response_cache and args.processes > 1:
+        response_cache_config = {'path': args.response_cache, 'ttl_minutes': args.response_cache_ttl,
+                                 'max_mb': args.response_cache_size, 'keep_bodies': args.cache_bodies}
+    elif args.response_cache:
+        open_response_cache(args.response_cache, args.response_cache_ttl, args.response_cache_size, args.cache_bodies)
+    # Shards append to the same archive, so it is created here first
+    if args.record and not args.replay:
+        open_response_archive(args.record)
+    
     # Option 2: Proxyless scraping
     if args.proxyless:
         print("🌐 MODE: PROXYLESS SCRAPING")
-        sites = run_proxyless_scraping(args.workers, args.duration)
+        if args.connect:
+            run_remote_worker(args.connect, None, args.workers, args.engine, engine_rates, warm_up=args.warm_up,
+                              adaptive=adaptive, hedge=args.hedge)
+            close_response_cache()
+            close_response_archive()
+            return
+        if not open_store():
+            return
+        if args.processes > 1:
+            sites = run_sharded_scraping(args.processes, None, args.workers, args.duration, args.warm_up,
+                                         args.engine, engine_rates, selector_file=selector_file,
+                                         response_cache_config=response_cache_config, known=args.known,
+                                         adaptive=adaptive, archive=args.record, hedge=args.hedge)
+        else:
+            sites = run_proxyless_scraping(args.workers, args.duration, args.warm_up, args.engine, engine_rates,
+                                           selector_file, adaptive, args.hedge)
     
     # Option 3: Proxy-based scraping
     elif args.proxy_file:
         print("🌐 MODE: PROXY-BASED SCRAPING")
         
-        # Load proxies
-        proxies = load_proxies_from_file(args.proxy_file, args.proxy_type)
-        if not proxies:
-            print("❌ No proxies loaded. Exiting.")
-            return
-        
-        # Test proxies if requested
-        if args.test_proxies:
-            working_proxies = test_proxies_batch(proxies, args.strict_test)
-            if not working_proxies:
+        if args.test_proxies and args.proxy_type == 'http' and async_engine_available():
+            # Stream the file through the async tester instead of loading it whole
+            proxies = test_proxies_stream(
+                args.proxy_file, args.proxy_type, args.strict_test, args.want_working,
+                None if args.no_proxy_cache else args.proxy_cache, args.proxy_cache_ttl
+            )
+            if not proxies:
                 print("❌ No working proxies found. Exiting.")
                 return
             
             # Save working proxies
-            proxy_filename = save_sites_to_file(working_proxies, "working_proxies", 'txt')
-            proxies = working_proxies
+            save_sites_to_file(proxies, "working_proxies", 'txt')
+        
+        else:
+            # Load proxies
+            proxies = load_proxies_from_file(args.proxy_file, args.proxy_type)
+            if not proxies:
+                print("❌ No proxies loaded. Exiting.")
+                return
+            
+            # Test proxies if requested
+            if args.test_proxies:
+                working_proxies = test_proxies_batch(
+                    proxies, args.strict_test, args.want_working,
+                    None if args.no_proxy_cache else args.proxy_cache, args.proxy_cache_ttl
+                )
+                if not working_proxies:
+                    print("❌ No working proxies found. Exiting.")
+                    return
+                
+                # Save working proxies
+                save_sites_to_file(working_proxies, "working_proxies", 'txt')
+                proxies = working_proxies
+        
+        if stop_flag.is_set():
+            print("🛑 Stopped before scraping started.")
+            return
+        if args.connect:
+            run_remote_worker(args.connect, proxies, args.workers, args.engine, engine_rates, args.proxy_rate,
+                              args.warm_up, adaptive, args.hedge)
+            close_response_cache()
+            close_response_archive()
+            return
+        if not open_store():
+            return
         
-        sites = run_proxy_scraping(proxies, args.workers, args.duration)
+        if args.processes > 1:
+            sites = run_sharded_scraping(args.processes, proxies, args.workers, args.duration, args.warm_up,
+                                         args.engine, engine_rates, args.proxy_rate, selector_file,
+                                         response_cache_config, args.known, adaptive=adaptive, archive=args.record,
+                                         hedge=args.hedge)
+        else:
+            sites = run_proxy_scraping(proxies, args.workers, args.duration, args.warm_up, args.engine,
+                                       engine_rates, args.proxy_rate, selector_file, adaptive, args.hedge)
+    
+    # Option 4: Coordinator for remote workers
+    elif args.coordinator:
+        print("🌐 MODE: COORDINATOR")
+        if not open_store():
+            return
+        sites = run_coordinator(args.coordinator, args.duration, args.proxy_engines, args.lease_seconds,
+                                selector_file)
+    
+    # Option 5: Replay recorded engine responses
+    elif args.replay:
+        print("🌐 MODE: REPLAY")
+        if not open_store():
+            return
+        sites = run_replay(args.replay)
     
     # Post-processing
+    close_verifier()
+    close_enricher()
     if sites:
         print(f"\n🎯 Total unique sites found: {len(sites):,}")
         
         if args.display:
             display_sites(sites, args.display_limit)
         
-        if not args.no_save:
+        saved_file = None
+        if site_writer:
+            # Resumed sites never went through the writer, so merge them in too
+            resumed = ()
+            if args.resume and args.verify and results_store:
+                results_store.flush()
+                resumed = results_store.iter_statuses()
+            elif args.resume:
+                resumed = found_sites
+            saved_file = close_site_writer(args.output or f"shopify_sites_{len(sites)}_{run_stamp}", resumed)
+        elif not args.no_save:
             saved_file = save_sites_to_file(sites, args.output, args.save_format)
+        if saved_file:
             print(f"📁 Results saved to: {saved_file}")
     else:
         print("❌ No sites found. Try increasing duration or using different proxies.")
+    
+    close_site_writer()
+    close_response_cache()
+    close_response_archive()
+    close_metrics_server()
+    if results_store:
+        print(f"🗄️  Results store: {results_store.path} (continue with --resume {results_store.path})")
+        close_results_store()
 
 if __name__ == "__main__":
     main()
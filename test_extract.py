@@ -0,0 +1,78 @@
+"""The single-pass extractor must find what extract_shopify_urls() finds
+
+Run with: python -m pytest test_extract.py
+"""
+
+import re
+
+import pytest
+
+import benchmark
+import scraper
+
+CANONICAL_RE = re.compile(r"https://[a-z0-9\-]+\.myshopify\.com")
+
+# Trimmed result pages as the engines serve them
+SAVED_PAGES = {
+    'bing': '''<ol id="b_results"><li class="b_algo"><h2><a href="https://urban-threads.myshopify.com/collections/all"
+ h="ID=SERP,5123.1">Urban Threads</a></h2><div class="b_attribution"><cite>https://urban-threads.myshopify.com
+ &#8250; collections</cite></div></li><li class="b_algo"><h2><a href="https://www.bing.com/ck/a?!&amp;&amp;p=1f&amp;u=a1aHR0cHM6Ly9
+ &amp;ntb=1">Maple &amp; Co</a></h2><cite>maple-and-co.myshopify.com</cite></li></ol>
+ <a class="sb_pagN" href="/search?q=site%3amyshopify.com&amp;first=11">Next</a>''',
+    'duckduckgo': '''<div id="links" class="results"><div class="result results_links web-result">
+ <a rel="nofollow" class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fpebble%2Dhome.myshopify.com%2F&amp;rut=9c">
+ Pebble Home</a><a class="result__url" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fpebble%2Dhome.myshopify.com%2F">
+ pebble-home.myshopify.com</a></div><div class="result"><a class="result__a" href="https://Sable-Goods.MyShopify.com/">
+ Sable Goods</a></div></div><div class="nav-link"><form><input type="submit" value="Next"></form></div>''',
+    'yahoo': '''<div id="web"><ol><li><div class="compTitle"><a href="https://r.search.yahoo.com/_ylt=Awr;_ylu=Y29s/RV=2/RE=17/
+ RO=10/RU=https%3a%2f%2fcedar-grove.myshopify.com%2f/RK=2/RS=x-">Cedar Grove</a><span>cedar-grove.myshopify.com</span>
+ </div></li><li><a href="https://ember-fable22.myshopify.com/products/kettle">Ember</a></li></ol></div>
+ <a class="next" href="https://search.yahoo.com/search?p=x&amp;b=11">Next</a>''',
+    'searx': '''{"query": "site:myshopify.com", "results": [
+ {"url": "https://zephyr-lab.myshopify.com/", "title": "Zephyr Lab"},
+ {"url": "https:\\/\\/orbit-nook.myshopify.com\\/pages\\/about", "title": "Orbit Nook"},
+ {"url": "https://myshopify.com/river-quill", "title": "River Quill"}]}''',
+}
+
+EDGE_CASES = {
+    'mixed-case host': '<a href="HTTPS://Velvet-Willow.MyShopify.COM/products/x">x</a>',
+    'upper-case bare host': 'Visit IRIS-LUMEN.MYSHOPIFY.COM today',
+    'percent-encoded slashes': '<a href="/url?q=https%3A%2F%2Fumber-tidal.myshopify.com%2Fproducts">r</a>',
+    'percent-encoded host only': 'https%3A%2F%2Fabc.myshopify.com',
+    'backslash-escaped slashes': '{"url":"https:\\/\\/juniper-bay.myshopify.com\\/collections"}',
+    'backslash-escaped short label': 'https:\\/\\/abc.myshopify.com',
+    'label starting with dash': '<a href="https://-dash-start.myshopify.com">a</a>',
+    'label ending with dash': 'https://dash-end-.myshopify.com',
+    'short label with dash': 'https://-ab.myshopify.com',
+    'short bare label': '<cite>xyz.myshopify.com</cite>',
+    'short label in href': '<a href="https://ab.myshopify.com">x</a> ab.myshopify.com',
+    'store path': 'myshopify.com/store-name here',
+    'www prefix': 'www.shop.myshopify.com',
+    'port and dotted label': 'https://a.b-c.myshopify.com:443/x',
+    'credentials': 'user@login-shop.myshopify.com',
+    'no stores': '<html><body>nothing to see on shopify.com</body></html>',
+}
+
+def _expected(text):
+    """Canonical URLs extract_shopify_urls() finds; the fast path only emits canonical keys"""
+    return {url for url in scraper.extract_shopify_urls(text) if CANONICAL_RE.fullmatch(url)}
+
+@pytest.mark.parametrize('engine', sorted(SAVED_PAGES))
+def test_saved_pages(engine):
+    page = SAVED_PAGES[engine]
+    expected = _expected(page)
+    assert expected
+    assert set(scraper.extract_shopify_urls_fast(page.encode('utf-8'))) == expected
+
+@pytest.mark.parametrize('case', sorted(EDGE_CASES))
+def test_edge_cases(case):
+    text = EDGE_CASES[case]
+    assert set(scraper.extract_shopify_urls_fast(text.encode('utf-8'))) == _expected(text)
+
+def test_fixture_corpus():
+    corpus = benchmark.build_fixture_corpus(pages=100)
+    assert benchmark.check_extractor_equivalence(corpus) == []
+
+def test_streaming_scanner():
+    pages = [page.encode('utf-8') for page in list(SAVED_PAGES.values()) + list(EDGE_CASES.values())]
+    assert benchmark.check_scanner_equivalence(pages + benchmark.build_fixture_corpus(pages=50)) == []